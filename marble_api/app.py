@@ -1,13 +1,109 @@
-from fastapi import FastAPI, Request
+import asyncio
+import logging
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, HTTPException, Request, Response
+
+from marble_api.database import client
+from marble_api.database.backfills import run_once
+from marble_api.database.indexes import merge_indexes, reconcile_indexes
+from marble_api.database.sessions import CAUSAL_CONSISTENCY, add_operation_time
+from marble_api.utils import metrics
+from marble_api.utils.compression import CompressionMiddleware
+from marble_api.utils.metrics import MetricsMiddleware
 from marble_api.utils.routing import get_routes
 from marble_api.versions.v1.app import app as v1_app
 from marble_api.versions.versioning import add_fallback_routes
 
 VERSIONS = [("/v1", v1_app)]
 
+# One of "reconcile" (create and update indexes), "dry-run" (only log the changes that reconcile would make), or "off"
+INDEX_MODE = os.environ.get("MARBLE_API_INDEX_MODE", "reconcile")
+
+# One of "on" (run the backfills declared by all versions that have not been completed yet when the application
+# starts up) or "off"
+BACKFILL_MODE = os.environ.get("MARBLE_API_BACKFILL_MODE", "off")
+
+# A backfill that was started by a process that stopped before completing it is run again after this many seconds
+BACKFILL_LEASE_SECONDS = float(os.environ.get("MARBLE_API_BACKFILL_LEASE_SECONDS", 3600))
+
+# Responses smaller than this (in bytes) are not compressed
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("MARBLE_API_COMPRESSION_MINIMUM_SIZE", 1024))
+
+# Maximum size (in bytes) of a compressed request body after it is decompressed
+MAX_DECOMPRESSED_REQUEST_SIZE = int(os.environ.get("MARBLE_API_MAX_DECOMPRESSED_REQUEST_SIZE", 64 * 2**20))
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_up_client() -> None:
+    """
+    Connect to the database and open the minimum number of connections of the connection pool.
+
+    At least one connection is opened so that connection errors are logged when the application starts up.
+    """
+    try:
+        await client.aconnect()
+        n_connections = max(client.options.pool_options.min_pool_size, 1)
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(n_connections)))
+    except Exception:
+        logger.exception("unable to connect to the database")
+
 
-app = FastAPI()
+async def _provision_indexes() -> None:
+    """Reconcile the indexes declared by all versions with the indexes in the database."""
+    indexes = merge_indexes(*(getattr(version_app.state, "indexes", {}) for _, version_app in VERSIONS))
+    try:
+        await reconcile_indexes(client.db, indexes, dry_run=INDEX_MODE == "dry-run")
+    except Exception:
+        logger.exception("unable to provision indexes")
+
+
+async def _run_backfills() -> None:
+    """Run the backfills declared by all versions that have not been completed yet one at a time."""
+    for _, version_app in VERSIONS:
+        for backfill in getattr(version_app.state, "backfills", []):
+            try:
+                await run_once(client.db, backfill, BACKFILL_LEASE_SECONDS)
+            except Exception:
+                logger.exception("unable to run backfill %s", backfill.__qualname__)
+
+
+@asynccontextmanager
+async def lifespan(app_: FastAPI) -> AsyncIterator[None]:
+    """
+    Run tasks when the application starts up and shuts down.
+
+    The database client is connected before the application starts serving requests and is closed when it shuts down.
+    Indexes are provisioned and backfills are run in the background so that starting the application is
+    never blocked by index builds or by updating existing documents.
+    """
+    await _warm_up_client()
+    tasks = []
+    if INDEX_MODE != "off":
+        tasks.append(asyncio.create_task(_provision_indexes()))
+    if BACKFILL_MODE != "off":
+        tasks.append(asyncio.create_task(_run_backfills()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.close()
+        if metrics.metrics is not None:
+            metrics.metrics.mark_process_dead()
+
+
+app = FastAPI(lifespan=lifespan)
+if CAUSAL_CONSISTENCY == "on":
+    app.middleware("http")(add_operation_time)
+app.add_middleware(
+    CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE, max_request_size=MAX_DECOMPRESSED_REQUEST_SIZE
+)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
@@ -24,6 +120,15 @@ async def root(request: Request) -> dict:
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Return metrics in the Prometheus text format (if metrics are enabled)."""
+    if metrics.metrics is None:
+        raise HTTPException(status_code=404, detail="metrics are disabled")
+    content, media_type = metrics.metrics.render()
+    return Response(content, media_type=media_type)
+
+
 def _mount_versions() -> None:
     """Mount all implemented versions of this API under app."""
     for i, (prefix, version_app) in enumerate(VERSIONS):
@@ -2,10 +2,64 @@ import os
 
 from pymongo import AsyncMongoClient
 from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import ConfigurationError
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+from marble_api.database.metrics import CommandMetrics
+from marble_api.database.pool import PoolStats
+from marble_api.database.slow_queries import (
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_MAX_SHAPES,
+    SLOW_QUERY_THRESHOLD_MS,
+    SlowQueryLog,
+)
+from marble_api.utils import metrics
+
+# Client options that can be set by environment variables (these override options set in MONGODB_URI)
+_CLIENT_OPTIONS = {
+    "maxPoolSize": ("MARBLE_API_MONGODB_MAX_POOL_SIZE", int),
+    "minPoolSize": ("MARBLE_API_MONGODB_MIN_POOL_SIZE", int),
+    "maxIdleTimeMS": ("MARBLE_API_MONGODB_MAX_IDLE_TIME_MS", int),
+    "waitQueueTimeoutMS": ("MARBLE_API_MONGODB_WAIT_QUEUE_TIMEOUT_MS", int),
+    "serverSelectionTimeoutMS": ("MARBLE_API_MONGODB_SERVER_SELECTION_TIMEOUT_MS", int),
+    "compressors": ("MARBLE_API_MONGODB_COMPRESSORS", str),
+}
+
+# Values of MARBLE_API_READ_PREFERENCE and the corresponding read preferences (see read_preference)
+_READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Values of MARBLE_API_GEOMETRY_STORAGE and the corresponding numpy dtypes (see geometry_storage_dtype)
+_GEOMETRY_STORAGE_DTYPES = {"nested": None, "float64": "<f8", "float32": "<f4"}
 
 
 class Client(AsyncMongoClient):
-    """AsyncMongoClient with different defaults."""
+    """
+    AsyncMongoClient with different defaults.
+
+    Usage of the client's connection pools is tracked by the pool_stats listener. If metrics are enabled, the
+    duration of each command is recorded by a CommandMetrics listener. Commands that take longer than
+    SLOW_QUERY_THRESHOLD_MS are recorded by the slow_queries listener (which is None if the threshold is 0).
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.pool_stats = PoolStats()
+        kwargs["event_listeners"] = [*kwargs.get("event_listeners", []), self.pool_stats]
+        if metrics.metrics is not None:
+            kwargs["event_listeners"].append(CommandMetrics())
+        self.slow_queries = None
+        if SLOW_QUERY_THRESHOLD_MS > 0:
+            self.slow_queries = SlowQueryLog(
+                SLOW_QUERY_THRESHOLD_MS / 1000, explain=SLOW_QUERY_EXPLAIN == "on", max_shapes=SLOW_QUERY_MAX_SHAPES
+            )
+            self.slow_queries.attach(self)
+            kwargs["event_listeners"].append(self.slow_queries)
+        super().__init__(*args, **kwargs)
 
     def get_default_database(self, default: str | None = "marble-api", **kwargs) -> AsyncDatabase:
         """Override AsyncMongoClient.default_get_database but with a specific default."""
@@ -16,5 +70,85 @@ class Client(AsyncMongoClient):
         """Shortcut to get_default_database."""
         return self.get_default_database()
 
+    @property
+    def read_db(self) -> AsyncDatabase:
+        """
+        Shortcut to get_default_database with the READ_PREFERENCE read preference.
+
+        This should only be used by routes that only read from the database (other reads are always from the
+        primary so that they see the latest writes).
+        """
+        return self.get_default_database(read_preference=READ_PREFERENCE)
+
+
+def client_options() -> dict:
+    """Return the client options that are set by environment variables."""
+    return {
+        option: type_(os.environ[variable])
+        for option, (variable, type_) in _CLIENT_OPTIONS.items()
+        if os.environ.get(variable)
+    }
+
+
+def read_preference() -> Primary | PrimaryPreferred | Secondary | SecondaryPreferred | Nearest:
+    """
+    Return the read preference that is set by environment variables.
+
+    MARBLE_API_READ_PREFERENCE is the name of a read preference mode (eg. "secondaryPreferred", default: "primary")
+    and MARBLE_API_READ_MAX_STALENESS_SECONDS is the maximum replication lag of the secondaries that can be read from
+    (unlimited by default). A ValueError is raised if these are invalid.
+    """
+    mode = os.environ.get("MARBLE_API_READ_PREFERENCE", "primary")
+    max_staleness = os.environ.get("MARBLE_API_READ_MAX_STALENESS_SECONDS")
+    try:
+        read_preference_ = _READ_PREFERENCES[mode]
+    except KeyError:
+        raise ValueError(
+            f"invalid read preference {mode!r}, must be one of {', '.join(map(repr, _READ_PREFERENCES))}"
+        ) from None
+    if not max_staleness:
+        return read_preference_()
+    if read_preference_ is Primary:
+        raise ValueError("max staleness cannot be set with the primary read preference")
+    try:
+        return read_preference_(max_staleness=int(max_staleness))
+    except (ValueError, TypeError, ConfigurationError) as e:
+        raise ValueError(f"invalid read preference {mode!r} with max staleness {max_staleness}: {e}") from e
+
+
+def geometry_storage_dtype() -> str | None:
+    """
+    Return the numpy dtype used to store geometry coordinates that is set by environment variables.
+
+    MARBLE_API_GEOMETRY_STORAGE is one of "nested" (coordinates are stored as nested arrays, default), "float64" or
+    "float32" (coordinates are stored as packed binary arrays). A ValueError is raised if it is invalid.
+    """
+    storage = os.environ.get("MARBLE_API_GEOMETRY_STORAGE", "nested")
+    try:
+        return _GEOMETRY_STORAGE_DTYPES[storage]
+    except KeyError:
+        raise ValueError(
+            f"invalid geometry storage {storage!r}, must be one of {', '.join(map(repr, _GEOMETRY_STORAGE_DTYPES))}"
+        ) from None
+
+
+def create_client(uri: str | None = None, **kwargs) -> Client:
+    """
+    Return a new client for uri (MONGODB_URI by default) with the options that are set by environment variables.
+
+    Wire compression is negotiated with the server: the first compressor in MARBLE_API_MONGODB_COMPRESSORS (eg.
+    "zstd,snappy,zlib") that is also supported by the server is used. The zstd and snappy compressors require
+    extra packages (pip install marble-api[compression]) and are ignored (with a warning) if they are not installed.
+    Options in kwargs override all other options.
+    """
+    return Client(uri or os.environ["MONGODB_URI"], **{"tz_aware": True, **client_options(), **kwargs})
+
+
+client = create_client()
+
+# Read preference of the routes that only read from the database (see Client.read_db)
+READ_PREFERENCE = read_preference()
 
-client = Client(os.environ["MONGODB_URI"], tz_aware=True)
+# Geometry coordinates are stored as nested arrays by default ("nested"). Set this to "float64" or "float32"
+# to store them as packed binary arrays instead (see marble_api.utils.geojson.pack_geometry).
+GEOMETRY_STORAGE_DTYPE = geometry_storage_dtype()
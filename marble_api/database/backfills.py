@@ -0,0 +1,54 @@
+import datetime
+import logging
+from collections.abc import Awaitable, Callable
+
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Collection that records which backfills are being run and which have been completed (one document per backfill)
+BACKFILL_COLLECTION = "backfill"
+
+
+def backfill_name(backfill: Callable) -> str:
+    """Return the name that a backfill is recorded as."""
+    return f"{backfill.__module__}.{backfill.__qualname__}"
+
+
+async def run_once(database: AsyncDatabase, backfill: Callable[[], Awaitable], lease_seconds: float) -> bool:
+    """
+    Run backfill unless it has already been completed or it is currently being run by another process.
+
+    A process claims a backfill (in BACKFILL_COLLECTION) before running it and records when it is completed
+    so that each backfill is only run once, even if several processes start up at the same time. If the
+    backfill raises an error, the claim is released so that it is run again the next time. A claim expires after
+    lease_seconds so that the backfill is also run again if the process that claimed it stopped before completing
+    it. Returns True if the backfill was run.
+
+    Delete the backfill's document from BACKFILL_COLLECTION to run a completed backfill again.
+    """
+    collection = database[BACKFILL_COLLECTION]
+    name = backfill_name(backfill)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    claimable = {
+        "_id": name,
+        "completed": None,
+        "$or": [{"claimed": None}, {"claimed": {"$lt": now - datetime.timedelta(seconds=lease_seconds)}}],
+    }
+    try:
+        # if the backfill's document exists but cannot be claimed, the upsert fails with a duplicate _id
+        await collection.update_one(claimable, {"$set": {"claimed": now}}, upsert=True)
+    except DuplicateKeyError:
+        logger.info("backfill %s has been completed or is being run by another process", name)
+        return False
+    try:
+        await backfill()
+    except BaseException:
+        await collection.update_one({"_id": name, "claimed": now}, {"$set": {"claimed": None}})
+        raise
+    await collection.update_one(
+        {"_id": name}, {"$set": {"completed": datetime.datetime.now(datetime.timezone.utc), "claimed": None}}
+    )
+    logger.info("completed backfill %s", name)
+    return True
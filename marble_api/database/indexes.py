@@ -0,0 +1,107 @@
+import logging
+from collections.abc import Iterable
+from typing import TypedDict
+
+from pymongo import TEXT, IndexModel
+from pymongo.asynchronous.database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+# Index information returned by the database that does not describe what is indexed
+_IGNORED_INDEX_OPTIONS = frozenset(("v", "ns", "background", "name", "key"))
+
+
+class IndexDiff(TypedDict):
+    """Names of indexes that must be created or dropped to make a collection's indexes match their declaration."""
+
+    create: list[str]
+    drop: list[str]
+    unmanaged: list[str]
+
+
+def _normalized_key(key: Iterable[tuple[str, int | str]]) -> list[tuple[str, int | str]]:
+    """
+    Return the index key in the format that is returned by the database.
+
+    The fields of a text index are replaced by the "_fts" and "_ftsx" fields (the indexed fields are
+    described by the index's weights instead).
+    """
+    key = dict(key)
+    if "_fts" in key:
+        return list(key.items())
+    normalized = []
+    for field, direction in key.items():
+        if direction != TEXT:
+            normalized.append((field, direction))
+        elif ("_fts", TEXT) not in normalized:
+            normalized.extend((("_fts", TEXT), ("_ftsx", 1)))
+    return normalized
+
+
+def _matches(existing: dict, declared: dict) -> bool:
+    """
+    Return True if the existing index has the same key and options as the declared one.
+
+    Options that are not declared are ignored since the database adds default options to some
+    types of indexes (eg. 2dsphereIndexVersion).
+    """
+    return _normalized_key(existing["key"]) == _normalized_key(declared["key"]) and all(
+        existing.get(option) == value for option, value in declared.items() if option not in _IGNORED_INDEX_OPTIONS
+    )
+
+
+def diff_indexes(existing: dict[str, dict], declared: Iterable[IndexModel]) -> IndexDiff:
+    """
+    Return the difference between the existing and the declared indexes of a collection.
+
+    The existing indexes should be in the format returned by AsyncCollection.index_information.
+    Indexes that exist but whose keys or options are different from their declaration must be dropped
+    and then created again. Indexes that exist but are not declared (except for the _id index) are
+    unmanaged and are never dropped.
+    """
+    diff = IndexDiff(create=[], drop=[], unmanaged=[])
+    declared_by_name = {model.document["name"]: model.document for model in declared}
+    for name, document in declared_by_name.items():
+        if name not in existing:
+            diff["create"].append(name)
+        elif not _matches(existing[name], document):
+            diff["drop"].append(name)
+            diff["create"].append(name)
+    diff["unmanaged"] = [name for name in existing if name not in declared_by_name and name != "_id_"]
+    return diff
+
+
+async def reconcile_indexes(
+    database: AsyncDatabase, indexes: dict[str, list[IndexModel]], dry_run: bool = False
+) -> dict[str, IndexDiff]:
+    """
+    Create and update indexes in the database so that they match the declared indexes.
+
+    indexes maps collection names to the indexes declared for that collection. If dry_run is True, the
+    differences are only logged and returned, nothing is changed in the database.
+    """
+    diffs = {}
+    for collection_name, declared in indexes.items():
+        collection = database[collection_name]
+        diff = diffs[collection_name] = diff_indexes(await collection.index_information(), declared)
+        logger.info("indexes for collection %s: %s%s", collection_name, diff, " (dry run)" if dry_run else "")
+        if dry_run:
+            continue
+        for name in diff["drop"]:
+            await collection.drop_index(name)
+        if diff["create"]:
+            await collection.create_indexes([model for model in declared if model.document["name"] in diff["create"]])
+    return diffs
+
+
+def merge_indexes(*indexes: dict[str, list[IndexModel]]) -> dict[str, list[IndexModel]]:
+    """
+    Merge index declarations.
+
+    If indexes with the same name are declared for the same collection, the last declaration is used.
+    """
+    merged = {}
+    for declaration in indexes:
+        for collection_name, models in declaration.items():
+            merged.setdefault(collection_name, {}).update({model.document["name"]: model for model in models})
+    return {collection_name: list(models.values()) for collection_name, models in merged.items()}
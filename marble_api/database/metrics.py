@@ -0,0 +1,23 @@
+from pymongo.monitoring import CommandFailedEvent, CommandListener, CommandStartedEvent, CommandSucceededEvent
+
+from marble_api.utils import metrics
+
+
+class CommandMetrics(CommandListener):
+    """Command listener that records the duration of each MongoDB command (labelled by command name and outcome)."""
+
+    def started(self, event: CommandStartedEvent) -> None:
+        """Do nothing when a command starts (the duration is reported when it ends)."""
+
+    def succeeded(self, event: CommandSucceededEvent) -> None:
+        """Record the duration of a command that succeeded."""
+        self._observe(event, "succeeded")
+
+    def failed(self, event: CommandFailedEvent) -> None:
+        """Record the duration of a command that failed."""
+        self._observe(event, "failed")
+
+    @staticmethod
+    def _observe(event: CommandSucceededEvent | CommandFailedEvent, outcome: str) -> None:
+        if metrics.metrics is not None:
+            metrics.metrics.command_duration.labels(event.command_name, outcome).observe(event.duration_micros / 1e6)
@@ -0,0 +1,119 @@
+from pymongo.monitoring import (
+    ConnectionCheckedInEvent,
+    ConnectionCheckedOutEvent,
+    ConnectionCheckOutFailedEvent,
+    ConnectionCheckOutStartedEvent,
+    ConnectionClosedEvent,
+    ConnectionCreatedEvent,
+    ConnectionPoolListener,
+    ConnectionReadyEvent,
+    PoolClearedEvent,
+    PoolClosedEvent,
+    PoolCreatedEvent,
+    PoolReadyEvent,
+)
+
+
+def _server_key(address: tuple[str, int | None]) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+
+class PoolStats(ConnectionPoolListener):
+    """
+    Connection pool listener that keeps counters describing the connection pool of each server.
+
+    The counters for each server (by "host:port") are:
+
+    - open: number of connections that are currently open
+    - in_use: number of connections that are currently checked out of the pool
+    - waiting: number of operations that are currently waiting to check out a connection
+    - created/closed: total number of connections that were created/closed
+    - checkouts: total number of connections that were checked out
+    - checkout_failures: total number of times that a connection could not be checked out (eg. a wait queue timeout)
+    - checkout_wait_seconds/max_checkout_wait_seconds: total and maximum time spent checking out connections
+    - cleared: number of times that the pool was cleared (all connections closed after a network error)
+    """
+
+    def __init__(self) -> None:
+        self._servers: dict[str, dict[str, int | float]] = {}
+
+    def _server(self, address: tuple[str, int | None]) -> dict[str, int | float]:
+        return self._servers.setdefault(
+            _server_key(address),
+            {
+                "open": 0,
+                "in_use": 0,
+                "waiting": 0,
+                "created": 0,
+                "closed": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "checkout_wait_seconds": 0.0,
+                "max_checkout_wait_seconds": 0.0,
+                "cleared": 0,
+            },
+        )
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """Return a copy of the counters for each server."""
+        return {address: dict(counters) for address, counters in self._servers.items()}
+
+    def pool_created(self, event: PoolCreatedEvent) -> None:
+        """Add counters for a new pool."""
+        self._server(event.address)
+
+    def pool_ready(self, event: PoolReadyEvent) -> None:
+        """Do nothing when a pool is ready."""
+
+    def pool_cleared(self, event: PoolClearedEvent) -> None:
+        """Count the number of times that a pool is cleared."""
+        self._server(event.address)["cleared"] += 1
+
+    def pool_closed(self, event: PoolClosedEvent) -> None:
+        """Remove the counters for a closed pool."""
+        self._servers.pop(_server_key(event.address), None)
+
+    def connection_created(self, event: ConnectionCreatedEvent) -> None:
+        """Count a new open connection."""
+        server = self._server(event.address)
+        server["open"] += 1
+        server["created"] += 1
+
+    def connection_ready(self, event: ConnectionReadyEvent) -> None:
+        """Do nothing when a connection is ready."""
+
+    def connection_closed(self, event: ConnectionClosedEvent) -> None:
+        """Count a closed connection."""
+        server = self._server(event.address)
+        server["open"] -= 1
+        server["closed"] += 1
+
+    def connection_check_out_started(self, event: ConnectionCheckOutStartedEvent) -> None:
+        """Count an operation that is waiting for a connection."""
+        self._server(event.address)["waiting"] += 1
+
+    def connection_check_out_failed(self, event: ConnectionCheckOutFailedEvent) -> None:
+        """Count an operation that could not check out a connection."""
+        server = self._server(event.address)
+        server["waiting"] -= 1
+        server["checkout_failures"] += 1
+        self._add_wait(server, event.duration)
+
+    def connection_checked_out(self, event: ConnectionCheckedOutEvent) -> None:
+        """Count a connection that is in use."""
+        server = self._server(event.address)
+        server["waiting"] -= 1
+        server["in_use"] += 1
+        server["checkouts"] += 1
+        self._add_wait(server, event.duration)
+
+    def connection_checked_in(self, event: ConnectionCheckedInEvent) -> None:
+        """Count a connection that is no longer in use."""
+        self._server(event.address)["in_use"] -= 1
+
+    @staticmethod
+    def _add_wait(server: dict[str, int | float], duration: float | None) -> None:
+        if duration is not None:
+            server["checkout_wait_seconds"] += duration
+            server["max_checkout_wait_seconds"] = max(server["max_checkout_wait_seconds"], duration)
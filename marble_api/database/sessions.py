@@ -0,0 +1,88 @@
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextvars import ContextVar
+
+from bson import Timestamp
+from fastapi import HTTPException, Request, Response
+from pymongo.asynchronous.client_session import AsyncClientSession
+
+from marble_api.database import client
+
+# Header that contains the operation time of the latest write (in responses to requests that write to the database)
+# and that requests a causally consistent read after that operation time (in requests that only read)
+OPERATION_TIME_HEADER = "X-Marble-Operation-Time"
+
+# One of "on" (add the OPERATION_TIME_HEADER to responses to requests that may write to the database) or "off"
+CAUSAL_CONSISTENCY = os.environ.get("MARBLE_API_CAUSAL_CONSISTENCY", "off")
+
+_WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+# Session used by the writes of the current request (see add_operation_time)
+_write_session: ContextVar[AsyncClientSession | None] = ContextVar("write_session", default=None)
+
+
+def format_operation_time(operation_time: Timestamp) -> str:
+    """Return operation_time formatted as "<seconds>.<increment>"."""
+    return f"{operation_time.time}.{operation_time.inc}"
+
+
+def parse_operation_time(value: str) -> Timestamp:
+    """Return the operation time formatted by format_operation_time. A ValueError is raised if value is invalid."""
+    time, _, inc = value.partition(".")
+    try:
+        return Timestamp(int(time), int(inc))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid operation time {value!r}") from e
+
+
+def write_session() -> AsyncClientSession | None:
+    """
+    Return the session that the writes of the current request must use.
+
+    None is returned unless the request is handled by add_operation_time (for example, if CAUSAL_CONSISTENCY is
+    "off" or when writing outside of a request) in which case writes use an implicit session.
+    """
+    return _write_session.get()
+
+
+async def causal_session(request: Request) -> AsyncIterator[AsyncClientSession | None]:
+    """
+    Yield a causally consistent session if the request contains the OPERATION_TIME_HEADER or None otherwise.
+
+    Reads that use this session see all writes up to that operation time, even if they are read from a secondary
+    (the secondary waits until it has replicated those writes). This is a FastAPI dependency.
+    """
+    if (value := request.headers.get(OPERATION_TIME_HEADER)) is None:
+        yield None
+        return
+    try:
+        operation_time = parse_operation_time(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    async with client.start_session(causal_consistency=True) as session:
+        session.advance_operation_time(operation_time)
+        yield session
+
+
+async def add_operation_time(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    """
+    Add the OPERATION_TIME_HEADER to successful responses to requests that may write to the database.
+
+    The writes of these requests use the session returned by write_session and the header contains the operation
+    time of that session after the request has been handled (ie. of the latest write of the request). Clients that
+    send this header with their next read requests will see their own writes, even if reads are routed to
+    secondaries. This is an HTTP middleware that is only added to the application if CAUSAL_CONSISTENCY is "on".
+    """
+    if request.method not in _WRITE_METHODS:
+        return await call_next(request)
+    async with client.start_session(causal_consistency=True) as session:
+        token = _write_session.set(session)
+        try:
+            response = await call_next(request)
+        finally:
+            _write_session.reset(token)
+    # the operation time is None if nothing was written or if the server does not report operation times (standalone
+    # servers do not)
+    if response.status_code < 400 and session.operation_time is not None:
+        response.headers[OPERATION_TIME_HEADER] = format_operation_time(session.operation_time)
+    return response
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from pymongo.monitoring import CommandFailedEvent, CommandListener, CommandStartedEvent, CommandSucceededEvent
+
+if TYPE_CHECKING:
+    from pymongo import AsyncMongoClient
+
+# Commands that take longer than this (in milliseconds) are recorded in the slow query log (0 disables the log)
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("MARBLE_API_SLOW_QUERY_THRESHOLD_MS", 0))
+
+# One of "on" (explain the first slow command of each shape) or "off"
+SLOW_QUERY_EXPLAIN = os.environ.get("MARBLE_API_SLOW_QUERY_EXPLAIN", "off")
+
+# Maximum number of shapes kept in the slow query log (the least recently seen shapes are removed first)
+SLOW_QUERY_MAX_SHAPES = int(os.environ.get("MARBLE_API_SLOW_QUERY_MAX_SHAPES", 100))
+
+# Value that replaces every value in a filter (so that the shape of a query does not contain any data)
+REDACTED = "?"
+
+# Fields of each command that describe the shape of a query. Fields in _REDACTED_FIELDS contain values (which are
+# redacted), the other fields only contain field names and sort directions.
+_SHAPE_FIELDS = {
+    "find": ("filter", "sort", "projection", "hint", "skip", "limit"),
+    "aggregate": ("pipeline", "hint"),
+    "count": ("query", "hint"),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort", "update"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+_REDACTED_FIELDS = frozenset(("filter", "skip", "limit", "pipeline", "query", "update", "updates", "deletes"))
+
+# Pipeline stages whose arguments only contain field names and sort directions (which are not redacted)
+_UNREDACTED_STAGES = frozenset(("$sort", "$project", "$unset", "$count"))
+
+# Commands that are explained (explaining a write command does not apply the write but its plan is rarely useful)
+_EXPLAINED_COMMANDS = frozenset(("find", "aggregate", "count", "distinct"))
+
+# Fields of an explain result that are removed (the command contains the values of the original query)
+_EXPLAIN_NOISE = frozenset(("command", "serverInfo", "serverParameters", "ok", "operationTime", "$clusterTime"))
+
+logger = logging.getLogger(__name__)
+
+
+def redact(value: object) -> object:
+    """
+    Return value with every scalar replaced by REDACTED.
+
+    Keys (field names and operators) are kept. Lists are reduced to their distinct redacted items so that queries
+    that only differ by the number of values (eg. in an $in operator) have the same shape.
+    """
+    if isinstance(value, dict):
+        return {key: item if key in _UNREDACTED_STAGES else redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = []
+        for item in map(redact, value):
+            if item not in items:
+                items.append(item)
+        return items
+    return REDACTED
+
+
+def command_shape(command_name: str, command: dict) -> dict | None:
+    """
+    Return the shape of a command: its name, collection and fields that describe the query with values redacted.
+
+    None is returned for commands that are not queries (eg. insert or getMore).
+    """
+    if (fields := _SHAPE_FIELDS.get(command_name)) is None:
+        return None
+    shape = {"command": command_name, "collection": command.get(command_name)}
+    for field in fields:
+        if field in command:
+            shape[field] = redact(command[field]) if field in _REDACTED_FIELDS else command[field]
+    return shape
+
+
+def shape_id(database_name: str, shape: dict) -> str:
+    """Return an identifier of a command shape in a database."""
+    return hashlib.sha256(json.dumps([database_name, shape], default=str).encode()).hexdigest()[:16]
+
+
+def _explain_summary(result: dict) -> dict:
+    """Return the explain result without the fields that are not useful (or that contain the original values)."""
+    return {key: value for key, value in result.items() if key not in _EXPLAIN_NOISE}
+
+
+class SlowQueryLog(CommandListener):
+    """
+    Command listener that records commands that take longer than threshold seconds, grouped by shape.
+
+    The shape of a command is its name, collection and the fields that describe the query (eg. the filter and
+    sort of a find command) with all values redacted (see command_shape). For each shape, the number of slow
+    commands and their total and maximum duration are recorded.
+
+    If explain is True, the first slow command of each shape is explained with the "executionStats" verbosity
+    in the background (with the client passed to attach). At most max_shapes shapes are kept.
+    """
+
+    def __init__(self, threshold: float, explain: bool = True, max_shapes: int = 100) -> None:
+        self.threshold = threshold
+        self.explain = explain
+        self.max_shapes = max_shapes
+        self._client: "AsyncMongoClient | None" = None
+        self._started: dict[tuple, tuple[str, dict]] = {}
+        self._shapes: OrderedDict[str, dict] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+
+    def attach(self, client: "AsyncMongoClient") -> None:
+        """Set the client that is used to explain slow commands."""
+        self._client = client
+
+    def queries(self) -> list[dict]:
+        """Return the recorded shapes (without their explain results), slowest total duration first."""
+        return sorted(
+            ({key: value for key, value in entry.items() if key != "explain"} for entry in self._shapes.values()),
+            key=lambda entry: entry["total_seconds"],
+            reverse=True,
+        )
+
+    def query(self, id_: str) -> dict | None:
+        """Return the recorded shape with the id_ (with its explain result) or None if it is not recorded."""
+        return self._shapes.get(id_)
+
+    def clear(self) -> None:
+        """Remove all recorded shapes."""
+        self._shapes.clear()
+
+    def started(self, event: CommandStartedEvent) -> None:
+        """Keep the command until it ends (the events of ended commands do not contain the command)."""
+        if event.command_name in _SHAPE_FIELDS:
+            self._started[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event: CommandSucceededEvent) -> None:
+        """Record the command if it was slow."""
+        self._ended(event)
+
+    def failed(self, event: CommandFailedEvent) -> None:
+        """Record the command if it was slow (eg. if it failed because it exceeded its time limit)."""
+        self._ended(event)
+
+    def _ended(self, event: CommandSucceededEvent | CommandFailedEvent) -> None:
+        if (started := self._started.pop((event.connection_id, event.request_id), None)) is None:
+            return
+        if (duration := event.duration_micros / 1e6) < self.threshold:
+            return
+        database_name, command = started
+        if (shape := command_shape(event.command_name, command)) is None:
+            return
+        id_ = shape_id(database_name, shape)
+        if (entry := self._shapes.get(id_)) is None:
+            entry = self._shapes[id_] = {
+                "id": id_,
+                "database": database_name,
+                "shape": shape,
+                "count": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "first_seen": time.time(),
+                "last_seen": None,
+                "explain": None,
+            }
+            logger.warning("slow %s command (%.3fs): %s", event.command_name, duration, json.dumps(shape, default=str))
+            self._start_explain(entry, database_name, event.command_name, command)
+            while len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+        self._shapes.move_to_end(id_)
+        entry["count"] += 1
+        entry["total_seconds"] += duration
+        entry["max_seconds"] = max(entry["max_seconds"], duration)
+        entry["last_seen"] = time.time()
+
+    def _start_explain(self, entry: dict, database_name: str, command_name: str, command: dict) -> None:
+        """Explain command in the background and add the result to entry."""
+        if not self.explain or self._client is None or command_name not in _EXPLAINED_COMMANDS:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # commands of synchronous clients are not explained
+            return
+        explained = {command_name: command[command_name]}
+        explained.update((field, command[field]) for field in _SHAPE_FIELDS[command_name] if field in command)
+        task = loop.create_task(self._explain(entry, database_name, explained))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, entry: dict, database_name: str, command: dict) -> None:
+        try:
+            result = await self._client[database_name].command({"explain": command, "verbosity": "executionStats"})
+        except Exception as e:
+            entry["explain"] = {"error": str(e)}
+        else:
+            entry["explain"] = _explain_summary(result)
@@ -0,0 +1,200 @@
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+import bson
+from bson.codec_options import CodecOptions
+
+_CODEC_OPTIONS = CodecOptions(tz_aware=True)
+
+
+class LRUCache:
+    """
+    In-process least recently used cache with a time to live and a maximum total size in bytes.
+
+    Values are stored as bytes so that the size of the cache can be measured exactly. If adding a value
+    would increase the total size of all values over max_bytes, the least recently used values are evicted
+    until the new value fits. Values larger than max_bytes are never stored.
+
+    >>> cache = LRUCache(max_bytes=10, ttl=60)
+    >>> cache.set("a", b"12345678")
+    >>> cache.get("a")
+    b'12345678'
+    >>> cache.set("b", b"1234")  # evicts "a"
+    >>> cache.get("a")  # is None
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of values in the cache (including ones that are expired but not yet evicted)."""
+        return len(self._data)
+
+    def get(self, key: str) -> bytes | None:
+        """Return the value for key or None if it is not in the cache or it is expired."""
+        if (entry := self._data.get(key)) is None:
+            self.misses += 1
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            self.delete(key)
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """Add a value to the cache, evicting the least recently used values if the cache is full."""
+        self.delete(key)
+        if len(value) > self.max_bytes:
+            return
+        while self.size + len(value) > self.max_bytes:
+            _, (_, evicted) = self._data.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self.size += len(value)
+
+    def delete(self, key: str) -> None:
+        """Remove the value for key from the cache if it exists."""
+        if (entry := self._data.pop(key, None)) is not None:
+            self.size -= len(entry[1])
+
+    def clear(self) -> None:
+        """Remove all values from the cache."""
+        self._data.clear()
+        self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return counters describing the current usage of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class SharedCache(Protocol):
+    """Cache that can be shared between multiple processes."""
+
+    async def get(self, key: str) -> bytes | None:
+        """Return the value for key or None if it is not in the cache."""
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Add a value to the cache that expires after ttl seconds."""
+
+    async def delete(self, key: str) -> None:
+        """Remove the value for key from the cache if it exists."""
+
+
+class LocalSharedCache:
+    """
+    SharedCache implementation that stores values in the current process.
+
+    This is a stand-in for a shared cache service which is useful for testing and development.
+    """
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        """Return the value for key or None if it is not in the cache or it is expired."""
+        expires, value = self._data.get(key, (0, None))
+        if expires < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Add a value to the cache that expires after ttl seconds."""
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        """Remove the value for key from the cache if it exists."""
+        self._data.pop(key, None)
+
+
+class RedisSharedCache:
+    """
+    SharedCache implementation backed by a Redis server.
+
+    This requires the redis package to be installed (pip install marble-api[cache]).
+    """
+
+    def __init__(self, uri: str, prefix: str = "marble-api:") -> None:
+        import redis.asyncio
+
+        self.prefix = prefix
+        self._redis = redis.asyncio.from_url(uri)
+
+    async def get(self, key: str) -> bytes | None:
+        """Return the value for key or None if it is not in the cache."""
+        return await self._redis.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Add a value to the cache that expires after ttl seconds."""
+        await self._redis.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        """Remove the value for key from the cache if it exists."""
+        await self._redis.delete(self.prefix + key)
+
+
+class DocumentCache:
+    """
+    Two tier read-through cache for MongoDB documents.
+
+    Documents are stored as BSON in an in-process LRUCache and, optionally, in a SharedCache that is
+    available to all processes. Documents found in the shared cache are added to the in-process cache.
+
+    Note that deleting a document only removes it from the in-process cache of the current process
+    (and from the shared cache). Other processes may continue to return the deleted document from their
+    in-process cache for up to ttl seconds.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, shared: SharedCache | None = None) -> None:
+        self.local = LRUCache(max_bytes, ttl)
+        self.shared = shared
+        self.shared_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if either tier of this cache can store documents."""
+        return self.local.max_bytes > 0 or self.shared is not None
+
+    async def get(self, key: str) -> dict | None:
+        """Return the document for key or None if it is not in either tier of the cache."""
+        if (value := self.local.get(key)) is None and self.shared is not None:
+            if (value := await self.shared.get(key)) is not None:
+                self.shared_hits += 1
+                self.local.set(key, value)
+        return None if value is None else bson.decode(value, codec_options=_CODEC_OPTIONS)
+
+    async def set(self, key: str, document: dict) -> None:
+        """Add a document to both tiers of the cache."""
+        value = bson.encode(document)
+        self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.set(key, value, self.local.ttl)
+
+    async def delete(self, key: str) -> None:
+        """Remove the document for key from both tiers of the cache."""
+        self.local.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(key)
+
+    def stats(self) -> dict[str, int]:
+        """Return counters describing the current usage of the cache."""
+        return {**self.local.stats(), "shared_hits": self.shared_hits}
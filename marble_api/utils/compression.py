@@ -0,0 +1,285 @@
+import asyncio
+import zlib
+from collections.abc import Callable, Sequence
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# brotli and zstandard are optional (pip install marble-api[compression]), gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Encodings that can be used to compress responses and decompress requests, in order of preference
+ENCODINGS = tuple(
+    encoding
+    for encoding, available in (("zstd", zstandard is not None), ("br", brotli is not None), ("gzip", True))
+    if available
+)
+
+# Compression levels (these favour speed since responses are compressed while the client waits)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+# Response data that is at least this large (in bytes) is compressed in a worker thread so that it does not block the
+# event loop (all compression libraries release the GIL)
+_THREAD_MINIMUM_SIZE = 64 * 2**10
+
+# Largest number of bytes that one byte of zstd data can decompress to (a 4 byte RLE block expands to 128 KiB) and the
+# smallest slice of zstd data that is decompressed at a time
+_ZSTD_MAX_RATIO = 2**15
+_ZSTD_MINIMUM_STEP = 64
+
+# Content types of responses that are never compressed since they must be delivered as soon as they are sent
+_UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class RequestTooLarge(ValueError):
+    """Raised when a request body is larger than the maximum size after it is decompressed."""
+
+
+class _Compressor:
+    """Incremental compressor for one of the ENCODINGS."""
+
+    def __init__(self, encoding: str) -> None:
+        if encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self.compress, self.finish = compressor.compress, compressor.flush
+        elif encoding == "br":
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.compress, self.finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress, self.finish = compressor.compress, compressor.flush
+
+    def compress_all(self, data: bytes) -> bytes:
+        """Compress all of data and return the complete compressed data."""
+        return self.compress(data) + self.finish()
+
+
+def _decompress_gzip(data: bytes, max_size: int) -> bytes:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    result = decompressor.decompress(data, max_size + 1)
+    if len(result) <= max_size and not decompressor.eof:
+        raise ValueError("incomplete gzip data")
+    return result
+
+
+def _decompress_brotli(data: bytes, max_size: int) -> bytes:
+    decompressor = brotli.Decompressor()
+    result = decompressor.process(data, output_buffer_limit=max_size + 1)
+    if len(result) <= max_size and not decompressor.is_finished():
+        raise ValueError("incomplete brotli data")
+    return result
+
+
+def _decompress_zstd(data: bytes, max_size: int) -> bytes:
+    # frames that were compressed in one go store their size in the header so too large bodies are rejected early
+    if zstandard.frame_content_size(data) > max_size:
+        raise RequestTooLarge(f"request body is larger than {max_size} bytes")
+    # decompressobj cannot limit the size of its output so data is passed to it in slices that are small enough that
+    # each one cannot expand past max_size by much
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    view, start, size, chunks = memoryview(data), 0, 0, []
+    while start < len(data) and not decompressor.eof:
+        step = max((max_size - size) // _ZSTD_MAX_RATIO, _ZSTD_MINIMUM_STEP)
+        chunk = decompressor.decompress(view[start : start + step])
+        start += step
+        size += len(chunk)
+        if size > max_size:
+            raise RequestTooLarge(f"request body is larger than {max_size} bytes")
+        chunks.append(chunk)
+    if not decompressor.eof:
+        raise ValueError("incomplete zstd data")
+    return b"".join(chunks)
+
+
+_DECOMPRESSORS = {"gzip": _decompress_gzip, "br": _decompress_brotli, "zstd": _decompress_zstd}
+
+
+def decompress(data: bytes, encoding: str, max_size: int) -> bytes:
+    """
+    Return data decompressed with encoding (one of ENCODINGS).
+
+    Decompression stops as soon as the result is larger than max_size so that small compressed bodies cannot
+    expand to use large amounts of memory: a RequestTooLarge error is raised instead. A ValueError is raised
+    if data is not valid.
+    """
+    try:
+        result = _DECOMPRESSORS[encoding](data, max_size)
+    except ValueError:
+        raise
+    except Exception as e:  # each library raises its own error type (zlib.error, brotli.error, zstandard.ZstdError)
+        raise ValueError(f"invalid {encoding} data: {e}") from e
+    if len(result) > max_size:
+        raise RequestTooLarge(f"request body is larger than {max_size} bytes")
+    return result
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Sequence[str] = ENCODINGS) -> str | None:
+    """
+    Return the encoding in encodings that is preferred by the client according to the Accept-Encoding header.
+
+    Encodings with the same quality value are chosen in the order of encodings. None is returned if the client
+    does not accept any of the encodings.
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        if (quality := qualities.get(encoding, qualities.get("*", 0.0))) > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+async def _run[T](function: Callable[..., T], data: bytes, *args: object) -> T:
+    """Return function(data, *args), called in a worker thread if data is large."""
+    if len(data) >= _THREAD_MINIMUM_SIZE:
+        return await asyncio.to_thread(function, data, *args)
+    return function(data, *args)
+
+
+class _CompressingSender:
+    """ASGI send callable that compresses the response body with encoding."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int) -> None:
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start: Message | None = None
+        self._compressor: _Compressor | None = None
+        self._passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or headers.get("content-type", "").startswith(_UNCOMPRESSED_CONTENT_TYPES)
+            ):
+                self._passthrough = True
+                await self._send(message)
+            else:
+                self._start = message  # the start message is sent with the first part of the body
+            return
+        if self._passthrough or message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self._compressor is None:
+            if not more_body and len(body) < self._minimum_size:
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._compressor = _Compressor(self._encoding)
+            headers = MutableHeaders(raw=self._start["headers"])
+            headers["Content-Encoding"] = self._encoding
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            if not more_body:
+                body = await _run(self._compressor.compress_all, body)
+                headers["Content-Length"] = str(len(body))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self._start)
+        body = await _run(self._compressor.compress, body)
+        if not more_body:
+            body += self._compressor.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses and decompresses request bodies.
+
+    Responses are compressed with the encoding (gzip, br or zstd) that is preferred by the client's Accept-Encoding
+    header if their body is at least minimum_size bytes (streaming responses are always compressed).
+
+    Request bodies with a Content-Encoding header are decompressed before they are passed to the application. A 413
+    error is returned if the decompressed body is larger than max_request_size bytes and a 415 error is returned if
+    the encoding is not supported.
+
+    Request bodies are decompressed and large response bodies are compressed in worker threads so that they do not
+    block the event loop.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, max_request_size: int = 64 * 2**20) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_request_size = max_request_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Call the application with a decompressed request body and compress its response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if (content_encoding := headers.get("content-encoding", "identity").strip().lower()) != "identity":
+            try:
+                body = await self._decompressed_body(receive, content_encoding)
+            except RequestTooLarge as e:
+                await JSONResponse({"detail": str(e)}, status_code=413)(scope, receive, send)
+                return
+            except ValueError as e:
+                status_code = 415 if content_encoding not in ENCODINGS else 400
+                await JSONResponse({"detail": str(e)}, status_code=status_code)(scope, receive, send)
+                return
+            scope, receive = self._with_body(scope, receive, body)
+        if (encoding := negotiate_encoding(headers.get("accept-encoding", ""))) is not None:
+            send = _CompressingSender(send, encoding, self.minimum_size)
+        await self.app(scope, receive, send)
+
+    async def _decompressed_body(self, receive: Receive, encoding: str) -> bytes:
+        """Read the whole request body and return it decompressed with encoding."""
+        if encoding not in ENCODINGS:
+            raise ValueError(f"unsupported content encoding {encoding!r}, supported encodings are {list(ENCODINGS)}")
+        body = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if len(body) > self.max_request_size:
+                raise RequestTooLarge(f"request body is larger than {self.max_request_size} bytes")
+            more_body = message.get("more_body", False)
+        # the size of the decompressed body is not known in advance so it is always decompressed in a worker thread
+        return await asyncio.to_thread(decompress, bytes(body), encoding, self.max_request_size)
+
+    @staticmethod
+    def _with_body(scope: Scope, receive: Receive, body: bytes) -> tuple[Scope, Receive]:
+        """Return a scope and receive callable for a request with the given (decompressed) body."""
+        headers = MutableHeaders(scope={**scope, "headers": list(scope["headers"])})
+        del headers["Content-Encoding"]
+        headers["Content-Length"] = str(len(body))
+        sent = False
+
+        async def _receive() -> Message:
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return {**scope, "headers": headers.raw}, _receive
@@ -1,6 +1,10 @@
-from collections.abc import Iterable
-from itertools import zip_longest
+import heapq
+from collections.abc import Callable, Iterable
+from functools import cached_property
+from itertools import accumulate, pairwise
 
+import numpy as np
+from bson import Binary
 from geojson_pydantic import (
     Feature,
     FeatureCollection,
@@ -29,6 +33,16 @@ type Coordinates = (
     LineStringCoords | MultiLineStringCoords | MultiPointCoords | MultiPolygonCoords | PolygonCoords | Position
 )
 
+# Number of nested lists that contain the positions of each geometry type
+_COORDINATES_DEPTH = {
+    "Point": 0,
+    "MultiPoint": 1,
+    "LineString": 1,
+    "MultiLineString": 2,
+    "Polygon": 2,
+    "MultiPolygon": 3,
+}
+
 
 def _coordinates_to_points(coordinates: Coordinates) -> Iterable[Position]:
     if isinstance(coordinates[0], Iterable):
@@ -38,13 +52,65 @@ def _coordinates_to_points(coordinates: Coordinates) -> Iterable[Position]:
         yield coordinates
 
 
+def _position_lists(coordinates: Coordinates) -> Iterable[list[Position]]:
+    """Yield the innermost lists of positions (lines, rings or multipoints) in coordinates."""
+    if coordinates and isinstance(coordinates[0], Iterable) and isinstance(coordinates[0][0], Iterable):
+        for coord in coordinates:
+            yield from _position_lists(coord)
+    else:
+        yield coordinates
+
+
+def _positions_to_array(positions: list[Position]) -> np.ndarray:
+    """
+    Return a list of positions as a 2D array of floats with one row per position.
+
+    Positions that have fewer dimensions than the others (ie. positions without elevation) are padded with 0.
+    """
+    try:
+        return np.asarray(positions, dtype=np.float64).reshape(len(positions), -1)
+    except ValueError:
+        # positions with and without elevation (or mixed nesting depths) cannot be converted directly
+        positions = list(_coordinates_to_points(positions))
+        array = np.zeros((len(positions), max(map(len, positions))), dtype=np.float64)
+        for i, position in enumerate(positions):
+            array[i, : len(position)] = position
+        return array
+
+
+def _coordinates_to_array(coordinates: Coordinates) -> np.ndarray:
+    """
+    Return all points in coordinates as a contiguous 2D array of floats with one row per point.
+
+    Points that have fewer dimensions than the others (ie. positions without elevation) are padded with 0.
+    """
+    if not isinstance(coordinates[0], Iterable):
+        return np.asarray([coordinates], dtype=np.float64)
+    try:
+        array = np.asarray(coordinates, dtype=np.float64)
+    except ValueError:
+        # ragged coordinates (lines or rings of different lengths, or mixed 2D/3D positions) are converted one
+        # line or ring at a time
+        arrays = [_positions_to_array(positions) for positions in _position_lists(coordinates) if positions]
+        dimensions = max(array.shape[1] for array in arrays)
+        if any(array.shape[1] != dimensions for array in arrays):
+            arrays = [np.pad(array, ((0, 0), (0, dimensions - array.shape[1]))) for array in arrays]
+        return np.concatenate(arrays)
+    return array.reshape(-1, array.shape[-1])
+
+
 def bbox_from_coordinates(coordinates: Coordinates) -> BBox:
-    """Return a bounding box from a set of coordinates."""
-    min_max = []
-    for values in zip_longest(*_coordinates_to_points(coordinates)):
-        real_values = [v or 0 for v in values]  # coordinates without elevation are considered to be at elevation 0
-        min_max.append((min(real_values), max(real_values)))
-    return [v for val in min_max for v in val]
+    """
+    Return a bounding box from a set of coordinates.
+
+    Coordinates without elevation are considered to be at elevation 0.
+    """
+    return _array_bbox(_coordinates_to_array(coordinates))
+
+
+def _array_bbox(array: np.ndarray) -> BBox:
+    """Return the bounding box of the points in a 2D array with one row per point (see bbox_from_coordinates)."""
+    return np.column_stack((array.min(axis=0), array.max(axis=0))).ravel().tolist()
 
 
 def _validate_geometries(geometries: list[Geometry], geojson_type: str) -> None:
@@ -60,14 +126,14 @@ def _validate_geometries(geometries: list[Geometry], geojson_type: str) -> None:
 
 def _extract_geometries(geojson: GeoJSON | None) -> list[Geometry]:
     """Return all geometries present in the geojson as a flat list."""
+    if geojson is None:
+        return []
     if geojson.type == "FeatureCollection":
         return [geo for feature in geojson.features for geo in _extract_geometries(feature.geometry) if geo]
     if geojson.type == "GeometryCollection":
         return geojson.geometries
     if geojson.type == "Feature":
         return _extract_geometries(geojson.geometry)
-    if geojson is None:
-        return []
     return [geojson]
 
 
@@ -91,6 +157,15 @@ def collapse_geometries(geojson: GeoJSON, check: bool = True) -> Geometry | None
     geometries = _extract_geometries(geojson)
     if check:
         _validate_geometries(geometries, geojson.type)
+    return _collapse(geometries)
+
+
+def _collapse(geometries: list[Geometry]) -> Geometry | None:
+    """
+    Return a single geometry that contains all (collapsible) geometries.
+
+    The coordinates of the geometries have already been validated so they are not validated again.
+    """
     if not geometries:
         return None
     if len(geometries) == 1:
@@ -107,4 +182,298 @@ def collapse_geometries(geojson: GeoJSON, check: bool = True) -> Geometry | None
             geo_type = MultiLineString
         else:
             geo_type = MultiPolygon
-    return geo_type(coordinates=coordinates, type=geo_type.__name__)
+    return geo_type.model_construct(coordinates=coordinates, type=geo_type.__name__)
+
+
+class GeometrySummary:
+    """
+    Collapsed geometry, bounding box and number of positions of a geojson.
+
+    The geojson is only walked once (when this is created) and a ValueError is raised if it cannot be collapsed
+    to a STAC compliant geometry (see validate_collapsible). The other values are computed when they are first
+    used: the collapsed geometry (see collapse_geometries) and then the bounding box (see bbox_from_coordinates)
+    and number of positions, which are computed together from a single array of its coordinates.
+    """
+
+    def __init__(self, geojson: GeoJSON | None) -> None:
+        self._geometries = _extract_geometries(geojson)
+        if geojson is not None:
+            _validate_geometries(self._geometries, geojson.type)
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether other is the summary of the same geometries."""
+        return isinstance(other, GeometrySummary) and self._geometries == other._geometries
+
+    @cached_property
+    def geometry(self) -> Geometry | None:
+        """The collapsed geometry (None if the geojson does not contain any geometries)."""
+        return _collapse(self._geometries)
+
+    @cached_property
+    def _array(self) -> np.ndarray | None:
+        return None if self.geometry is None else _coordinates_to_array(self.geometry.coordinates)
+
+    @cached_property
+    def bbox(self) -> BBox | None:
+        """The bounding box of all positions (None if the geojson does not contain any geometries)."""
+        return None if self._array is None else _array_bbox(self._array)
+
+    @cached_property
+    def n_positions(self) -> int:
+        """The number of positions."""
+        return 0 if self._array is None else len(self._array)
+
+
+def _map_geometries(geojson: dict | None, func: Callable[[dict], dict]) -> dict | None:
+    """Return a copy of the geojson (as a dictionary) where func has been applied to every geometry."""
+    if geojson is None:
+        return None
+    if geojson.get("type") == "FeatureCollection":
+        return {**geojson, "features": [_map_geometries(feature, func) for feature in geojson["features"]]}
+    if geojson.get("type") == "Feature":
+        return {**geojson, "geometry": _map_geometries(geojson["geometry"], func)}
+    if geojson.get("type") == "GeometryCollection":
+        return {**geojson, "geometries": [_map_geometries(geo, func) for geo in geojson["geometries"]]}
+    return func(geojson)
+
+
+def _pack_coordinates(geometry: dict, dtype: str) -> dict:
+    if "coordinates" not in geometry:
+        return geometry
+    items = [geometry["coordinates"]]
+    offsets = []
+    for level in range(_COORDINATES_DEPTH[geometry["type"]]):
+        if level:
+            offsets.append(list(accumulate(map(len, items), initial=0)))
+        items = [item for group in items for item in group]
+    dimensions = max(map(len, items), default=2)
+    try:
+        positions = np.asarray(items, dtype=dtype).reshape(-1, dimensions)
+    except ValueError:
+        # positions with missing elevation are padded with NaN and restored to their original length when unpacked
+        positions = np.full((len(items), dimensions), np.nan, dtype=dtype)
+        for i, position in enumerate(items):
+            positions[i, : len(position)] = position
+    packed = {key: value for key, value in geometry.items() if key != "coordinates"}
+    packed["packed_coordinates"] = {
+        "data": Binary(positions.tobytes()),
+        "dtype": positions.dtype.str,
+        "dimensions": dimensions,
+        "offsets": offsets,
+    }
+    return packed
+
+
+def _unpack_coordinates(geometry: dict) -> dict:
+    if "packed_coordinates" not in geometry:
+        return geometry
+    packed = geometry["packed_coordinates"]
+    try:
+        if not isinstance(packed["data"], bytes):
+            raise TypeError(f"data must be bytes, not {type(packed['data']).__name__}")
+        positions = np.frombuffer(packed["data"], dtype=np.dtype(packed["dtype"])).reshape(-1, packed["dimensions"])
+        if positions.dtype.kind != "f":
+            raise TypeError(f"dtype must be a floating point type, not {positions.dtype}")
+        if np.isnan(positions).any():
+            items = [[value for value in position if value == value] for position in positions.tolist()]
+        else:
+            items = positions.tolist()
+        depth = _COORDINATES_DEPTH[geometry["type"]]
+        if len(packed["offsets"]) != max(depth - 1, 0):
+            raise ValueError(f"expected {max(depth - 1, 0)} levels of offsets for a {geometry['type']}")
+        for level_offsets in reversed(packed["offsets"]):
+            if not level_offsets or level_offsets[0] != 0 or level_offsets[-1] != len(items):
+                raise ValueError(f"offsets must start at 0 and end at {len(items)}")
+            items = [items[start:end] for start, end in pairwise(level_offsets)]
+        coordinates = items if depth else items[0]
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ValueError(f"invalid packed coordinates: {e}") from e
+    unpacked = {key: value for key, value in geometry.items() if key != "packed_coordinates"}
+    unpacked["coordinates"] = coordinates
+    return unpacked
+
+
+def pack_geometry(geojson: dict | None, dtype: str = "<f8") -> dict | None:
+    """
+    Return a copy of the geojson where the coordinates of every geometry are stored as packed binary arrays.
+
+    The coordinates of each geometry are replaced by a "packed_coordinates" object containing
+    the positions as a contiguous array of dtype values (little-endian float64 by default) and the
+    offsets required to rebuild the nested parts and rings of the geometry.
+
+    Use unpack_geometry to convert the result back to a regular geojson.
+    """
+    return _map_geometries(geojson, lambda geometry: _pack_coordinates(geometry, dtype))
+
+
+def unpack_geometry(geojson: dict | None) -> dict | None:
+    """
+    Return a copy of the geojson where all packed coordinates have been converted back to nested lists.
+
+    This is the inverse of pack_geometry. Geometries that are not packed are returned unchanged. A ValueError is
+    raised if packed coordinates are not in the format created by pack_geometry.
+    """
+    return _map_geometries(geojson, _unpack_coordinates)
+
+
+def clean_geojson(geojson: dict | None) -> dict | None:
+    """
+    Return a copy of the geojson (as a dictionary) without the optional members whose value is null.
+
+    This matches how geojson-pydantic models are serialized in JSON mode (a null "bbox" is removed from all
+    objects and a null "id" is removed from features) without having to build the models.
+    """
+    if geojson is None:
+        return None
+    geojson_type = geojson.get("type")
+    if geojson_type == "FeatureCollection":
+        geojson = {**geojson, "features": [clean_geojson(feature) for feature in geojson["features"]]}
+    elif geojson_type == "Feature":
+        geojson = {**geojson, "geometry": clean_geojson(geojson["geometry"])}
+    elif geojson_type == "GeometryCollection":
+        geojson = {**geojson, "geometries": [clean_geojson(geo) for geo in geojson["geometries"]]}
+    optional = ("bbox", "id") if geojson_type == "Feature" else ("bbox",)
+    return {key: value for key, value in geojson.items() if not (key in optional and value is None)}
+
+
+def _farthest_position(xy: np.ndarray, start: int, end: int) -> tuple[float, int]:
+    """Return the largest distance from a position between start and end to the segment start-end and its index."""
+    segment = xy[end] - xy[start]
+    offsets = xy[start + 1 : end] - xy[start]
+    if (squared_length := segment @ segment) > 0:
+        offsets = offsets - np.outer(np.clip(offsets @ segment / squared_length, 0, 1), segment)
+    distances = np.einsum("ij,ij->i", offsets, offsets)
+    index = int(np.argmax(distances))
+    return float(np.sqrt(distances[index])), start + 1 + index
+
+
+def _simplified_indices(xy: np.ndarray, tolerance: float, min_positions: int) -> list[int]:
+    """
+    Return the (sorted) indices of the positions kept by the Douglas-Peucker algorithm.
+
+    Segments are split at their farthest position in order of decreasing distance until all remaining positions are
+    within tolerance of the simplified line and at least min_positions positions are kept.
+    """
+    kept = [0, len(xy) - 1]
+    heap = []
+    if len(xy) > 2:
+        distance, index = _farthest_position(xy, 0, len(xy) - 1)
+        heap.append((-distance, 0, index, len(xy) - 1))
+    while heap and (-heap[0][0] > tolerance or len(kept) < min_positions):
+        _, start, index, end = heapq.heappop(heap)
+        kept.append(index)
+        for part_start, part_end in ((start, index), (index, end)):
+            if part_end - part_start > 1:
+                distance, part_index = _farthest_position(xy, part_start, part_end)
+                heapq.heappush(heap, (-distance, part_start, part_index, part_end))
+    return sorted(kept)
+
+
+def _simplify_positions(positions: list[Position], tolerance: float, min_positions: int) -> list[Position]:
+    if len(positions) <= min_positions:
+        return positions
+    try:
+        xy = np.asarray(positions, dtype=np.float64)[:, :2]
+    except ValueError:
+        # positions with and without elevation cannot be converted directly
+        xy = np.asarray([position[:2] for position in positions], dtype=np.float64)
+    return [positions[i] for i in _simplified_indices(xy, tolerance, min_positions)]
+
+
+def _simplify_coordinates(geometry: dict, tolerance: float) -> dict:
+    geometry_type = geometry.get("type")
+    if geometry_type not in ("LineString", "MultiLineString", "Polygon", "MultiPolygon"):
+        return geometry
+    # rings must contain at least 4 positions (the first and last are the same) and lines at least 2
+    min_positions = 4 if geometry_type.endswith("Polygon") else 2
+
+    def _simplify(coordinates: list, depth: int) -> list:
+        if depth:
+            return [_simplify(coords, depth - 1) for coords in coordinates]
+        return _simplify_positions(coordinates, tolerance, min_positions)
+
+    return {**geometry, "coordinates": _simplify(geometry["coordinates"], _COORDINATES_DEPTH[geometry_type] - 1)}
+
+
+def simplify_geometry(geojson: dict | None, tolerance: float) -> dict | None:
+    """
+    Return a copy of the geojson (as a dictionary) where every line and ring has been simplified.
+
+    Lines and rings are simplified with the Douglas-Peucker algorithm so that every removed position is within
+    tolerance (in the units of the coordinates, measured using the first two dimensions) of the simplified line.
+    Lines and rings are never removed: lines keep at least 2 positions and rings keep at least 4 (a triangle) so
+    the simplified geometry has the same parts and rings as the original. Points are not changed.
+
+    The geojson must not contain packed coordinates (see unpack_geometry).
+    """
+    return _map_geometries(geojson, lambda geometry: _simplify_coordinates(geometry, tolerance))
+
+
+def _to_2d(coordinates: Coordinates) -> Coordinates:
+    """Return a copy of coordinates where the elevation has been removed from all positions."""
+    if coordinates and isinstance(coordinates[0], Iterable):
+        return [_to_2d(coord) for coord in coordinates]
+    return list(coordinates[:2])
+
+
+def drop_elevation(geometry: Geometry) -> dict:
+    """Return the geometry as a dictionary containing only its type and 2D coordinates."""
+    return {"type": geometry.type, "coordinates": _to_2d(geometry.model_dump()["coordinates"])}
+
+
+def bbox_to_geometries(bbox: BBox, max_width: float = 90, max_edge_length: float = 10) -> list[dict]:
+    """
+    Return 2D geometries (as dictionaries) that together cover the same area as a STAC/GeoJSON bbox.
+
+    The bbox must be in the order [west, south, east, north] (or [west, south, min elevation, east, north, max
+    elevation]). If the bbox crosses the antimeridian (west > east), it is split on either side of it.
+
+    Geometries are intended to be used with MongoDB's 2dsphere indexes where the edges of a polygon are geodesics
+    and the area covered by a polygon is the smaller of the two areas bounded by its ring. Therefore, the bbox
+    is split into polygons that are at most max_width degrees wide, and the edges of the polygons are at most
+    max_edge_length degrees long so that they approximately follow lines of latitude. Latitudes are clamped to
+    just under 90 degrees since all positions on a pole are identical on a sphere.
+
+    If the bbox has no area, a LineString or Point is returned instead of Polygons.
+    """
+    if len(bbox) == 6:
+        bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+    west, south, east, north = bbox
+    if west > east:
+        return bbox_to_geometries([west, south, 180, north]) + bbox_to_geometries([-180, south, east, north])
+    south, north = (min(max(lat, -89.999999), 89.999999) for lat in (south, north))
+    if west == east and south == north:
+        return [{"type": "Point", "coordinates": [west, south]}]
+    if west == east or south == north:
+        return [{"type": "LineString", "coordinates": [[west, south], [east, north]]}]
+    n_parts = int(np.ceil((east - west) / max_width))
+    part_edges = np.linspace(west, east, n_parts + 1).tolist()
+    polygons = []
+    for part_west, part_east in pairwise(part_edges):
+        n_edges = int(np.ceil((part_east - part_west) / max_edge_length))
+        longitudes = np.linspace(part_west, part_east, n_edges + 1).tolist()
+        ring = [[lon, south] for lon in longitudes] + [[lon, north] for lon in reversed(longitudes)]
+        polygons.append({"type": "Polygon", "coordinates": [ring + [ring[0]]]})
+    return polygons
+
+
+def footprints(summary: GeometrySummary) -> list[dict | None]:
+    """
+    Return 2D geometries (as dictionaries) that represent the area covered by a geojson, from most to least precise.
+
+    The summary is the GeometrySummary of the geojson. The first geometry is the collapsed geometry without
+    elevation and the second covers its bounding box (see bbox_to_geometries). The last value is always
+    None (no footprint).
+
+    These are intended to be used as the value of a field indexed by a 2dsphere index. Not all valid geojsons can
+    be indexed (for example, polygons with self-intersecting rings) so a less precise geometry may be used instead.
+    """
+    if (geometry := summary.geometry) is None:
+        return [None]
+    west, east, south, north = summary.bbox[:4]
+    bbox_geometries = bbox_to_geometries([west, south, east, north])
+    if len(bbox_geometries) > 1:
+        bbox_footprint = {"type": "MultiPolygon", "coordinates": [geo["coordinates"] for geo in bbox_geometries]}
+    else:
+        bbox_footprint = bbox_geometries[0]
+    return [drop_elevation(geometry), bbox_footprint, None]
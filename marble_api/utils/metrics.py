@@ -0,0 +1,136 @@
+import os
+import time
+from contextlib import AbstractContextManager, nullcontext
+from typing import TYPE_CHECKING
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+if TYPE_CHECKING:
+    from prometheus_client import CollectorRegistry
+
+# One of "on" (collect Prometheus metrics and serve them at /metrics) or "off". This requires the prometheus-client
+# package to be installed (pip install marble-api[metrics])
+METRICS_MODE = os.environ.get("MARBLE_API_METRICS", "off")
+
+# Histogram buckets (in seconds) for operations that are usually much faster than a request
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label of requests that do not match any route (so that unknown paths do not create new time series)
+UNMATCHED_ROUTE = "<unmatched>"
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Metrics:
+    """
+    Prometheus collectors for this application.
+
+    If the PROMETHEUS_MULTIPROC_DIR environment variable is set (to an empty directory that is shared by all
+    processes), the metrics of all processes (eg. all uvicorn workers) are aggregated when they are rendered.
+    Otherwise only the metrics of the current process are rendered.
+    """
+
+    def __init__(self, registry: "CollectorRegistry | None" = None) -> None:
+        from prometheus_client import REGISTRY, Gauge, Histogram
+
+        self.registry = REGISTRY if registry is None else registry
+        self.request_duration = Histogram(
+            "marble_api_http_request_duration_seconds",
+            "Duration of HTTP requests",
+            ("method", "route", "status"),
+            registry=self.registry,
+        )
+        self.requests_in_progress = Gauge(
+            "marble_api_http_requests_in_progress",
+            "Number of HTTP requests that are being handled",
+            ("method",),
+            multiprocess_mode="livesum",
+            registry=self.registry,
+        )
+        self.command_duration = Histogram(
+            "marble_api_mongodb_command_duration_seconds",
+            "Duration of MongoDB commands",
+            ("command", "outcome"),
+            buckets=_FAST_BUCKETS,
+            registry=self.registry,
+        )
+        self.phase_duration = Histogram(
+            "marble_api_phase_duration_seconds",
+            "Duration of phases of handling data requests (eg. validation or STAC item generation)",
+            ("phase",),
+            buckets=_FAST_BUCKETS,
+            registry=self.registry,
+        )
+
+    def render(self) -> tuple[bytes, str]:
+        """Return the metrics in the Prometheus text format and their content type."""
+        from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return generate_latest(registry), CONTENT_TYPE_LATEST
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+    @staticmethod
+    def mark_process_dead() -> None:
+        """Remove the live gauges of the current process from the shared metrics (when the process shuts down)."""
+        from prometheus_client import multiprocess
+
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            multiprocess.mark_process_dead(os.getpid())
+
+
+# Collectors of the current process (None if metrics are disabled)
+metrics = Metrics() if METRICS_MODE == "on" else None
+
+
+def timed(phase: str) -> AbstractContextManager[None]:
+    """Return a context manager that records the duration of its block as phase (this does nothing if disabled)."""
+    if metrics is None:
+        return _NULL_CONTEXT
+    return metrics.phase_duration.labels(phase).time()
+
+
+def route_label(scope: Scope) -> str:
+    """Return the path template of the route that handled a request (including the path of mounted applications)."""
+    if (route := scope.get("route")) is None:
+        return UNMATCHED_ROUTE
+    return scope.get("root_path", "") + route.path
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records the duration of each request and the number of requests in progress.
+
+    Requests are labelled by method, route (path template) and response status code. This does nothing if
+    metrics are disabled.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Call the application and record the duration of the request."""
+        if metrics is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500  # if the application raises an error before starting the response
+
+        async def _send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = metrics.requests_in_progress.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            metrics.request_duration.labels(method, route_label(scope), str(status)).observe(
+                time.perf_counter() - start
+            )
+            in_progress.dec()
@@ -0,0 +1,15 @@
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that is rendered with pydantic_core.to_json.
+
+    Returning this from a route skips validating and serializing the content with the route's response
+    model so the content must already be JSON compatible and match the response model.
+    """
+
+    def render(self, content: object) -> bytes:
+        """Return the content rendered as JSON."""
+        return to_json(content)
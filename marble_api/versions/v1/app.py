@@ -1,9 +1,25 @@
 from fastapi import FastAPI
 
+from marble_api.database.indexes import merge_indexes
+from marble_api.versions.v1.data_request.indexes import INDEXES as DATA_REQUEST_INDEXES
 from marble_api.versions.v1.data_request.routes import admin_router as data_request_admin_router
+from marble_api.versions.v1.data_request.routes import backfill_derived_fields as data_request_backfill
+from marble_api.versions.v1.data_request.routes import backfill_user_counts as data_request_count_backfill
+from marble_api.versions.v1.data_request.routes import stac_admin_router as data_request_stac_admin_router
+from marble_api.versions.v1.data_request.routes import stac_user_router as data_request_stac_user_router
 from marble_api.versions.v1.data_request.routes import user_router as data_request_user_router
+from marble_api.versions.v1.database.routes import admin_router as database_admin_router
 
 app = FastAPI(version="1")
 
+# Indexes required by this version (these are created when the application starts up)
+app.state.indexes = merge_indexes(DATA_REQUEST_INDEXES)
+
+# Tasks that update existing documents when the application starts up
+app.state.backfills = [data_request_backfill, data_request_count_backfill]
+
 app.include_router(data_request_user_router)
 app.include_router(data_request_admin_router)
+app.include_router(data_request_stac_user_router)
+app.include_router(data_request_stac_admin_router)
+app.include_router(database_admin_router)
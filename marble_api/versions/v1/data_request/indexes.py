@@ -0,0 +1,28 @@
+from pymongo import ASCENDING, GEOSPHERE, TEXT, IndexModel
+
+# Relative importance of each field when ranking text search results
+TEXT_SEARCH_WEIGHTS = {
+    "title": 10,
+    "variables": 5,
+    "authors.first_name": 2,
+    "authors.last_name": 2,
+    "description": 1,
+}
+
+INDEXES = {
+    "data-request": [
+        # user scoped routes select by user and sort by _id
+        IndexModel([("user", ASCENDING), ("_id", ASCENDING)], name="user_id"),
+        # bbox and intersects filters
+        IndexModel([("footprint", GEOSPHERE)], name="footprint"),
+        # datetime filter
+        IndexModel([("start_utc", ASCENDING), ("end_utc", ASCENDING)], name="start_utc_end_utc"),
+        # q (text search) filter, all weights are declared so that they can be compared with the existing index
+        IndexModel(
+            [(field, TEXT) for field in TEXT_SEARCH_WEIGHTS],
+            name="text_search",
+            weights=TEXT_SEARCH_WEIGHTS,
+            default_language="english",
+        ),
+    ]
+}
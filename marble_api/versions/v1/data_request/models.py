@@ -1,9 +1,11 @@
 import datetime
-from collections.abc import Sized
+from collections.abc import Collection, Sized
+from contextvars import ContextVar
 from datetime import timezone
 from typing import Required, Self, TypedDict
 
 from bson import ObjectId
+from geojson_pydantic.types import BBox
 from pydantic import (
     AfterValidator,
     AwareDatetime,
@@ -12,6 +14,8 @@ from pydantic import (
     EmailStr,
     Field,
     FieldSerializationInfo,
+    ModelWrapValidatorHandler,
+    PrivateAttr,
     ValidationInfo,
     field_serializer,
     field_validator,
@@ -25,15 +29,23 @@ from typing_extensions import Annotated
 
 from marble_api.utils.geojson import (
     GeoJSON,
-    bbox_from_coordinates,
-    collapse_geometries,
-    validate_collapsible,
+    Geometry,
+    GeometrySummary,
+    clean_geojson,
+    unpack_geometry,
 )
+from marble_api.utils.metrics import timed
 from marble_api.utils.models import partial_model
 
 PyObjectId = Annotated[str, BeforeValidator(str)]
 Temporal = Annotated[list[AwareDatetime], Field(..., min_length=1, max_length=2), AfterValidator(sorted)]
 
+# Geometry (and its summary) checked by the geometry validator of the model that is currently being validated.
+# Field validators cannot access the model so the summary is passed to the model by memoize_geometry_summary.
+_validated_geometry: ContextVar[tuple[GeoJSON, GeometrySummary] | None] = ContextVar(
+    "_validated_geometry", default=None
+)
+
 
 class Author(TypedDict, total=False):
     """Author definition."""
@@ -65,6 +77,14 @@ class DataRequest(BaseModel):
     variables: list[str] = []
     extra_properties: dict[str, str] = {}
     model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+    _geometry_summary: tuple[GeoJSON | None, GeometrySummary] | None = PrivateAttr(default=None)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def time_validation(cls, data: object, handler: ModelWrapValidatorHandler[Self]) -> Self:
+        """Record the duration of validating the data request (if metrics are enabled)."""
+        with timed("validation"):
+            return handler(data)
 
     @field_validator("title", "description", "authors", "path", "contact")
     @classmethod
@@ -78,9 +98,30 @@ class DataRequest(BaseModel):
     def validate_geometries(cls, value: GeoJSON | None) -> dict | None:
         """Check whether a GeoJSON can be collapsed to a STAC compliant geometry."""
         if value is not None:
-            validate_collapsible(value)
+            _validated_geometry.set((value, GeometrySummary(value)))
         return value
 
+    @model_validator(mode="after")
+    def memoize_geometry_summary(self) -> Self:
+        """Keep the geometry summary that was computed when the geometry was checked (see geometry_summary)."""
+        if (validated := _validated_geometry.get()) is not None:
+            _validated_geometry.set(None)
+            if validated[0] is self.geometry:
+                self._geometry_summary = validated
+        return self
+
+    @property
+    def geometry_summary(self) -> GeometrySummary:
+        """
+        Return the collapsed geometry, bounding box and number of positions of the geometry.
+
+        This is memoized (it is created when the geometry is validated) and is only created again if the
+        geometry is replaced.
+        """
+        if self._geometry_summary is None or self._geometry_summary[0] is not self.geometry:
+            self._geometry_summary = (self.geometry, GeometrySummary(self.geometry))
+        return self._geometry_summary[1]
+
     @model_validator(mode="after")
     def get_tz_offset(self) -> Self:
         """Store the timezone offset for the temporal data."""
@@ -102,6 +143,43 @@ class DataRequest(BaseModel):
         assert value, f"{info.field_name} must be set and non-empty"
         return value
 
+    def stac_item_with_id(self, id_: str) -> Item:
+        """
+        Dynamically create a STAC item representation of this data with the id id_.
+
+        This lets the STAC item of a new data request be created from the validated data request (and its geometry
+        summary) before it is stored, without building a DataRequestPublic from its serialized fields.
+        """
+        with timed("stac_item"):
+            return self._stac_item(id_)
+
+    def _stac_item(self, id_: str) -> Item:
+        geometry = self.geometry_summary.geometry
+        item = {
+            "type": "Feature",
+            "stac_version": "1.1.0",
+            "geometry": geometry and geometry.model_dump(),
+            "stac_extensions": [],  # TODO
+            "id": id_,  # TODO
+            "bbox": None,
+            "properties": dict(self.extra_properties),  # TODO: add more
+            "links": self.links.model_dump(),
+            "assets": {},  # TODO: determine assets from other fields
+        }
+
+        # STAC spec recommends including datetime even if using start_datetime and end_datetime
+        # See: https://github.com/radiantearth/stac-spec/blob/master/best-practices.md#datetime-selection
+        item["properties"]["datetime"] = self.temporal[0].astimezone(timezone.utc).isoformat()
+
+        if len(set(self.temporal)) > 1:
+            item["properties"]["start_datetime"], item["properties"]["end_datetime"] = [
+                t.astimezone(timezone.utc).isoformat() for t in self.temporal
+            ]
+
+        if geometry:
+            item["bbox"] = item["geometry"].get("bbox") or self.geometry_summary.bbox
+        return item
+
 
 @partial_model
 class DataRequestUpdate(DataRequest):
@@ -126,37 +204,134 @@ class DataRequestPublic(DataRequest):
     user: str  # user is required to be set in the database
     model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True, extra="allow")
 
+    @classmethod
+    def serialize_trusted(cls, document: dict, fields: Collection[str] | None = None) -> dict:
+        """
+        Return the JSON compatible representation of a document read from the database without validating it.
+
+        This gives the same result as cls(**document).model_dump(mode="json") for documents that were
+        validated when they were written but does not build any of the (geojson and stac) models, which is
+        slow for large geometries.
+
+        If fields is set, only the id and those fields are included (see DataRequestPartial).
+        """
+        data = {"id": str(document["_id"])}
+        for name, field in cls.model_fields.items():
+            if name == "id" or field.exclude or (fields is not None and name not in fields):
+                continue
+            if field.is_required():
+                data[name] = document[name]
+            else:
+                data[name] = document.get(name, field.get_default(call_default_factory=True))
+        data.update((key, value) for key, value in document.items() if key != "_id" and key not in cls.model_fields)
+        if "geometry" in data:
+            data["geometry"] = clean_geojson(unpack_geometry(data["geometry"]))
+        if "temporal" in data:
+            data["temporal"] = [t.isoformat() if isinstance(t, datetime.datetime) else t for t in data["temporal"]]
+        return data
+
     @property
     def stac_item(self) -> Item:
         """Dynamically create a STAC item representation of this data."""
-        item = {
-            "type": "Feature",
-            "stac_version": "1.1.0",
-            "geometry": self.geometry and collapse_geometries(self.geometry, check=False).model_dump(),
-            "stac_extensions": [],  # TODO
-            "id": self.id,  # TODO
-            "bbox": None,
-            "properties": dict(self.extra_properties),  # TODO: add more
-            "links": self.links.model_dump(),
-            "assets": {},  # TODO: determine assets from other fields
-        }
+        return self.stac_item_with_id(self.id)
 
-        # STAC spec recommends including datetime even if using start_datetime and end_datetime
-        # See: https://github.com/radiantearth/stac-spec/blob/master/best-practices.md#datetime-selection
-        item["properties"]["datetime"] = self.temporal[0].astimezone(timezone.utc).isoformat()
 
-        if len(set(self.temporal)) > 1:
-            item["properties"]["start_datetime"], item["properties"]["end_datetime"] = [
-                t.astimezone(timezone.utc).isoformat() for t in self.temporal
-            ]
+@partial_model
+class DataRequestPartial(DataRequestPublic):
+    """
+    Public model for Data Requests that only contain some of their fields.
 
-        if self.geometry:
-            item["bbox"] = item["geometry"].get("bbox") or bbox_from_coordinates(item["geometry"]["coordinates"])
-        return item
+    This is the response model for routes that return a subset of the fields of each data request (a sparse fieldset).
+    Fields that were not selected are not included in the response.
+    """
 
 
 class DataRequestsResponse(BaseModel):
     """Response model for returning multiple data requests."""
 
-    data_requests: list[DataRequestPublic]
+    data_requests: list[DataRequestPublic | DataRequestPartial]
     links: Links
+    total: int | None = None  # only set if a count is requested
+
+
+class BulkCreateResult(BaseModel):
+    """Result of creating a single data request in a bulk request."""
+
+    id: str | None = None
+    errors: list[dict] | None = None
+
+
+class BulkCreateResponse(BaseModel):
+    """Response model for creating multiple data requests."""
+
+    created: int
+    results: list[BulkCreateResult]
+
+
+class BulkSelector(BaseModel):
+    """
+    Selects data requests to update or delete in bulk.
+
+    Selected data requests match all fields that are set. At least one field must be set.
+    """
+
+    ids: list[str] | None = None
+    user: str | None = None
+    variables: list[str] | None = None  # data requests that contain any of these variables
+    model_config = ConfigDict(extra="forbid")
+
+    @model_validator(mode="after")
+    def require_one_field(self) -> Self:
+        """Raise an error if no fields are set (so that all data requests are not selected by accident)."""
+        assert any(getattr(self, field) is not None for field in type(self).model_fields), "selector must not be empty"
+        return self
+
+
+class BulkUpdateItem(BaseModel):
+    """Update of a single data request in a bulk update."""
+
+    id: str
+    update: DataRequestUpdate
+
+
+class BulkUpdate(BaseModel):
+    """
+    Request body for updating data requests in bulk.
+
+    Either updates (a different update for each data request) or both selector and update (the same
+    update for all selected data requests) must be set.
+    """
+
+    updates: list[BulkUpdateItem] | None = None
+    selector: BulkSelector | None = None
+    update: DataRequestUpdate | None = None
+    model_config = ConfigDict(extra="forbid")
+
+    @model_validator(mode="after")
+    def require_updates_or_selector(self) -> Self:
+        """Raise an error unless either updates or both selector and update are set."""
+        by_id = self.updates is not None and self.selector is None and self.update is None
+        by_selector = self.updates is None and self.selector is not None and self.update is not None
+        assert by_id or by_selector, "either updates or both selector and update must be set"
+        return self
+
+
+class BulkWriteResponse(BaseModel):
+    """Response model for updating or deleting multiple data requests."""
+
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
+
+
+class StacSearch(BaseModel):
+    """Request body for STAC API item searches."""
+
+    collections: list[str] | None = None
+    ids: list[str] | None = None
+    bbox: BBox | None = None
+    intersects: Geometry | None = None
+    datetime: str | None = None
+    limit: Annotated[int, Field(le=100, gt=0)] = 10
+    token: str | None = None
+    simplify: Annotated[float | None, Field(gt=0)] = None
@@ -1,21 +1,57 @@
-from collections.abc import AsyncGenerator
-from typing import Annotated
+import datetime
+import functools
+import hashlib
+import logging
+import os
+import secrets
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable, Collection, Iterable
+from typing import Annotated, Literal, Required, TypedDict
 
+import bson
 import pymongo
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
-from pydantic_core import PydanticSerializationError
-from pymongo import ReturnDocument
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from geojson_pydantic.types import BBox
+from pydantic import AwareDatetime, TypeAdapter, ValidationError
+from pydantic_core import PydanticSerializationError, to_json
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+from pymongo.results import UpdateResult
+from stac_pydantic.links import Links
 
-from marble_api.database import client
+from marble_api.database import GEOMETRY_STORAGE_DTYPE, client
+from marble_api.database.sessions import causal_session, write_session
+from marble_api.utils.cache import DocumentCache, RedisSharedCache
+from marble_api.utils.geojson import (
+    Geometry,
+    GeometrySummary,
+    bbox_to_geometries,
+    drop_elevation,
+    footprints,
+    pack_geometry,
+    simplify_geometry,
+    unpack_geometry,
+)
 from marble_api.utils.models import object_id
+from marble_api.utils.responses import FastJSONResponse
 from marble_api.versions.v1.data_request.models import (
+    BulkCreateResponse,
+    BulkCreateResult,
+    BulkSelector,
+    BulkUpdate,
+    BulkWriteResponse,
     DataRequest,
+    DataRequestPartial,
     DataRequestPublic,
     DataRequestsResponse,
     DataRequestUpdate,
+    StacSearch,
 )
 
+logger = logging.getLogger(__name__)
+
 
 async def _handle_serialization_error() -> AsyncGenerator[None]:
     try:
@@ -28,6 +64,51 @@ user_router = APIRouter(prefix="/users/{user}/data-requests", tags=["User"])
 admin_router = APIRouter(
     prefix="/admin/data-requests", tags=["Admin"], dependencies=[Depends(_handle_serialization_error)]
 )
+stac_user_router = APIRouter(prefix="/users/{user}/stac", tags=["User", "STAC"])
+stac_admin_router = APIRouter(prefix="/admin/stac", tags=["Admin", "STAC"])
+
+STAC_COLLECTION_ID = "data-requests"
+STAC_CONFORMANCE = [
+    "https://api.stacspec.org/v1.0.0/core",
+    "https://api.stacspec.org/v1.0.0/collections",
+    "https://api.stacspec.org/v1.0.0/ogcapi-features",
+    "https://api.stacspec.org/v1.0.0/item-search",
+    "http://www.opengis.net/spec/ogcapi-features-1/1.0/conf/core",
+    "http://www.opengis.net/spec/ogcapi-features-1/1.0/conf/geojson",
+]
+
+
+# Read-through cache for single data requests (disabled unless MARBLE_API_CACHE_MAX_BYTES or
+# MARBLE_API_CACHE_REDIS_URI are set)
+data_request_cache = DocumentCache(
+    max_bytes=int(os.environ.get("MARBLE_API_CACHE_MAX_BYTES", 0)),
+    ttl=float(os.environ.get("MARBLE_API_CACHE_TTL", 60)),
+    shared=RedisSharedCache(uri) if (uri := os.environ.get("MARBLE_API_CACHE_REDIS_URI")) else None,
+)
+
+
+# Number of documents fetched from the database at a time when exporting data requests
+EXPORT_BATCH_SIZE = int(os.environ.get("MARBLE_API_EXPORT_BATCH_SIZE", 500))
+
+# Number of data requests that are validated and inserted at a time when creating data requests in bulk
+BULK_CHUNK_SIZE = int(os.environ.get("MARBLE_API_BULK_CHUNK_SIZE", 500))
+
+# Maximum number of ranked results returned by a text search
+SEARCH_MAX_RESULTS = int(os.environ.get("MARBLE_API_SEARCH_MAX_RESULTS", 1000))
+
+# Cache of ranked text search results so that paging through them does not re-run the search
+search_cache = DocumentCache(
+    max_bytes=int(os.environ.get("MARBLE_API_SEARCH_CACHE_MAX_BYTES", 16 * 2**20)),
+    ttl=float(os.environ.get("MARBLE_API_SEARCH_CACHE_TTL", 300)),
+    shared=data_request_cache.shared,
+)
+
+# Cache of simplified geometries so that large geometries are only simplified once for each tolerance
+simplify_cache = DocumentCache(
+    max_bytes=int(os.environ.get("MARBLE_API_SIMPLIFY_CACHE_MAX_BYTES", 64 * 2**20)),
+    ttl=float(os.environ.get("MARBLE_API_SIMPLIFY_CACHE_TTL", 3600)),
+    shared=data_request_cache.shared,
+)
 
 
 def _data_request_id(id_: str) -> ObjectId:
@@ -38,23 +119,934 @@ def _is_router_scope(request: Request, router: APIRouter) -> bool:
     return request.scope.get("route").path.startswith(f"{router.prefix}/")
 
 
+# Fields that the STAC item representation of a data request is generated from
+_STAC_ITEM_SOURCE_FIELDS = frozenset(("geometry", "temporal", "links", "extra_properties"))
+
+# Fields that are derived from other fields of a data request and stored in the database but are not part
+# of the data request itself:
+#   - stac_item: STAC item representation of the data request
+#   - footprint: 2D geometry indexed by a 2dsphere index (see marble_api.utils.geojson.footprints)
+#   - start_utc/end_utc: start and end of the temporal range as UTC dates
+_DERIVED_FIELDS = ("stac_item", "footprint", "start_utc", "end_utc")
+
+# Field that stores the revision of a data request, which is incremented every time the data request is updated and
+# is returned as its ETag. Data requests that were created before revisions existed do not have this field (their
+# revision is 0).
+_REVISION_FIELD = "revision"
+
+# Fields that can be selected with the fields and exclude parameters of the read routes
+_PUBLIC_FIELDS = frozenset(name for name, field in DataRequestPublic.model_fields.items() if not field.exclude)
+
+# Collection that contains the number of data requests that belong to each user ({"_id": user, "count": n}).
+# These counts are estimates since they are updated separately from the data requests (see backfill_user_counts).
+_COUNT_COLLECTION = "data-request-count"
+
+# Error code returned by MongoDB when a geometry cannot be indexed by a 2dsphere index
+_CANNOT_INDEX_GEOMETRY = 16755
+
+# Error code returned by MongoDB when a query needs an index that does not exist (eg. a text search before the text
+# index is built)
+_INDEX_NOT_FOUND = 27
+
+_BBOX_ADAPTER = TypeAdapter(BBox)
+_GEOMETRY_ADAPTER = TypeAdapter(Geometry)
+_DATETIME_ADAPTER = TypeAdapter(AwareDatetime)
+
+type Interval = tuple[datetime.datetime | None, datetime.datetime | None]
+
+
+def _to_document(data: dict) -> dict:
+    """Return a copy of the (serialized) data in the format that it is stored in the database."""
+    document = dict(data)
+    if GEOMETRY_STORAGE_DTYPE:
+        if document.get("geometry") is not None:
+            document["geometry"] = pack_geometry(document["geometry"], GEOMETRY_STORAGE_DTYPE)
+        if document.get("stac_item") and document["stac_item"]["geometry"] is not None:
+            document["stac_item"] = {
+                **document["stac_item"],
+                "geometry": pack_geometry(document["stac_item"]["geometry"], GEOMETRY_STORAGE_DTYPE),
+            }
+    return document
+
+
+def _from_document(document: dict) -> dict:
+    """Return a copy of a document read from the database where the geometry is a regular (unpacked) geojson."""
+    if isinstance(document.get("geometry"), dict):
+        return {**document, "geometry": unpack_geometry(document["geometry"])}
+    return document
+
+
+def _projection(stac: bool, fields: Collection[str] | None = None, revision: bool = False) -> dict:
+    """
+    Return a projection that excludes all derived fields except for the stored STAC item if stac is True.
+
+    If fields is set, the projection only includes the id, those fields and the stored STAC item if stac is True.
+    The revision is only included if revision is True.
+    """
+    if fields is None:
+        excluded = [field for field in _DERIVED_FIELDS if not (stac and field == "stac_item")]
+        return {field: False for field in (excluded if revision else [*excluded, _REVISION_FIELD])}
+    return {
+        "_id": True,
+        **{field: True for field in fields if field != "id"},
+        **({"stac_item": True} if stac else {}),
+        **({_REVISION_FIELD: True} if revision else {}),
+    }
+
+
+def _apply_projection(document: dict, projection: dict) -> dict:
+    """Return a copy of document that only contains the fields selected by a projection returned by _projection."""
+    if any(projection.values()):
+        return {field: value for field, value in document.items() if projection.get(field)}
+    return {field: value for field, value in document.items() if field not in projection}
+
+
+def _parse_fields(fields: str | None, exclude: str | None) -> set[str] | None:
+    """
+    Return the names of the fields selected by the comma separated fields and exclude parameters.
+
+    Returns None if neither parameter is set (all fields are selected). The id is always selected.
+    Raises a 422 error if either parameter contains a name that is not a field of a data request.
+    """
+    if fields is None and exclude is None:
+        return None
+    selected = set(_PUBLIC_FIELDS) if fields is None else {name.strip() for name in fields.split(",") if name.strip()}
+    excluded = set() if exclude is None else {name.strip() for name in exclude.split(",") if name.strip()}
+    if unknown := (selected | excluded) - _PUBLIC_FIELDS:
+        raise HTTPException(status_code=422, detail=f"unknown fields: {', '.join(sorted(unknown))}")
+    return (selected - excluded) | {"id"}
+
+
+def _etag(revision: int) -> str:
+    """Return the (strong) ETag of a data request with the given revision."""
+    return f'"{revision}"'
+
+
+def _page_etag(data_requests: list[dict], query_params: dict[str, ObjectId], total: int | None) -> str:
+    """
+    Return a weak ETag for a page of data requests (that contain their revision) with the given links and total.
+
+    The ETag changes whenever a data request on the page is updated or the data requests on the page change.
+    """
+    page = {
+        "revisions": [[document["_id"], document.get(_REVISION_FIELD, 0)] for document in data_requests],
+        "links": query_params,
+        "total": total,
+    }
+    return f'W/"{hashlib.sha256(bson.encode(page)).hexdigest()}"'
+
+
+def _entity_tags(header: str, weak: bool) -> list[str] | None:
+    """
+    Return the entity tags in an If-Match or If-None-Match header or None if the header is "*" (which matches any tag).
+
+    If weak is True, weak tags are returned without their "W/" prefix (weak comparison, used by If-None-Match).
+    Otherwise weak tags are dropped since they never match with strong comparison (used by If-Match).
+    """
+    if header.strip() == "*":
+        return None
+    tags = []
+    for tag in (tag.strip() for tag in header.split(",")):
+        if tag.startswith("W/"):
+            if not weak:
+                continue
+            tag = tag[2:]
+        tags.append(tag)
+    return tags
+
+
+def _not_modified(if_none_match: str | None, etag: str) -> bool:
+    """Return True if etag matches the If-None-Match header (so a 304 response should be returned)."""
+    if if_none_match is None:
+        return False
+    tags = _entity_tags(if_none_match, weak=True)
+    return tags is None or etag.removeprefix("W/") in tags
+
+
+def _revision_selector(if_match: str | None) -> dict:
+    """
+    Return a selector for the data requests whose ETag matches the If-Match header.
+
+    The selector is empty if there is no header or if the header is "*" since any data request matches.
+    """
+    if if_match is None or (tags := _entity_tags(if_match, weak=False)) is None:
+        return {}
+    revisions = [int(tag[1:-1]) for tag in tags if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit()]
+    # data requests that were created before revisions existed do not have a revision field
+    return {_REVISION_FIELD: {"$in": [revision or None for revision in revisions]}}
+
+
+async def _write_with_footprint[T](
+    write: Callable[[dict], Awaitable[T]], document: dict, geometry_summary: GeometrySummary
+) -> T:
+    """
+    Call write with a copy of document that contains the footprint of a geometry and return the result.
+
+    The most precise footprint that can be indexed by the database is used. Less precise footprints are
+    only used if writing the document fails because the database cannot index the footprint.
+    """
+    *precise_footprints, footprint = footprints(geometry_summary)
+    for precise_footprint in precise_footprints:
+        try:
+            return await write({**document, "footprint": precise_footprint})
+        except OperationFailure as e:
+            if e.code != _CANNOT_INDEX_GEOMETRY:
+                raise
+    return await write({**document, "footprint": footprint})
+
+
+def _with_derived_fields(new_data_request: dict, data_request: DataRequest) -> dict:
+    """
+    Return a copy of a new (serialized) data request that contains all derived fields except for the footprint.
+
+    The STAC item is created from data_request (the validated data request) so that its geometry is not validated
+    and summarized again.
+    """
+    return {
+        **new_data_request,
+        "stac_item": data_request.stac_item_with_id(str(new_data_request["_id"])),
+        **_temporal_range(data_request.temporal),
+    }
+
+
+def _temporal_range(temporal: list[datetime.datetime]) -> dict[str, datetime.datetime]:
+    """Return the derived start_utc and end_utc fields for the (sorted) temporal value of a data request."""
+    return {
+        "start_utc": temporal[0].astimezone(datetime.timezone.utc),
+        "end_utc": temporal[-1].astimezone(datetime.timezone.utc),
+    }
+
+
+def _parse_bbox(bbox: str | None) -> BBox | None:
+    """Convert a comma separated bbox query parameter to a bbox."""
+    if bbox is None:
+        return None
+    try:
+        return _BBOX_ADAPTER.validate_python(bbox.split(","))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"invalid bbox: {bbox}") from e
+
+
+def _parse_geometry(geometry: str | None) -> Geometry | None:
+    """Convert a GeoJSON geometry query parameter to a geometry."""
+    if geometry is None:
+        return None
+    try:
+        return _GEOMETRY_ADAPTER.validate_json(geometry)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"invalid geometry: {geometry}") from e
+
+
+def _parse_interval(interval: str | None) -> Interval | None:
+    """
+    Convert a STAC datetime query parameter to a (start, end) interval.
+
+    The parameter is either a single datetime or two datetimes separated by a "/". Either end of an
+    interval can be open ("" or "..") but not both.
+    """
+    if interval is None:
+        return None
+    parts = interval.split("/")
+    try:
+        if len(parts) == 1:
+            start = end = _DATETIME_ADAPTER.validate_python(interval)
+        elif len(parts) == 2:
+            start, end = (None if part in ("", "..") else _DATETIME_ADAPTER.validate_python(part) for part in parts)
+        else:
+            raise ValueError(interval)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"invalid datetime: {interval}") from e
+    if (start is None and end is None) or (start is not None and end is not None and start > end):
+        raise HTTPException(status_code=422, detail=f"invalid datetime: {interval}")
+    return start, end
+
+
+def _temporal_conditions(interval: Interval | None) -> list[dict]:
+    """Return query conditions that match data requests whose temporal range overlaps the interval."""
+    conditions = []
+    if interval is not None:
+        start, end = interval
+        if end is not None:
+            conditions.append({"start_utc": {"$lte": end}})
+        if start is not None:
+            conditions.append({"end_utc": {"$gte": start}})
+    return conditions
+
+
+def _spatial_conditions(bbox: BBox | None, intersects: Geometry | None) -> list[dict]:
+    """Return query conditions that match data requests whose footprint intersects the bbox and the geometry."""
+    conditions = []
+    if bbox is not None:
+        conditions.append(
+            {"$or": [{"footprint": {"$geoIntersects": {"$geometry": geo}}} for geo in bbox_to_geometries(bbox)]}
+        )
+    if intersects is not None:
+        conditions.append({"footprint": {"$geoIntersects": {"$geometry": drop_elevation(intersects)}}})
+    return conditions
+
+
+async def _find_data_request(
+    selector: dict,
+    stac: bool,
+    fields: Collection[str] | None = None,
+    session: AsyncClientSession | None = None,
+    revision: bool = False,
+) -> dict | None:
+    """
+    Return the data request that matches selector, reading through the data request cache if it is enabled.
+
+    The selector must contain an "_id" key. All other keys must be matched exactly by the data request.
+    If fields is set, only the id and those fields are returned (see _projection). The revision is only
+    returned if revision is True.
+
+    If session is set (a causally consistent session), the cache is not read since it may not contain the latest writes.
+    """
+    projection = _projection(stac, fields, revision)
+    if not data_request_cache.enabled or session is not None:
+        return await client.read_db["data-request"].find_one(selector, projection, session=session)
+    key = str(selector["_id"])
+    if (document := await data_request_cache.get(key)) is None:
+        if (document := await client.db["data-request"].find_one({"_id": selector["_id"]})) is None:
+            return None
+        await data_request_cache.set(key, document)
+        # A write (which invalidates the cache after it is written) may have happened after the data request was
+        # read, in which case its invalidation may have run before the outdated data request was cached. Writes
+        # increment the revision so check that the cached data request is still current after caching it: either
+        # this sees the write or the write's invalidation runs after the data request was cached.
+        current = {"_id": selector["_id"], _REVISION_FIELD: document.get(_REVISION_FIELD)}
+        if await client.db["data-request"].find_one(current, {"_id": True}) is None:
+            await data_request_cache.delete(key)
+    if any(document.get(field) != value for field, value in selector.items()):
+        return None
+    return _apply_projection(document, projection)
+
+
+class _Update(TypedDict, total=False):
+    """Update of a single document in a bulk write."""
+
+    selector: Required[dict]
+    update: Required[dict]
+    geometry_summary: GeometrySummary  # if this key exists, the update also sets the footprint of this geometry
+
+
+async def _bulk_update(updates: list[_Update]) -> tuple[int, int]:
+    """
+    Apply updates with a single bulk write and return the number of matched and modified documents.
+
+    Updates that fail because the database cannot index their footprint are applied again one at a time
+    with a less precise footprint.
+    """
+    collection = client.db["data-request"]
+    requests = [
+        UpdateOne(
+            update["selector"],
+            {
+                **update["update"],
+                "$set": {**update["update"]["$set"], "footprint": footprints(update["geometry_summary"])[0]},
+            }
+            if "geometry_summary" in update
+            else update["update"],
+        )
+        for update in updates
+    ]
+    try:
+        result = await collection.bulk_write(requests, ordered=False, session=write_session())
+    except BulkWriteError as e:
+        matched, modified = e.details["nMatched"], e.details["nModified"]
+        for error in e.details["writeErrors"]:
+            if error["code"] != _CANNOT_INDEX_GEOMETRY:
+                raise
+            update = updates[error["index"]]
+            result = await _write_with_footprint(
+                lambda document, update=update: collection.update_one(
+                    update["selector"], {**update["update"], "$set": document}, session=write_session()
+                ),
+                update["update"]["$set"],
+                update["geometry_summary"],
+            )
+            matched += result.matched_count
+            modified += result.modified_count
+        return matched, modified
+    return result.matched_count, result.modified_count
+
+
+async def backfill_derived_fields(batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """
+    Set the derived fields (and the STAC item) of data requests that were created before those fields existed.
+
+    Returns the number of data requests that were updated. Data requests that are not valid are logged and
+    skipped. Data requests that are updated while this is running are skipped (they are updated with their own
+    derived fields).
+    """
+    selector = {"$or": [{field: {"$exists": False}} for field in ("footprint", "start_utc", "end_utc", "stac_item")]}
+    cursor = client.db["data-request"].find(selector, {"stac_item": False}).sort("_id", pymongo.ASCENDING)
+    batch = []
+    updated = 0
+    async for document in cursor.batch_size(batch_size):
+        try:
+            data_request = DataRequestPublic(**_from_document(document))
+        except (ValidationError, ValueError):
+            logger.exception("unable to backfill data request with id=%s", document["_id"])
+            continue
+        batch.append(
+            _Update(
+                selector={"_id": document["_id"], _REVISION_FIELD: document.get(_REVISION_FIELD)},
+                update={
+                    "$set": {
+                        **_temporal_range(data_request.temporal),
+                        **_to_document({"stac_item": data_request.stac_item}),
+                    }
+                },
+                geometry_summary=data_request.geometry_summary,
+            )
+        )
+        if len(batch) >= batch_size:
+            await _bulk_update(batch)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await _bulk_update(batch)
+        updated += len(batch)
+    logger.info("backfilled derived fields for %s data requests", updated)
+    return updated
+
+
+async def _store_stac_items(ids: list[ObjectId], batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """
+    Generate and store the STAC items of the data requests with these ids that do not have a stored STAC item.
+
+    Data requests are read and updated batch_size at a time. An item is only stored if the data request has not
+    been updated since it was read. Data requests that are not valid are logged and skipped (their STAC item is
+    generated when it is read). Returns the number of stored STAC items.
+    """
+    collection = client.db["data-request"]
+    stored = 0
+    for start in range(0, len(ids), batch_size):
+        requests = []
+        cursor = collection.find({"_id": {"$in": ids[start : start + batch_size]}, "stac_item": None})
+        async for document in cursor:
+            try:
+                stac_item = DataRequestPublic(**_from_document(document)).stac_item
+            except (ValidationError, ValueError):
+                logger.exception("unable to generate the STAC item of data request with id=%s", document["_id"])
+                continue
+            requests.append(
+                UpdateOne(
+                    {"_id": document["_id"], _REVISION_FIELD: document.get(_REVISION_FIELD), "stac_item": None},
+                    {"$set": _to_document({"stac_item": stac_item})},
+                )
+            )
+        if requests:
+            stored += (await collection.bulk_write(requests, ordered=False, session=write_session())).modified_count
+    return stored
+
+
+async def _increment_counts(counts: dict[str, int]) -> None:
+    """Add to the stored number of data requests that belong to each user."""
+    requests = [
+        UpdateOne({"_id": user}, {"$inc": {"count": n}}, upsert=True) for user, n in counts.items() if user and n
+    ]
+    if requests:
+        await client.db[_COUNT_COLLECTION].bulk_write(requests, ordered=False, session=write_session())
+
+
+async def _recount(users: Iterable[str]) -> None:
+    """Set the stored number of data requests that belong to each user to the number of data requests they have."""
+    collection = client.db["data-request"]
+    session = write_session()
+    requests = [
+        UpdateOne(
+            {"_id": user},
+            {"$set": {"count": await collection.count_documents({"user": user}, session=session)}},
+            upsert=True,
+        )
+        for user in set(users)
+        if user
+    ]
+    if requests:
+        await client.db[_COUNT_COLLECTION].bulk_write(requests, ordered=False, session=session)
+
+
+async def backfill_user_counts() -> int:
+    """
+    Set the stored number of data requests that belong to each user to the number of data requests they have.
+
+    The stored counts are updated when data requests are created or deleted but they may drift from the actual
+    counts (for example, if the application stops between creating a data request and updating the count).
+    All data requests are counted by user in a single aggregation and the counts of users without data requests
+    are removed. Data requests that are created or deleted while the counts are being set may not be counted (the
+    counts are estimates so this is not corrected). Returns the number of users whose count was set.
+    """
+    collection = client.db[_COUNT_COLLECTION]
+    cursor = await client.db["data-request"].aggregate([{"$group": {"_id": "$user", "count": {"$sum": 1}}}])
+    users = []
+    requests = []
+    async for document in cursor:
+        if not document["_id"]:
+            continue
+        users.append(document["_id"])
+        requests.append(UpdateOne({"_id": document["_id"]}, {"$set": {"count": document["count"]}}, upsert=True))
+        if len(requests) == EXPORT_BATCH_SIZE:
+            await collection.bulk_write(requests, ordered=False, session=write_session())
+            requests = []
+    if requests:
+        await collection.bulk_write(requests, ordered=False, session=write_session())
+    await collection.delete_many({"_id": {"$nin": users}}, session=write_session())
+    logger.info("recounted data requests for %s users", len(users))
+    return len(users)
+
+
+async def _count_data_requests(
+    selector: dict, count: Literal["exact", "estimated"], session: AsyncClientSession | None = None
+) -> int:
+    """
+    Return the number of data requests that match selector.
+
+    If count is "estimated" and selector only selects data requests by user (or selects all data requests), the
+    stored count for that user (or the collection's metadata) is used instead of counting the data requests.
+    Otherwise, the matching data requests are counted.
+    """
+    if count == "estimated" and not selector.keys() - {"user"}:
+        if "user" in selector:
+            document = await client.read_db[_COUNT_COLLECTION].find_one({"_id": selector["user"]}, session=session)
+            return document["count"] if document is not None else 0
+        return await client.read_db["data-request"].estimated_document_count(session=session)
+    return await client.read_db["data-request"].count_documents(selector, session=session)
+
+
+def _stac_item(document: dict) -> dict:
+    """Return the STAC item stored in the document or generate it if it has not been stored yet."""
+    if (item := document.get("stac_item")) is None:
+        return DataRequestPublic(**_from_document(document)).stac_item
+    return {**item, "geometry": unpack_geometry(item["geometry"])}
+
+
+async def _add_stac_items(documents: list[dict], partial: bool, session: AsyncClientSession | None = None) -> None:
+    """
+    Add the STAC item to each document, generating it if it has not been stored yet.
+
+    If partial is True, the documents may only contain some of their fields so the documents whose STAC
+    item must be generated are read again from the database.
+    """
+    missing = [document["_id"] for document in documents if partial and document.get("stac_item") is None]
+    full_documents = {}
+    if missing:
+        cursor = client.read_db["data-request"].find(
+            {"_id": {"$in": missing}}, _projection(stac=False), session=session
+        )
+        full_documents = {document["_id"]: document async for document in cursor}
+    for document in documents:
+        document["stac_item"] = _stac_item(full_documents.get(document["_id"], document))
+
+
+async def _simplified(id_: ObjectId, geometry: dict | None, tolerance: float) -> dict | None:
+    """
+    Return a (possibly packed) geometry of the data request with id_ simplified with tolerance.
+
+    Results are cached for each data request and tolerance. The cache key also contains a digest of the geometry
+    so that a simplified geometry is never returned after the data request's geometry has been updated.
+    """
+    if geometry is None:
+        return None
+    digest = hashlib.sha256(bson.encode({"geometry": geometry})).hexdigest()
+    key = f"simplify:{id_}:{tolerance!r}:{digest}"
+    if (cached := await simplify_cache.get(key)) is not None:
+        return cached["geometry"]
+    simplified = simplify_geometry(unpack_geometry(geometry), tolerance)
+    await simplify_cache.set(key, {"geometry": simplified})
+    return simplified
+
+
+async def _simplify_geometries(document: dict, tolerance: float) -> None:
+    """Simplify the geometry and the geometry of the STAC item of a document (if they are present) in place."""
+    if "geometry" in document:
+        document["geometry"] = await _simplified(document["_id"], document["geometry"], tolerance)
+    if (item := document.get("stac_item")) is not None:
+        document["stac_item"] = {**item, "geometry": await _simplified(document["_id"], item["geometry"], tolerance)}
+
+
+async def _find_page(
+    selector: dict,
+    limit: int,
+    projection: dict | None,
+    after: str | None = None,
+    before: str | None = None,
+    session: AsyncClientSession | None = None,
+) -> tuple[list[dict], dict[str, ObjectId]]:
+    """
+    Return a page of at most limit data requests that match selector, sorted by id.
+
+    If selector contains an "_id" key, its value must be a dictionary of query operators (eg. {"$in": [...]}).
+
+    If after is set, the page starts right after the data request with that id. Otherwise, if before is
+    set, the page ends right before the data request with that id.
+
+    Also returns the "after" and "before" ids that select the next and previous pages (if they exist).
+    """
+    reverse_it = False
+    collection = client.read_db["data-request"]
+    if after:
+        db_request = collection.find(
+            {**selector, "_id": {**selector.get("_id", {}), "$gt": _data_request_id(after)}},
+            projection,
+            session=session,
+        ).sort("_id", pymongo.ASCENDING)
+    elif before:
+        db_request = collection.find(
+            {**selector, "_id": {**selector.get("_id", {}), "$lt": _data_request_id(before)}},
+            projection,
+            session=session,
+        ).sort("_id", pymongo.DESCENDING)
+        reverse_it = True  # put the eventual result back in ascending order for consistency
+    else:
+        db_request = collection.find(selector, projection, session=session).sort("_id", pymongo.ASCENDING)
+    data_requests = await db_request.limit(limit + 1).to_list()
+    if reverse_it:
+        data_requests = list(reversed(data_requests))
+
+    query_params = {}
+
+    over_limit = len(data_requests) > limit
+
+    if data_requests:
+        if after:
+            if over_limit:
+                data_requests.pop()
+                query_params["after"] = data_requests[-1]["_id"]
+            query_params["before"] = data_requests[0]["_id"]
+        elif before:
+            if over_limit:
+                data_requests.pop(0)
+                query_params["before"] = data_requests[0]["_id"]
+            query_params["after"] = data_requests[-1]["_id"]
+        elif over_limit:
+            data_requests.pop()
+            query_params["after"] = data_requests[-1]["_id"]
+
+    return data_requests, query_params
+
+
+async def _ranked_ids(
+    selector: dict, q: str, search: str | None = None, session: AsyncClientSession | None = None
+) -> tuple[str, list[ObjectId]]:
+    """
+    Return the ids of the data requests that match selector and the text search q, ordered by relevance.
+
+    The ids are returned with the key of the search snapshot that contains them. If search is the key of a snapshot
+    of the same search that has not expired, the ids are read from it so that they are stable while paging through
+    the results. Otherwise the text search is run and its results are cached in a new snapshot. At most
+    SEARCH_MAX_RESULTS ids are returned.
+    """
+    prefix = "search:" + hashlib.sha256(bson.encode({"selector": selector, "q": q})).hexdigest() + ":"
+    if search is not None and (cached := await search_cache.get(prefix + search)) is not None:
+        return search, cached["ids"]
+    cursor = (
+        client.read_db["data-request"]
+        .find({**selector, "$text": {"$search": q}}, {"_id": True, "score": {"$meta": "textScore"}}, session=session)
+        .sort([("score", {"$meta": "textScore"}), ("_id", pymongo.ASCENDING)])
+        .limit(SEARCH_MAX_RESULTS)
+    )
+    ids = [document["_id"] async for document in cursor]
+    search = secrets.token_urlsafe(12)
+    await search_cache.set(prefix + search, {"ids": ids})
+    return search, ids
+
+
+async def _find_ranked_page(
+    selector: dict,
+    q: str,
+    ids: list[ObjectId],
+    limit: int,
+    projection: dict | None,
+    after: str | None = None,
+    before: str | None = None,
+    session: AsyncClientSession | None = None,
+) -> tuple[list[dict], dict[str, ObjectId]]:
+    """
+    Return a page of at most limit data requests that match selector and the text search q, ordered by relevance.
+
+    This works like _find_page except that after and before refer to positions in ids, the ranked results of the
+    text search (see _ranked_ids). Data requests that were deleted or no longer match the search are skipped.
+    """
+    try:
+        if after:
+            start = ids.index(_data_request_id(after)) + 1
+            end = start + limit
+        elif before:
+            end = ids.index(_data_request_id(before))
+            start = max(end - limit, 0)
+        else:
+            start, end = 0, limit
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="search results have expired, please search again") from e
+    page_ids = ids[start:end]
+    cursor = client.read_db["data-request"].find(
+        {**selector, "$text": {"$search": q}, "_id": {"$in": page_ids}}, projection, session=session
+    )
+    documents = {document["_id"]: document async for document in cursor}
+    data_requests = [documents[id_] for id_ in page_ids if id_ in documents]
+
+    query_params = {}
+    if page_ids:
+        if end < len(ids):
+            query_params["after"] = page_ids[-1]
+        if start > 0:
+            query_params["before"] = page_ids[0]
+    return data_requests, query_params
+
+
 @user_router.post("/")
 @admin_router.post("/")
-async def post_data_request_user(user: str, data_request: DataRequest) -> DataRequestPublic:
-    """Create a new data request and return the newly created data request."""
+async def post_data_request_user(user: str, data_request: DataRequest, response: Response) -> DataRequestPublic:
+    """Create a new data request and return the newly created data request (its ETag is in the ETag header)."""
     data_request.user = user
     new_data_request = data_request.model_dump(by_alias=True)
-    result = await client.db["data-request"].insert_one(new_data_request)
-    new_data_request["id"] = str(result.inserted_id)
+    new_data_request["_id"] = ObjectId()
+    await _write_with_footprint(
+        functools.partial(client.db["data-request"].insert_one, session=write_session()),
+        _to_document({**_with_derived_fields(new_data_request, data_request), _REVISION_FIELD: 1}),
+        data_request.geometry_summary,
+    )
+    response.headers["ETag"] = _etag(1)
+    await _increment_counts({user: 1})
+    await data_request_cache.delete(str(new_data_request["_id"]))
+    new_data_request["id"] = str(new_data_request["_id"])
     return new_data_request
 
 
+async def _insert_chunk(user: str, data_requests: list[dict]) -> list[BulkCreateResult]:
+    """Validate and insert a chunk of data requests with a single insert_many and return the result for each one."""
+    results = []
+    documents = []  # (index in results, document, geometry summary)
+    for item in data_requests:
+        try:
+            data_request = DataRequest.model_validate(item)
+        except ValidationError as e:
+            results.append(
+                BulkCreateResult(errors=e.errors(include_url=False, include_context=False, include_input=False))
+            )
+            continue
+        data_request.user = user
+        new_data_request = data_request.model_dump(by_alias=True)
+        new_data_request["_id"] = ObjectId()
+        results.append(BulkCreateResult(id=str(new_data_request["_id"])))
+        documents.append(
+            (
+                len(results) - 1,
+                _to_document({**_with_derived_fields(new_data_request, data_request), _REVISION_FIELD: 1}),
+                data_request.geometry_summary,
+            )
+        )
+    if not documents:
+        return results
+    collection = client.db["data-request"]
+    try:
+        await collection.insert_many(
+            [{**document, "footprint": footprints(summary)[0]} for _, document, summary in documents],
+            ordered=False,
+            session=write_session(),
+        )
+    except BulkWriteError as e:
+        for error in e.details["writeErrors"]:
+            index, document, summary = documents[error["index"]]
+            if error["code"] == _CANNOT_INDEX_GEOMETRY:
+                await _write_with_footprint(
+                    functools.partial(collection.insert_one, session=write_session()), document, summary
+                )
+            else:
+                results[index] = BulkCreateResult(errors=[{"type": "write_error", "loc": [], "msg": error["errmsg"]}])
+    return results
+
+
+@user_router.post("/bulk")
+@admin_router.post("/bulk")
+async def post_data_requests_bulk(user: str, data_requests: Annotated[list[dict], Body()]) -> BulkCreateResponse:
+    """
+    Create multiple data requests and return the result of creating each one.
+
+    Results are in the same order as the data requests in the request body. Each result contains either
+    the id of the newly created data request or the reasons why it could not be created. Data requests
+    are validated and inserted BULK_CHUNK_SIZE at a time and invalid data requests do not prevent the
+    others from being created.
+    """
+    results = []
+    for start in range(0, len(data_requests), BULK_CHUNK_SIZE):
+        chunk_results = await _insert_chunk(user, data_requests[start : start + BULK_CHUNK_SIZE])
+        await _increment_counts({user: sum(result.id is not None for result in chunk_results)})
+        results.extend(chunk_results)
+    return BulkCreateResponse(created=sum(result.id is not None for result in results), results=results)
+
+
+def _bulk_selector(selector: BulkSelector, request: Request, user: str | None) -> dict:
+    """
+    Return a database selector for the data requests selected by selector.
+
+    Data requests are always restricted to those that belong to user for user scoped routes.
+    """
+    mongo_selector = {}
+    if selector.ids is not None:
+        mongo_selector["_id"] = {"$in": [ObjectId(id_) for id_ in selector.ids if ObjectId.is_valid(id_)]}
+    if selector.variables is not None:
+        mongo_selector["variables"] = {"$in": selector.variables}
+    if selector.user is not None:
+        mongo_selector["user"] = selector.user
+    if _is_router_scope(request, user_router):
+        if mongo_selector.setdefault("user", user) != user:
+            raise HTTPException(status_code=403, detail="Forbidden")
+    return mongo_selector
+
+
+def _update_operation(data_request: DataRequestUpdate, request: Request, user: str | None) -> dict:
+    """
+    Return the update operation that applies the fields of data_request that are set.
+
+    The stored STAC item is removed if it would change since it cannot be recomputed without reading
+    each updated document. It is stored again after the update (see _store_stac_items). The revision is always
+    incremented.
+    """
+    updated_fields = data_request.model_dump(exclude_unset=True, by_alias=True)
+    if not updated_fields:
+        raise HTTPException(status_code=422, detail="update must set at least one field")
+    updated_user = updated_fields.get("user")
+    if updated_user and _is_router_scope(request, user_router) and user != updated_user:
+        # Users cannot change data requests so that they belong to a different user
+        raise HTTPException(status_code=403, detail="Forbidden")
+    operation = {"$set": _to_document(updated_fields), "$inc": {_REVISION_FIELD: 1}}
+    if "temporal" in updated_fields:
+        operation["$set"].update(_temporal_range(data_request.temporal))
+    if _STAC_ITEM_SOURCE_FIELDS & updated_fields.keys():
+        operation["$unset"] = {"stac_item": ""}
+    return operation
+
+
+async def _selected_ids(selector: dict, required: bool = False) -> list[ObjectId]:
+    """
+    Return the ids of data requests that match selector if they need to be removed from the cache.
+
+    If required is True, the ids are always returned.
+    """
+    if not data_request_cache.enabled and not required:
+        return []
+    return [document["_id"] async for document in client.db["data-request"].find(selector, {"_id": True})]
+
+
+@user_router.patch("/bulk")
+@admin_router.patch("/bulk")
+async def patch_data_requests_bulk(
+    bulk_update: BulkUpdate, request: Request, user: str | None = None
+) -> BulkWriteResponse:
+    """
+    Update multiple data requests and return the number of data requests that were matched and modified.
+
+    Either set updates to apply a different update to each data request (by id), or set selector and
+    update to apply the same update to all selected data requests. User scoped routes only update data
+    requests that belong to the user.
+    """
+    collection = client.db["data-request"]
+    previous_users = []
+    if bulk_update.updates is not None:
+        scope = {"user": user} if _is_router_scope(request, user_router) else {}
+        updates = []
+        for item in bulk_update.updates:
+            if not ObjectId.is_valid(item.id):
+                continue
+            update = _Update(
+                selector={**scope, "_id": ObjectId(item.id)},
+                update=_update_operation(item.update, request, user),
+            )
+            if "geometry" in item.update.model_fields_set:
+                update["geometry_summary"] = item.update.geometry_summary
+            updates.append(update)
+        ids = [update["selector"]["_id"] for update in updates]
+        if any("user" in update["update"]["$set"] for update in updates):
+            previous_users = await collection.distinct("user", {**scope, "_id": {"$in": ids}})
+        matched, modified = await _bulk_update(updates) if updates else (0, 0)
+    else:
+        selector = _bulk_selector(bulk_update.selector, request, user)
+        operation = _update_operation(bulk_update.update, request, user)
+        ids = await _selected_ids(selector, required="$unset" in operation)
+        if "user" in operation["$set"]:
+            previous_users = await collection.distinct("user", selector)
+
+        async def _update(document: dict) -> UpdateResult:
+            return await collection.update_many(selector, {**operation, "$set": document}, session=write_session())
+
+        if "geometry" in bulk_update.update.model_fields_set:
+            result = await _write_with_footprint(_update, operation["$set"], bulk_update.update.geometry_summary)
+        else:
+            result = await _update(operation["$set"])
+        matched, modified = result.matched_count, result.modified_count
+    if bulk_update.updates is not None:
+        await _store_stac_items([update["selector"]["_id"] for update in updates if "$unset" in update["update"]])
+    elif "$unset" in operation:
+        await _store_stac_items(ids)
+    if previous_users:
+        # data requests may now belong to different users so the users before and after the update are recounted
+        if bulk_update.updates is not None:
+            new_users = [update["update"]["$set"].get("user") for update in updates]
+        else:
+            new_users = [operation["$set"].get("user")]
+        await _recount([*previous_users, *new_users])
+    for id_ in ids:
+        await data_request_cache.delete(str(id_))
+    return BulkWriteResponse(matched=matched, modified=modified)
+
+
+@user_router.post("/bulk/delete")
+@admin_router.post("/bulk/delete")
+async def delete_data_requests_bulk(
+    selector: BulkSelector, request: Request, user: str | None = None
+) -> BulkWriteResponse:
+    """
+    Delete all selected data requests and return the number of data requests that were deleted.
+
+    User scoped routes only delete data requests that belong to the user.
+    """
+    mongo_selector = _bulk_selector(selector, request, user)
+    ids = await _selected_ids(mongo_selector)
+    users = await client.db["data-request"].distinct("user", mongo_selector)
+    result = await client.db["data-request"].delete_many(mongo_selector, session=write_session())
+    await _recount(users)
+    for id_ in ids:
+        await data_request_cache.delete(str(id_))
+    return BulkWriteResponse(deleted=result.deleted_count)
+
+
+async def _store_patched_stac_item(document: dict) -> None:
+    """
+    Store the STAC item of a data request that was just updated (document is the updated data request).
+
+    The item is only stored if the data request has not been updated again since (the later update stores its own
+    item) so that the item always matches the stored fields. The update has already been applied so errors are
+    logged instead of raised: the item is then generated when it is read (and stored by backfill_derived_fields).
+    """
+    try:
+        stac_item = DataRequestPublic(**document).stac_item
+        await client.db["data-request"].update_one(
+            {"_id": document["_id"], _REVISION_FIELD: document[_REVISION_FIELD], "stac_item": None},
+            {"$set": _to_document({"stac_item": stac_item})},
+            session=write_session(),
+        )
+    except (ValidationError, ValueError, PyMongoError):
+        logger.exception("unable to store the STAC item of data request with id=%s", document["_id"])
+
+
 @user_router.patch("/{request_id}")
 @admin_router.patch("/{request_id}")
 async def patch_data_request(
-    request_id: str, data_request: DataRequestUpdate, request: Request, user: str | None = None
+    request_id: str,
+    data_request: DataRequestUpdate,
+    request: Request,
+    response: Response,
+    user: str | None = None,
+    if_match: Annotated[str | None, Header()] = None,
 ) -> DataRequestPublic:
-    """Update fields of data request and return the updated data request."""
+    """
+    Update fields of data request and return the updated data request (its new ETag is in the ETag header).
+
+    If the If-Match header is set, the data request is only updated if its current ETag matches the header.
+    Otherwise a 412 error is returned.
+    """
     updated_fields = data_request.model_dump(exclude_unset=True, by_alias=True)
     updated_user = updated_fields.get("user")
     if updated_user and _is_router_scope(request, user_router) and user != updated_user:
@@ -63,35 +1055,128 @@ async def patch_data_request(
     if user:
         data_request.user = user
     selector = {"_id": _data_request_id(request_id)}
+    conditional_selector = {**selector, **_revision_selector(if_match)}
+    previous_users = []
+    if updated_user:
+        previous_users = await client.db["data-request"].distinct("user", conditional_selector)
     if updated_fields:
-        result = await client.db["data-request"].find_one_and_update(
-            selector, {"$set": updated_fields}, return_document=ReturnDocument.AFTER
-        )
+        operation = {"$inc": {_REVISION_FIELD: 1}}
+        if _STAC_ITEM_SOURCE_FIELDS & updated_fields.keys():
+            # the stored item is removed by the same update so that it never contradicts the updated fields
+            operation["$unset"] = {"stac_item": ""}
+
+        async def _update(fields: dict) -> dict | None:
+            return await client.db["data-request"].find_one_and_update(
+                conditional_selector,
+                {**operation, "$set": fields},
+                projection=_projection(stac=False, revision=True),
+                return_document=ReturnDocument.AFTER,
+                session=write_session(),
+            )
+
+        document = _to_document(updated_fields)
+        if "temporal" in updated_fields:
+            document.update(_temporal_range(data_request.temporal))
+        if "geometry" in updated_fields:
+            result = await _write_with_footprint(_update, document, data_request.geometry_summary)
+        else:
+            result = await _update(document)
         if result is not None:
+            result = _from_document(result)
+            if "$unset" in operation:
+                await _store_patched_stac_item(result)
+            if previous_users:
+                await _recount([*previous_users, updated_user])
+            await data_request_cache.delete(str(selector["_id"]))
+            response.headers["ETag"] = _etag(result.pop(_REVISION_FIELD, 0))
             return result
     else:
-        if (result := await client.db["data-request"].find_one(selector)) is not None:
-            return result
+        projection = _projection(stac=False, revision=True)
+        if (result := await client.db["data-request"].find_one(conditional_selector, projection)) is not None:
+            response.headers["ETag"] = _etag(result.pop(_REVISION_FIELD, 0))
+            return _from_document(result)
 
+    if conditional_selector != selector and await client.db["data-request"].find_one(selector, {"_id": True}):
+        raise HTTPException(status_code=412, detail="data publish request has been modified")
     raise HTTPException(status_code=404, detail="data publish request not found")
 
 
+@admin_router.get("/cache")
+async def get_data_request_cache_stats() -> dict[str, int]:
+    """Return counters describing the usage of the data request cache in the current process."""
+    return data_request_cache.stats()
+
+
+@admin_router.post("/counts/recount")
+async def recount_data_requests() -> dict[str, int]:
+    """
+    Recount the stored number of data requests that belong to each user.
+
+    Use this if the counts returned with count=estimated have drifted from the exact counts. Returns the number
+    of users whose count was set.
+    """
+    return {"users": await backfill_user_counts()}
+
+
+@admin_router.get("/export", response_class=StreamingResponse)
+async def export_data_requests(stac: bool = False) -> StreamingResponse:
+    """
+    Return all data requests as newline delimited JSON.
+
+    Data requests are streamed one at a time as they are read from the database so this
+    can be used to export the whole collection.
+    """
+
+    async def _export() -> AsyncIterator[bytes]:
+        cursor = client.read_db["data-request"].find({}, _projection(stac)).sort("_id", pymongo.ASCENDING)
+        async for document in cursor.batch_size(EXPORT_BATCH_SIZE):
+            if stac:
+                document["stac_item"] = _stac_item(document)
+            yield to_json(DataRequestPublic.serialize_trusted(document)) + b"\n"
+
+    return StreamingResponse(_export(), media_type="application/x-ndjson")
+
+
 @user_router.get("/{request_id}", response_model_by_alias=False)
 @admin_router.get("/{request_id}", response_model_by_alias=False)
 async def get_data_request(
-    request_id: str, request: Request, stac: bool = False, user: str | None = None
-) -> DataRequestPublic:
-    """Get a data request with the given request_id."""
+    request_id: str,
+    request: Request,
+    stac: bool = False,
+    user: str | None = None,
+    fields: str | None = None,
+    exclude: str | None = None,
+    simplify: Annotated[float | None, Query(gt=0)] = None,
+    session: Annotated[AsyncClientSession | None, Depends(causal_session)] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> DataRequestPublic | DataRequestPartial:
+    """
+    Get a data request with the given request_id.
+
+    Data requests are validated when they are written so they are returned without being validated again.
+
+    Use the fields and exclude parameters (comma separated field names) to only return some of the fields of
+    the data request. The id is always returned so fields=id can be used to check whether a data request exists.
+
+    Use the simplify parameter to simplify the geometry (and the STAC item's geometry) so that every removed position
+    is within that distance (in degrees) of the simplified geometry.
+
+    The ETag header contains the revision of the data request. If the If-None-Match header matches it, a 304 response
+    is returned without a body.
+    """
+    selected = _parse_fields(fields, exclude)
     selector = {"_id": _data_request_id(request_id)}
     if _is_router_scope(request, user_router):
         selector["user"] = user
-    if (result := await client.db["data-request"].find_one(selector)) is not None:
+    if (result := await _find_data_request(selector, stac, selected, session, revision=True)) is not None:
+        headers = {"ETag": _etag(result.pop(_REVISION_FIELD, 0))}
+        if _not_modified(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
         if stac:
-            try:
-                result["stac_item"] = DataRequestPublic(**result).stac_item
-            except Exception as e:
-                raise Exception(result) from e
-        return result
+            await _add_stac_items([result], partial=selected is not None, session=session)
+        if simplify:
+            await _simplify_geometries(result, simplify)
+        return FastJSONResponse(DataRequestPublic.serialize_trusted(result, selected), headers=headers)
 
     raise HTTPException(status_code=404, detail="data publish request not found")
 
@@ -104,8 +1189,12 @@ async def delete_data_request(request_id: str, request: Request, user: str | Non
     if _is_router_scope(request, user_router):
         selector["user"] = user
 
-    result = await client.db["data-request"].delete_one(selector)
-    if result.deleted_count == 1:
+    result = await client.db["data-request"].find_one_and_delete(
+        selector, projection={"user": True}, session=write_session()
+    )
+    await data_request_cache.delete(str(selector["_id"]))
+    if result is not None:
+        await _increment_counts({result["user"]: -1})
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     raise HTTPException(status_code=404, detail="data publish request not found")
@@ -120,64 +1209,96 @@ async def get_data_requests(
     before: str | None = None,
     limit: Annotated[int, Query(le=100, gt=0)] = 10,
     stac: bool = False,
+    bbox: str | None = None,
+    intersects: str | None = None,
+    datetime: str | None = None,
+    q: str | None = None,
+    fields: str | None = None,
+    exclude: str | None = None,
+    simplify: Annotated[float | None, Query(gt=0)] = None,
+    count: Literal["exact", "estimated"] | None = None,
+    search: str | None = None,
+    session: Annotated[AsyncClientSession | None, Depends(causal_session)] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
 ) -> DataRequestsResponse:
     """
     Return all data requests.
 
     This response is paginated and will only return at most limit objects at a time (maximum 100).
     Use the offset and limit parameters to select specific ranges of data requests.
+
+    Use the bbox parameter (a comma separated STAC bbox) or the intersects parameter (a GeoJSON geometry)
+    to only return data requests whose geometry intersects that area.
+
+    Use the datetime parameter (a STAC datetime or interval, eg. "1990-01-01T00:00:00Z/2000-01-01T00:00:00Z")
+    to only return data requests whose temporal range overlaps that interval.
+
+    Use the q parameter to only return data requests whose title, description, variables or author names
+    match a text search. These results are ordered by relevance instead of by id. The search parameter of the
+    next and prev links identifies a snapshot of the ranked results so that all pages of the results are consistent.
+
+    Use the fields and exclude parameters (comma separated field names) to only return some of the fields of
+    each data request. The id is always returned.
+
+    Use the simplify parameter to simplify the geometries (and the STAC items' geometries) so that every removed
+    position is within that distance (in degrees) of the simplified geometry.
+
+    Use the count parameter to also return the total number of data requests that match the other parameters. If
+    count is "estimated" and the data requests are not filtered, a stored count is returned which may be slightly
+    different from the exact count. Otherwise, the matching data requests are counted, which may be slow.
+
+    The ETag header contains a weak ETag for the page. If the If-None-Match header matches it, a 304 response is
+    returned without a body.
     """
-    reverse_it = False
+    selected = _parse_fields(fields, exclude)
     selector = {}
     if _is_router_scope(request, user_router):
         selector["user"] = user
-    if after:
-        db_request = (
-            client.db["data-request"]
-            .find({**selector, "_id": {"$gt": _data_request_id(after)}})
-            .sort("_id", pymongo.ASCENDING)
-        )
-    elif before:
-        db_request = (
-            client.db["data-request"]
-            .find({**selector, "_id": {"$lt": _data_request_id(before)}})
-            .sort("_id", pymongo.DESCENDING)
-        )
-        reverse_it = True  # put the eventual result back in ascending order for consistency
+    conditions = [
+        *_spatial_conditions(_parse_bbox(bbox), _parse_geometry(intersects)),
+        *_temporal_conditions(_parse_interval(datetime)),
+    ]
+    if conditions:
+        selector["$and"] = conditions
+    snapshot = {}
+    if q:
+        try:
+            # only later pages (with after or before) are read from the snapshot of a previous search
+            search, ranked_ids = await _ranked_ids(selector, q, search if after or before else None, session)
+            data_requests, query_params = await _find_ranked_page(
+                selector, q, ranked_ids, limit, _projection(stac, selected, revision=True), after, before, session
+            )
+        except OperationFailure as e:
+            if e.code != _INDEX_NOT_FOUND:
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="text search is not available until the text index is built, please try again later",
+            ) from e
+        snapshot["search"] = search
     else:
-        db_request = client.db["data-request"].find(selector).sort("_id", pymongo.ASCENDING)
-    data_requests = await db_request.limit(limit + 1).to_list()
-    if reverse_it:
-        data_requests = list(reversed(data_requests))
-
-    query_params = {}
-
-    over_limit = len(data_requests) > limit
-
-    if data_requests:
-        if after:
-            if over_limit:
-                data_requests.pop()
-                query_params["after"] = data_requests[-1]["_id"]
-            query_params["before"] = data_requests[0]["_id"]
-        elif before:
-            if over_limit:
-                data_requests.pop(0)
-                query_params["before"] = data_requests[0]["_id"]
-            query_params["after"] = data_requests[-1]["_id"]
-        elif over_limit:
-            data_requests.pop()
-            query_params["after"] = data_requests[-1]["_id"]
+        data_requests, query_params = await _find_page(
+            selector, limit, _projection(stac, selected, revision=True), after, before, session
+        )
+    total = None
+    if count:
+        # the count for a text search is the number of ranked results
+        total = len(ranked_ids) if q else await _count_data_requests(selector, count, session)
+    headers = {"ETag": _page_etag(data_requests, query_params, total)}
+    if _not_modified(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    for data_request in data_requests:
+        data_request.pop(_REVISION_FIELD, None)
 
     links = []
 
-    base_url = request.url.remove_query_params(["after", "before"])
+    base_url = request.url.remove_query_params(["after", "before", "search"])
     if query_params.get("after"):
         links.append(
             {
                 "rel": "next",
                 "type": "application/json",
-                "href": str(base_url.include_query_params(after=query_params["after"])),
+                "href": str(base_url.include_query_params(after=query_params["after"], **snapshot)),
             }
         )
     if query_params.get("before"):
@@ -185,9 +1306,332 @@ async def get_data_requests(
             {
                 "rel": "prev",
                 "type": "application/json",
-                "href": str(base_url.include_query_params(before=query_params["before"])),
+                "href": str(base_url.include_query_params(before=query_params["before"], **snapshot)),
             }
         )
     if stac:
-        data_requests = [{**r, "stac_item": DataRequestPublic(**r).stac_item} for r in data_requests]
-    return {"data_requests": data_requests, "links": links}
+        await _add_stac_items(data_requests, partial=selected is not None, session=session)
+    if simplify:
+        for data_request in data_requests:
+            await _simplify_geometries(data_request, simplify)
+    return FastJSONResponse(
+        {
+            "data_requests": [DataRequestPublic.serialize_trusted(r, selected) for r in data_requests],
+            "links": Links.model_validate(links).model_dump(mode="json"),
+            "total": total,
+        },
+        headers=headers,
+    )
+
+
+def _stac_url(request: Request, name: str, **path_params) -> str:
+    """Return the url for the STAC route with the given name in the same (user or admin) scope as request."""
+    if "user" in request.path_params:
+        path_params["user"] = request.path_params["user"]
+    return str(request.url_for(name, **path_params))
+
+
+def _stac_token_params(token: str | None) -> dict[str, str]:
+    """Convert a STAC API paging token to the "after" or "before" parameters used by _find_page."""
+    if token is None:
+        return {}
+    direction, _, id_ = token.partition(":")
+    if direction not in ("next", "prev") or not ObjectId.is_valid(id_):
+        raise HTTPException(status_code=400, detail=f"invalid token: {token}")
+    return {"after" if direction == "next" else "before": id_}
+
+
+def _stac_collection(request: Request) -> dict:
+    """Return the STAC collection that contains all data requests."""
+    return {
+        "type": "Collection",
+        "stac_version": "1.1.0",
+        "id": STAC_COLLECTION_ID,
+        "description": "Data requests",
+        "license": "other",
+        "extent": {"spatial": {"bbox": [[-180, -90, 180, 90]]}, "temporal": {"interval": [[None, None]]}},
+        "links": [
+            {
+                "rel": "self",
+                "type": "application/json",
+                "href": _stac_url(request, "get_stac_collection", collection_id=STAC_COLLECTION_ID),
+            },
+            {"rel": "root", "type": "application/json", "href": _stac_url(request, "get_stac_landing_page")},
+            {
+                "rel": "items",
+                "type": "application/geo+json",
+                "href": _stac_url(request, "get_stac_items", collection_id=STAC_COLLECTION_ID),
+            },
+        ],
+    }
+
+
+def _stac_api_item(request: Request, document: dict) -> dict:
+    """Return the STAC item for the data request with the links and collection required by the STAC API."""
+    item = _stac_item(document)
+    collection_url = _stac_url(request, "get_stac_collection", collection_id=STAC_COLLECTION_ID)
+    return {
+        **item,
+        "collection": STAC_COLLECTION_ID,
+        "links": [
+            *item["links"],
+            {"rel": "self", "type": "application/geo+json", "href": f"{collection_url}/items/{item['id']}"},
+            {"rel": "collection", "type": "application/json", "href": collection_url},
+            {"rel": "parent", "type": "application/json", "href": collection_url},
+            {"rel": "root", "type": "application/json", "href": _stac_url(request, "get_stac_landing_page")},
+        ],
+    }
+
+
+async def _stac_item_collection(
+    request: Request,
+    selector: dict | None,
+    limit: int,
+    token: str | None,
+    search_body: dict | None = None,
+    simplify: float | None = None,
+    session: AsyncClientSession | None = None,
+) -> StreamingResponse:
+    """
+    Return a response that contains a page of STAC items for the data requests that match selector as an ItemCollection.
+
+    If selector is None, no data requests match and an empty ItemCollection is returned. If search_body is provided,
+    the links to the next and previous pages are links that POST the search_body (with a different token) to the
+    current url. If simplify is set, the geometries of the items are simplified with that tolerance. Data requests are
+    read with session if it is set.
+
+    Items are serialized one at a time while the response is streamed.
+    """
+    if selector is None:
+        data_requests, query_params = [], {}
+    else:
+        if _is_router_scope(request, stac_user_router):
+            selector["user"] = request.path_params["user"]
+        # only the stored STAC items are read: the other fields are only read for data requests whose item has not
+        # been stored (otherwise each geometry would be read twice, once in the data request and once in its item)
+        data_requests, query_params = await _find_page(
+            selector,
+            limit=limit,
+            projection=_projection(stac=True, fields=()),
+            session=session,
+            **_stac_token_params(token),
+        )
+        await _add_stac_items(data_requests, partial=True, session=session)
+        if simplify:
+            for data_request in data_requests:
+                await _simplify_geometries(data_request, simplify)
+
+    links = []
+    for rel, param, direction in (("next", "after", "next"), ("prev", "before", "prev")):
+        if param in query_params:
+            new_token = f"{direction}:{query_params[param]}"
+            if search_body is None:
+                href = str(request.url.remove_query_params("token").include_query_params(token=new_token))
+                links.append({"rel": rel, "type": "application/geo+json", "href": href})
+            else:
+                links.append(
+                    {
+                        "rel": rel,
+                        "type": "application/geo+json",
+                        "href": str(request.url),
+                        "method": "POST",
+                        "body": {**search_body, "token": new_token},
+                    }
+                )
+    links.append({"rel": "root", "type": "application/json", "href": _stac_url(request, "get_stac_landing_page")})
+
+    async def _stream() -> AsyncIterator[bytes]:
+        yield b'{"type":"FeatureCollection","features":['
+        for i, document in enumerate(data_requests):
+            if i:
+                yield b","
+            yield to_json(_stac_api_item(request, document))
+        yield b'],"links":' + to_json(links) + b',"numberReturned":' + str(len(data_requests)).encode() + b"}"
+
+    return StreamingResponse(_stream(), media_type="application/geo+json")
+
+
+@stac_user_router.get("/")
+@stac_admin_router.get("/")
+async def get_stac_landing_page(request: Request) -> dict:
+    """Return the STAC API landing page."""
+    return {
+        "type": "Catalog",
+        "stac_version": "1.1.0",
+        "id": "marble-api",
+        "description": "STAC API for data requests",
+        "conformsTo": STAC_CONFORMANCE,
+        "links": [
+            {"rel": "self", "type": "application/json", "href": _stac_url(request, "get_stac_landing_page")},
+            {"rel": "root", "type": "application/json", "href": _stac_url(request, "get_stac_landing_page")},
+            {"rel": "conformance", "type": "application/json", "href": _stac_url(request, "get_stac_conformance")},
+            {"rel": "data", "type": "application/json", "href": _stac_url(request, "get_stac_collections")},
+            {
+                "rel": "child",
+                "type": "application/json",
+                "href": _stac_url(request, "get_stac_collection", collection_id=STAC_COLLECTION_ID),
+            },
+            {
+                "rel": "search",
+                "type": "application/geo+json",
+                "href": _stac_url(request, "get_stac_search"),
+                "method": "GET",
+            },
+            {
+                "rel": "search",
+                "type": "application/geo+json",
+                "href": _stac_url(request, "get_stac_search"),
+                "method": "POST",
+            },
+        ],
+    }
+
+
+@stac_user_router.get("/conformance")
+@stac_admin_router.get("/conformance")
+async def get_stac_conformance() -> dict:
+    """Return the STAC API conformance classes implemented by this API."""
+    return {"conformsTo": STAC_CONFORMANCE}
+
+
+@stac_user_router.get("/collections")
+@stac_admin_router.get("/collections")
+async def get_stac_collections(request: Request) -> dict:
+    """Return all STAC collections."""
+    return {
+        "collections": [_stac_collection(request)],
+        "links": [
+            {"rel": "self", "type": "application/json", "href": _stac_url(request, "get_stac_collections")},
+            {"rel": "root", "type": "application/json", "href": _stac_url(request, "get_stac_landing_page")},
+        ],
+    }
+
+
+@stac_user_router.get("/collections/{collection_id}")
+@stac_admin_router.get("/collections/{collection_id}")
+async def get_stac_collection(request: Request, collection_id: str) -> dict:
+    """Return the STAC collection with the given id."""
+    if collection_id != STAC_COLLECTION_ID:
+        raise HTTPException(status_code=404, detail=f"collection with id={collection_id} not found")
+    return _stac_collection(request)
+
+
+@stac_user_router.get("/collections/{collection_id}/items", response_class=StreamingResponse)
+@stac_admin_router.get("/collections/{collection_id}/items", response_class=StreamingResponse)
+async def get_stac_items(
+    request: Request,
+    collection_id: str,
+    bbox: str | None = None,
+    datetime: str | None = None,
+    limit: Annotated[int, Query(le=100, gt=0)] = 10,
+    token: str | None = None,
+    simplify: Annotated[float | None, Query(gt=0)] = None,
+    session: Annotated[AsyncClientSession | None, Depends(causal_session)] = None,
+) -> StreamingResponse:
+    """
+    Return the STAC items in the collection with the given id as an ItemCollection.
+
+    The bbox parameter is a comma separated list and the datetime parameter is a STAC datetime or interval (as
+    required by OGC API - Features). This response is paginated and will only return at most limit items at a time
+    (maximum 100). Follow the "next" and "prev" links to get other pages.
+    """
+    if collection_id != STAC_COLLECTION_ID:
+        raise HTTPException(status_code=404, detail=f"collection with id={collection_id} not found")
+    selector = _stac_search_selector(None, None, _parse_bbox(bbox), None, _parse_interval(datetime))
+    return await _stac_item_collection(request, selector, limit, token, simplify=simplify, session=session)
+
+
+@stac_user_router.get("/collections/{collection_id}/items/{item_id}")
+@stac_admin_router.get("/collections/{collection_id}/items/{item_id}")
+async def get_stac_collection_item(
+    request: Request,
+    collection_id: str,
+    item_id: str,
+    simplify: Annotated[float | None, Query(gt=0)] = None,
+    session: Annotated[AsyncClientSession | None, Depends(causal_session)] = None,
+) -> dict:
+    """Return the STAC item with the given id (with its geometry simplified with tolerance simplify if it is set)."""
+    if collection_id != STAC_COLLECTION_ID:
+        raise HTTPException(status_code=404, detail=f"collection with id={collection_id} not found")
+    selector = {"_id": _data_request_id(item_id)}
+    if _is_router_scope(request, stac_user_router):
+        selector["user"] = request.path_params["user"]
+    if (result := await _find_data_request(selector, stac=True, session=session)) is not None:
+        if simplify:
+            await _add_stac_items([result], partial=False, session=session)
+            result.pop("geometry", None)  # only the STAC item is returned
+            await _simplify_geometries(result, simplify)
+        return _stac_api_item(request, result)
+    raise HTTPException(status_code=404, detail=f"item with id={item_id} not found")
+
+
+def _stac_search_selector(
+    collections: list[str] | None,
+    ids: list[str] | None,
+    bbox: BBox | None,
+    intersects: Geometry | None,
+    interval: Interval | None,
+) -> dict | None:
+    """Return a selector for the STAC search parameters or None if the search cannot match any data requests."""
+    if collections is not None and STAC_COLLECTION_ID not in collections:
+        return None
+    selector = {}
+    if ids is not None:
+        selector["_id"] = {"$in": [ObjectId(id_) for id_ in ids if ObjectId.is_valid(id_)]}
+    if conditions := [*_spatial_conditions(bbox, intersects), *_temporal_conditions(interval)]:
+        selector["$and"] = conditions
+    return selector
+
+
+@stac_user_router.get("/search", response_class=StreamingResponse)
+@stac_admin_router.get("/search", response_class=StreamingResponse)
+async def get_stac_search(
+    request: Request,
+    collections: str | None = None,
+    ids: str | None = None,
+    bbox: str | None = None,
+    intersects: str | None = None,
+    datetime: str | None = None,
+    limit: Annotated[int, Query(le=100, gt=0)] = 10,
+    token: str | None = None,
+    simplify: Annotated[float | None, Query(gt=0)] = None,
+    session: Annotated[AsyncClientSession | None, Depends(causal_session)] = None,
+) -> StreamingResponse:
+    """
+    Search STAC items and return the results as an ItemCollection.
+
+    The collections, ids and bbox parameters are comma separated lists. The intersects parameter is a
+    GeoJSON geometry and the datetime parameter is a STAC datetime or interval. The simplify parameter
+    is the tolerance used to simplify the geometries of the items.
+    """
+    selector = _stac_search_selector(
+        collections and collections.split(","),
+        ids and ids.split(","),
+        _parse_bbox(bbox),
+        _parse_geometry(intersects),
+        _parse_interval(datetime),
+    )
+    return await _stac_item_collection(request, selector, limit, token, simplify=simplify, session=session)
+
+
+@stac_user_router.post("/search", response_class=StreamingResponse)
+@stac_admin_router.post("/search", response_class=StreamingResponse)
+async def post_stac_search(
+    request: Request,
+    search: StacSearch,
+    session: Annotated[AsyncClientSession | None, Depends(causal_session)] = None,
+) -> StreamingResponse:
+    """Search STAC items and return the results as an ItemCollection."""
+    selector = _stac_search_selector(
+        search.collections, search.ids, search.bbox, search.intersects, _parse_interval(search.datetime)
+    )
+    search_body = search.model_dump(mode="json", exclude_none=True, exclude={"token"})
+    return await _stac_item_collection(
+        request,
+        selector,
+        search.limit,
+        search.token,
+        search_body=search_body,
+        simplify=search.simplify,
+        session=session,
+    )
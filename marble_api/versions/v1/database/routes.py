@@ -0,0 +1,68 @@
+import os
+
+from fastapi import APIRouter, HTTPException
+
+from marble_api.database import client
+from marble_api.database.slow_queries import SlowQueryLog
+
+admin_router = APIRouter(prefix="/admin/database", tags=["Admin"])
+
+
+@admin_router.get("/pool")
+async def get_database_pool_stats() -> dict:
+    """
+    Return the options and usage counters of the database connection pools of the current process.
+
+    Each process (eg. each uvicorn worker) has its own connection pools so the maximum number of connections
+    to each server is max_pool_size multiplied by the number of processes.
+    """
+    pool_options = client.options.pool_options
+    return {
+        "pid": os.getpid(),
+        "options": {
+            "max_pool_size": pool_options.max_pool_size,
+            "min_pool_size": pool_options.min_pool_size,
+            "max_idle_time_seconds": pool_options.max_idle_time_seconds,
+            "wait_queue_timeout": pool_options.wait_queue_timeout,
+            "server_selection_timeout": client.options.server_selection_timeout,
+        },
+        "servers": client.pool_stats.stats(),
+    }
+
+
+def _slow_query_log() -> SlowQueryLog:
+    """Return the slow query log of the client (a 404 error is raised if it is disabled)."""
+    if client.slow_queries is None:
+        raise HTTPException(status_code=404, detail="the slow query log is disabled")
+    return client.slow_queries
+
+
+@admin_router.get("/slow-queries")
+async def get_slow_queries() -> dict:
+    """
+    Return the shapes of the slow database commands of the current process, slowest total duration first.
+
+    The shape of a command contains its name, collection and query (eg. the filter and sort of a find command)
+    with all values redacted. Use the id of a shape to get the explain plan of its first slow command.
+    """
+    slow_queries = _slow_query_log()
+    return {"pid": os.getpid(), "threshold_seconds": slow_queries.threshold, "queries": slow_queries.queries()}
+
+
+@admin_router.get("/slow-queries/{query_id}")
+async def get_slow_query(query_id: str) -> dict:
+    """
+    Return a slow query shape and the explain plan of its first slow command.
+
+    The explain plan is null until the command has been explained (or if explain is disabled). Note that the explain
+    plan may contain values of the first slow command (eg. in index bounds).
+    """
+    if (query := _slow_query_log().query(query_id)) is None:
+        raise HTTPException(status_code=404, detail=f"no slow query with id {query_id!r}")
+    return query
+
+
+@admin_router.delete("/slow-queries", status_code=204)
+async def delete_slow_queries() -> None:
+    """Remove all slow query shapes of the current process (eg. after adding an index)."""
+    _slow_query_log().clear()
@@ -0,0 +1,191 @@
+import json
+import os
+import timeit
+from pathlib import Path
+
+import pytest
+from faker import Faker
+
+BENCHMARK_DIR = Path(__file__).parent
+
+# Measured durations are compared with the durations stored in this file
+BASELINES_PATH = BENCHMARK_DIR / "baselines.json"
+
+# A benchmark fails if it is more than this fraction slower than its baseline
+REGRESSION_THRESHOLD = float(os.environ.get("MARBLE_API_BENCHMARK_THRESHOLD", 0.3))
+
+# If set, the baselines are replaced by the measured durations instead of being compared with them
+UPDATE_BASELINES = bool(os.environ.get("MARBLE_API_BENCHMARK_UPDATE_BASELINES"))
+
+# Each measurement runs the benchmarked function for at least this many seconds (and takes the best of REPEAT)
+MIN_DURATION = 0.05
+REPEAT = 5
+
+# Number of positions in each ring of the generated geometries (ragged rings have between half and 1.5 times this)
+RING_SIZE = 50
+
+
+def pytest_collection_modifyitems(items):
+    for item in items:
+        if item.path.is_relative_to(BENCHMARK_DIR):
+            item.add_marker(pytest.mark.benchmark)
+
+
+@pytest.fixture
+def fake(faker_providers) -> Faker:
+    """Faker seeded for each test so that each benchmark uses the same data whichever benchmarks are selected."""
+    fake_ = Faker()
+    fake_.add_provider(faker_providers["DataRequestProvider"])
+    fake_.add_provider(faker_providers["GeoJsonProvider"])
+    fake_.seed_instance(0)
+    return fake_
+
+
+@pytest.fixture(params=[10**2, 10**4, 10**5], ids=["1e2", "1e4", "1e5"])
+def n_points(request):
+    """Number of positions in the generated geometries (tests can override this with their own parametrization)."""
+    return request.param
+
+
+@pytest.fixture(params=["multi", "feature_collection", "ragged"])
+def nesting(request):
+    """
+    Structure of the generated geometry.
+
+    If nesting is "multi", this is a MultiPolygon with one ring per polygon. If nesting is "feature_collection", this
+    is a FeatureCollection with a Polygon feature for each ring (which must be collapsed to a MultiPolygon). If nesting
+    is "ragged", this is a MultiPolygon with rings of different lengths where every other polygon has a hole (like most
+    real world geometries) so its coordinates cannot be converted to a numpy array directly.
+    """
+    return request.param
+
+
+def _rings(fake, n_points, ragged=False):
+    """Return closed linear rings with about n_points positions in total."""
+    return [
+        [*(ring := [fake.point(2) for _ in range(size - 1)]), ring[0]]
+        for size in (
+            fake.random_int(RING_SIZE // 2, RING_SIZE * 3 // 2) if ragged else RING_SIZE
+            for _ in range(max(n_points // RING_SIZE, 1))
+        )
+    ]
+
+
+@pytest.fixture
+def rings(fake, n_points):
+    """Closed linear rings of RING_SIZE positions with n_points positions in total."""
+    return _rings(fake, n_points)
+
+
+@pytest.fixture
+def geometry(fake, n_points, nesting):
+    """Geojson (as a dict) with about n_points positions, structured as described by nesting."""
+    if nesting == "ragged":
+        rings_ = _rings(fake, n_points, ragged=True)
+        polygons = []
+        while rings_:
+            polygons.append([rings_.pop() for _ in range(min(1 + len(polygons) % 2, len(rings_)))])
+        return {"type": "MultiPolygon", "coordinates": polygons}
+    if nesting == "multi":
+        return {"type": "MultiPolygon", "coordinates": [[ring] for ring in _rings(fake, n_points)]}
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [ring]}, "properties": {}}
+            for ring in _rings(fake, n_points)
+        ],
+    }
+
+
+def measure(func):
+    """Return the best duration (in seconds) of a call to func."""
+    duration = timeit.timeit(func, number=1)
+    number = max(int(MIN_DURATION / max(duration, 1e-9)), 1)
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+
+
+def _calibration_workload():
+    return sum(i * i for i in range(10**5))
+
+
+@pytest.fixture(scope="session")
+def calibration():
+    """
+    Duration of a fixed pure python workload on the current machine.
+
+    Durations are stored relative to this so that baselines recorded on one machine can be compared with
+    durations measured on another (faster or slower) machine.
+    """
+    return measure(_calibration_workload)
+
+
+@pytest.fixture(scope="session")
+def baselines(calibration):
+    baselines_ = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {"benchmarks": {}}
+    yield baselines_
+    if UPDATE_BASELINES:
+        baselines_["calibration_seconds"] = calibration
+        baselines_["benchmarks"] = dict(sorted(baselines_["benchmarks"].items()))
+        BASELINES_PATH.write_text(json.dumps(baselines_, indent=2) + "\n")
+
+
+def pytest_terminal_summary(terminalreporter):
+    results = [
+        value
+        for reports in terminalreporter.stats.values()
+        for report in reports
+        if getattr(report, "when", None) == "call"
+        for name, value in report.user_properties
+        if name == "benchmark"
+    ]
+    if results:
+        terminalreporter.section("benchmarks")
+        for result in results:
+            terminalreporter.write_line(result)
+
+
+@pytest.fixture
+def benchmark_report(record_property):
+    """
+    Return a function that records a benchmark result of the current test.
+
+    Results are shown in the "benchmarks" section of the terminal summary (and in the properties of the test in
+    junit xml reports).
+    """
+
+    def report(result: str) -> None:
+        record_property("benchmark", result)
+
+    return report
+
+
+@pytest.fixture
+def benchmark_baseline(request, baselines, calibration, benchmark_report):
+    """
+    Return a function that measures a function and compares its duration with the baseline of the current test.
+
+    The test fails if the duration (relative to the calibration workload) is more than REGRESSION_THRESHOLD slower
+    than the baseline. Tests without a baseline never fail. If MARBLE_API_BENCHMARK_UPDATE_BASELINES is set, the
+    baseline is replaced by the measured duration instead. The duration is recorded with benchmark_report.
+    """
+    key = f"{request.path.relative_to(BENCHMARK_DIR).as_posix()}::{request.node.name}"
+
+    def check(func):
+        seconds = measure(func)
+        relative = seconds / calibration
+        baseline = baselines["benchmarks"].get(key)
+        result = f"{key}: {seconds:.6f}s ({relative:.3f}x calibration)"
+        if UPDATE_BASELINES:
+            baselines["benchmarks"][key] = {"seconds": seconds, "relative": relative}
+            benchmark_report(f"{result} new baseline")
+        elif baseline is None:
+            benchmark_report(f"{result} no baseline")
+        else:
+            change = relative / baseline["relative"] - 1
+            benchmark_report(f"{result} {change:+.1%} compared to baseline")
+            assert change <= REGRESSION_THRESHOLD, (
+                f"{key} is {change:.1%} slower than its baseline (threshold: {REGRESSION_THRESHOLD:.0%})"
+            )
+        return seconds
+
+    return check
@@ -0,0 +1,362 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+from faker import Faker
+
+# Operations that can be replayed: the method and route template of each one (used to label the results)
+ROUTES = {
+    "post": ("POST", "/v1/users/{user}/data-requests/"),
+    "get": ("GET", "/v1/users/{user}/data-requests/{request_id}"),
+    "patch": ("PATCH", "/v1/users/{user}/data-requests/{request_id}"),
+    "delete": ("DELETE", "/v1/users/{user}/data-requests/{request_id}"),
+    "list": ("GET", "/v1/users/{user}/data-requests/"),
+    "list_stac": ("GET", "/v1/users/{user}/data-requests/?stac=true"),
+}
+
+DEFAULT_MIX = "post=1,get=4,patch=1,delete=1,list=2,list_stac=1"
+
+PERCENTILES = (50, 95, 99)
+
+# Number of data requests created (and deleted) at a time when the data is seeded (and cleaned up)
+_BULK_SIZE = 100
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """Return the weight of each operation in a mix formatted as "<operation>=<weight>,..."."""
+    weights = {}
+    for item in mix.split(","):
+        operation, _, weight = item.partition("=")
+        if (operation := operation.strip()) not in ROUTES:
+            raise ValueError(f"unknown operation {operation!r}, operations are {list(ROUTES)}")
+        weights[operation] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """Return the nearest-rank percentile of sorted_values."""
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+def fake_data_requests(n: int, seed: int) -> list[dict]:
+    """Return n JSON compatible data requests (without a user) generated by the faker providers."""
+    from faker_providers import DataRequestProvider
+
+    fake = Faker()
+    fake.add_provider(DataRequestProvider)
+    fake.seed_instance(seed)
+    return [json.loads(fake.data_request().model_dump_json(exclude=["user"])) for _ in range(n)]
+
+
+class LoadDriver:
+    """
+    Replay a mix of data request operations against the API and record the latency of each request.
+
+    Requests are sent with http (an httpx client for the API) on behalf of users. The data requests that are
+    created are tracked so that they can be read, updated and deleted by later operations and deleted by cleanup.
+    Requests that fail with a 5xx status code or that raise an error (eg. a timeout) are counted as errors.
+    """
+
+    def __init__(
+        self, http: httpx.AsyncClient, mix: dict[str, float], bodies: list[dict], users: list[str], seed: int = 0
+    ) -> None:
+        self.http = http
+        self.operations, self.weights = list(mix), list(mix.values())
+        self.bodies = bodies
+        self.users = users
+        self.random = random.Random(seed)
+        self.ids: list[tuple[str, str]] = []
+        self.created: set[tuple[str, str]] = set()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: dict[str, int] = defaultdict(int)
+        self.dropped = 0
+
+    async def seed(self, n: int) -> None:
+        """Create n data requests (spread across all users) before the load is replayed."""
+        for start in range(0, n, _BULK_SIZE):
+            user = self.users[(start // _BULK_SIZE) % len(self.users)]
+            bodies = [self.random.choice(self.bodies) for _ in range(min(_BULK_SIZE, n - start))]
+            response = await self.http.post(f"/v1/users/{user}/data-requests/bulk", json=bodies)
+            response.raise_for_status()
+            self._add_ids(user, (result["id"] for result in response.json()["results"] if result["id"]))
+
+    async def cleanup(self) -> None:
+        """Delete all data requests that were created by this driver (and that were not deleted by the load)."""
+        ids = [id_ for _, id_ in self.created]
+        for start in range(0, len(ids), _BULK_SIZE):
+            response = await self.http.post(
+                "/v1/admin/data-requests/bulk/delete", json={"ids": ids[start : start + _BULK_SIZE]}
+            )
+            response.raise_for_status()
+        self.created.clear()
+
+    async def run_concurrency(self, concurrency: int, duration: float) -> float:
+        """
+        Send requests from concurrency workers, each of which sends its next request as soon as it gets a response.
+
+        Return the number of seconds that the load ran for.
+        """
+        start = time.perf_counter()
+        end = start + duration
+
+        async def _worker() -> None:
+            while time.perf_counter() < end:
+                await self.request(self._choose())
+
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    async def run_rate(self, rate: float, duration: float, max_in_flight: int = 1000) -> float:
+        """
+        Start rate requests per second, whether or not the previous requests got a response.
+
+        Latencies are measured from the time that each request was scheduled to start so that they include the
+        time spent waiting if the API (or this driver) cannot keep up. Requests that would exceed max_in_flight
+        concurrent requests are dropped (and counted). Return the number of seconds that the load ran for.
+        """
+        tasks = set()
+        start = time.perf_counter()
+        for i in range(int(rate * duration)):
+            scheduled = start + i / rate
+            await asyncio.sleep(max(scheduled - time.perf_counter(), 0))
+            if len(tasks) >= max_in_flight:
+                self.dropped += 1
+                continue
+            task = asyncio.create_task(self.request(self._choose(), scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    def _choose(self) -> str:
+        return self.random.choices(self.operations, self.weights)[0]
+
+    def _add_ids(self, user: str, ids: Iterable[str]) -> None:
+        for id_ in ids:
+            self.ids.append((user, id_))
+            self.created.add((user, id_))
+
+    def _pop_id(self) -> tuple[str, str]:
+        """Remove a random id from the ids (so that it is not used by other requests) and return it."""
+        index = self.random.randrange(len(self.ids))
+        self.ids[index], self.ids[-1] = self.ids[-1], self.ids[index]
+        return self.ids.pop()
+
+    async def request(self, operation: str, scheduled: float | None = None) -> None:
+        """
+        Send one request for operation and record its latency and status code.
+
+        Operations on a single data request are replaced by "post" if there are no data requests left.
+        """
+        start = time.perf_counter() if scheduled is None else scheduled
+        if operation in ("get", "patch", "delete") and not self.ids:
+            operation = "post"
+        route = " ".join(ROUTES[operation])
+        if operation == "delete":
+            user, id_ = self._pop_id()
+        elif operation in ("get", "patch"):
+            user, id_ = self.random.choice(self.ids)
+        else:
+            user, id_ = self.random.choice(self.users), None
+        try:
+            if operation == "post":
+                response = await self.http.post(
+                    f"/v1/users/{user}/data-requests/", json=self.random.choice(self.bodies)
+                )
+            elif operation == "get":
+                response = await self.http.get(f"/v1/users/{user}/data-requests/{id_}")
+            elif operation == "patch":
+                response = await self.http.patch(
+                    f"/v1/users/{user}/data-requests/{id_}", json={"title": f"title {self.random.random()}"}
+                )
+            elif operation == "delete":
+                response = await self.http.delete(f"/v1/users/{user}/data-requests/{id_}")
+            else:
+                response = await self.http.get(
+                    f"/v1/users/{user}/data-requests/", params={"stac": "true"} if operation == "list_stac" else {}
+                )
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            self.latencies[route].append(time.perf_counter() - start)
+            return
+        self.latencies[route].append(time.perf_counter() - start)
+        self.statuses[route][response.status_code] += 1
+        if response.status_code >= 500:
+            self.errors[route] += 1
+        elif operation == "post" and response.status_code < 400:
+            self._add_ids(user, [response.json()["id"]])
+        elif operation == "delete" and response.status_code < 400:
+            self.created.discard((user, id_))
+
+    def report(self, elapsed: float) -> dict:
+        """Return the throughput and latency percentiles of each route after the load ran for elapsed seconds."""
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            routes[route] = {
+                "requests": len(latencies),
+                "errors": self.errors[route],
+                "statuses": {str(status): count for status, count in sorted(self.statuses[route].items())},
+                "throughput": len(latencies) / elapsed,
+                **{f"p{p}_ms": percentile(latencies, p) * 1000 for p in PERCENTILES},
+            }
+        requests = sum(route["requests"] for route in routes.values())
+        return {
+            "seconds": elapsed,
+            "requests": requests,
+            "errors": sum(route["errors"] for route in routes.values()),
+            "dropped": self.dropped,
+            "throughput": requests / elapsed,
+            "routes": routes,
+        }
+
+
+def format_report(report: dict) -> str:
+    """Return the report as a table."""
+    lines = [
+        f"{report['requests']} requests in {report['seconds']:.1f}s ({report['throughput']:.1f} requests/s), "
+        f"{report['errors']} errors, {report['dropped']} dropped",
+        f"{'route':<56} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}",
+    ]
+    for route, stats in report["routes"].items():
+        lines.append(
+            f"{route:<56} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput']:>8.1f} "
+            f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def asgi_client(timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield a client that calls the application in this process (after running its startup tasks)."""
+    from marble_api import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=timeout) as http:
+            yield http
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int, timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield a client for the application served by uvicorn (with workers processes) on a local socket."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "marble_api:app", "--host", "127.0.0.1", "--port", str(port)]
+        + ["--workers", str(workers), "--log-level", "warning"]
+    )
+    try:
+        async with url_client(f"http://127.0.0.1:{port}", timeout) as http:
+            for _ in range(300):
+                try:
+                    (await http.get("/")).raise_for_status()
+                    break
+                except httpx.HTTPError:
+                    if server.poll() is not None:
+                        raise RuntimeError("uvicorn exited before it started serving requests")
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start serving requests within 30 seconds")
+            yield http
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@asynccontextmanager
+async def url_client(url: str, timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield a client for an application that is already served at url."""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as http:
+        yield http
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Seed data, replay the load described by args, clean up and return the report."""
+    mix = parse_mix(args.mix)
+    bodies = fake_data_requests(args.bodies, args.random_seed)
+    fake = Faker()
+    fake.seed_instance(args.random_seed)
+    users = [f"load-{fake.user_name()}" for _ in range(args.users)]
+    if args.url:
+        http_client = url_client(args.url, args.timeout)
+    elif args.transport == "uvicorn":
+        http_client = uvicorn_client(args.workers, args.timeout)
+    else:
+        http_client = asgi_client(args.timeout)
+    async with http_client as http:
+        driver = LoadDriver(http, mix, bodies, users, seed=args.random_seed)
+        await driver.seed(args.seed_count)
+        try:
+            if args.rate:
+                elapsed = await driver.run_rate(args.rate, args.duration, args.max_in_flight)
+            else:
+                elapsed = await driver.run_concurrency(args.concurrency, args.duration)
+        finally:
+            if not args.keep_data:
+                await driver.cleanup()
+    return driver.report(elapsed)
+
+
+def parser() -> argparse.ArgumentParser:
+    """Return the command line parser of the load driver."""
+    parser_ = argparse.ArgumentParser(
+        description="Replay a mix of data request operations against the API and report the throughput and "
+        "latency percentiles of each route. The API uses the database at MONGODB_URI."
+    )
+    parser_.add_argument(
+        "--transport",
+        choices=("asgi", "uvicorn"),
+        default="asgi",
+        help="call the application in this process (asgi) or serve it with uvicorn on a local socket",
+    )
+    parser_.add_argument("--url", help="URL of an API that is already running (overrides --transport)")
+    parser_.add_argument("--workers", type=int, default=1, help="number of uvicorn workers")
+    load = parser_.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=16, help="number of concurrent requests")
+    load.add_argument("--rate", type=float, help="number of requests started per second (instead of --concurrency)")
+    parser_.add_argument("--max-in-flight", type=int, default=1000, help="maximum concurrent requests with --rate")
+    parser_.add_argument("--duration", type=float, default=30, help="number of seconds to replay the load for")
+    parser_.add_argument("--mix", default=DEFAULT_MIX, help=f"weight of each operation (default: {DEFAULT_MIX})")
+    parser_.add_argument("--seed-count", type=int, default=1000, help="number of data requests created beforehand")
+    parser_.add_argument("--users", type=int, default=10, help="number of users that send requests")
+    parser_.add_argument("--bodies", type=int, default=100, help="number of distinct data requests that are posted")
+    parser_.add_argument("--random-seed", type=int, default=0, help="seed of the generated data and operations")
+    parser_.add_argument("--timeout", type=float, default=30, help="timeout (in seconds) of each request")
+    parser_.add_argument("--keep-data", action="store_true", help="do not delete the data requests that were created")
+    parser_.add_argument("--output", type=Path, help="also write the report to this file as JSON")
+    return parser_
+
+
+def main() -> None:
+    """Run the load driver from the command line."""
+    args = parser().parse_args()
+    report = asyncio.run(run(args))
+    print(format_report(report))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    # faker_providers is in the test directory
+    sys.path.insert(0, os.fspath(Path(__file__).parents[2]))
+    main()
@@ -0,0 +1,62 @@
+import functools
+
+import httpx
+import pytest
+from load_driver import DEFAULT_MIX, ROUTES, LoadDriver, fake_data_requests, format_report, parse_mix, percentile
+from pymongo.errors import PyMongoError
+
+from marble_api import app
+from marble_api.database import client
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def benchmark_db(monkeypatch):
+    monkeypatch.setattr(
+        client, "get_default_database", functools.partial(client.get_default_database, default="marble-api-benchmark")
+    )
+    try:
+        await client.db.command("ping")
+    except PyMongoError as e:
+        pytest.skip(f"MongoDB server is not available: {e}")
+    try:
+        yield client.db
+    finally:
+        await client.drop_database(client.db.name)
+
+
+@pytest.fixture
+async def driver(benchmark_db):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        driver_ = LoadDriver(http, parse_mix(DEFAULT_MIX), fake_data_requests(10, seed=0), ["user1", "user2"])
+        await driver_.seed(20)
+        yield driver_
+
+
+def test_parse_mix():
+    assert parse_mix("get=4,post") == {"get": 4.0, "post": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("unknown=1")
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert [percentile(values, p) for p in (50, 95, 99, 100)] == [50, 95, 99, 100]
+
+
+async def test_concurrency(driver, benchmark_db, benchmark_report):
+    report = driver.report(await driver.run_concurrency(4, duration=2))
+    benchmark_report(format_report(report))
+    assert report["errors"] == 0
+    assert set(report["routes"]) == {" ".join(route) for route in ROUTES.values()}
+    await driver.cleanup()
+    assert await benchmark_db["data-request"].count_documents({}) == 0
+
+
+async def test_rate(driver, benchmark_report):
+    report = driver.report(await driver.run_rate(50, duration=2))
+    benchmark_report(format_report(report))
+    assert report["errors"] == 0
+    assert report["requests"] + report["dropped"] == 100
+    await driver.cleanup()
@@ -0,0 +1,95 @@
+import json
+import math
+import timeit
+from itertools import zip_longest
+
+import pytest
+
+from marble_api.utils.geojson import _coordinates_to_points, bbox_from_coordinates, simplify_geometry
+
+
+def iterative_bbox_from_coordinates(coordinates):
+    """Pure python implementation of bbox_from_coordinates used prior to the vectorized version."""
+    min_max = []
+    for values in zip_longest(*_coordinates_to_points(coordinates)):
+        real_values = [v or 0 for v in values]
+        min_max.append((min(real_values), max(real_values)))
+    return [v for val in min_max for v in val]
+
+
+def multipolygon_coordinates(fake, n_points, dimensions, ragged):
+    """
+    Return MultiPolygon coordinates with about n_points positions in rings of 1000 positions.
+
+    If ragged, the rings have between 500 and 1500 positions instead and every other polygon has a hole (like most
+    real world geometries) so the coordinates cannot be converted to a numpy array directly.
+    """
+    polygons = []
+    while sum(len(ring) for polygon in polygons for ring in polygon) < n_points:
+        ring_sizes = [fake.random_int(500, 1500)] * (1 + len(polygons) % 2) if ragged else [1000]
+        polygons.append([[fake.point(dimensions) for _ in range(size)] for size in ring_sizes])
+    return polygons
+
+
+@pytest.mark.parametrize("ragged", [False, True], ids=["uniform", "ragged"])
+@pytest.mark.parametrize("dimensions", [2, 3])
+@pytest.mark.parametrize("n_points", [10**3, 10**5, 10**6], ids=["1e3", "1e5", "1e6"])
+def test_bbox_from_coordinates(fake, n_points, dimensions, ragged, benchmark_report):
+    coordinates = multipolygon_coordinates(fake, n_points, dimensions, ragged)
+    assert bbox_from_coordinates(coordinates) == iterative_bbox_from_coordinates(coordinates)
+    number = max(10**5 // n_points, 1)
+    iterative = min(timeit.repeat(lambda: iterative_bbox_from_coordinates(coordinates), number=number, repeat=3))
+    vectorized = min(timeit.repeat(lambda: bbox_from_coordinates(coordinates), number=number, repeat=3))
+    benchmark_report(
+        f"bbox_from_coordinates ({n_points} points, {dimensions}D, {'ragged' if ragged else 'uniform'}): "
+        f"iterative={iterative / number:.6f}s vectorized={vectorized / number:.6f}s "
+        f"speedup={iterative / vectorized:.1f}x"
+    )
+    if n_points >= 10**4:
+        assert vectorized < iterative
+
+
+def iterative_simplify_line(positions, tolerance):
+    """Pure python recursive Douglas-Peucker implementation used to check the vectorized version."""
+
+    def distance(position, start, end):
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        px, py = position[0] - start[0], position[1] - start[1]
+        if squared_length := dx * dx + dy * dy:
+            t = min(max((px * dx + py * dy) / squared_length, 0), 1)
+            px, py = px - t * dx, py - t * dy
+        return math.hypot(px, py)
+
+    if len(positions) < 3:
+        return positions
+    distances = [distance(p, positions[0], positions[-1]) for p in positions[1:-1]]
+    index = max(range(len(distances)), key=distances.__getitem__)
+    if distances[index] <= tolerance:
+        return [positions[0], positions[-1]]
+    left = iterative_simplify_line(positions[: index + 2], tolerance)
+    return left[:-1] + iterative_simplify_line(positions[index + 1 :], tolerance)
+
+
+def wiggly_line(n_points):
+    return [[360 * i / n_points - 180, 10 * math.sin(i / 50) + math.sin(i)] for i in range(n_points)]
+
+
+@pytest.mark.parametrize("n_points", [10**3, 10**4], ids=["1e3", "1e4"])
+def test_simplify_geometry(n_points, benchmark_report):
+    tolerance = 0.1
+    line = {"type": "LineString", "coordinates": wiggly_line(n_points)}
+    simplified = simplify_geometry(line, tolerance)
+    assert simplified["coordinates"] == iterative_simplify_line(line["coordinates"], tolerance)
+    number = max(10**3 // n_points, 1)
+    iterative = min(
+        timeit.repeat(lambda: iterative_simplify_line(line["coordinates"], tolerance), number=number, repeat=3)
+    )
+    vectorized = min(timeit.repeat(lambda: simplify_geometry(line, tolerance), number=number, repeat=3))
+    benchmark_report(
+        f"simplify_geometry ({n_points} points, tolerance={tolerance}): "
+        f"iterative={iterative / number:.6f}s vectorized={vectorized / number:.6f}s "
+        f"speedup={iterative / vectorized:.1f}x "
+        f"size={len(json.dumps(line))}B simplified size={len(json.dumps(simplified))}B"
+    )
+    if n_points >= 10**4:
+        assert vectorized < iterative
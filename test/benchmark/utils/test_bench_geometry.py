@@ -0,0 +1,26 @@
+from geojson_pydantic import FeatureCollection, MultiPolygon
+
+from marble_api.utils.geojson import bbox_from_coordinates, collapse_geometries, validate_collapsible
+
+
+def geojson(geometry):
+    """Return geometry (a MultiPolygon or a FeatureCollection as a dict) as a geojson model."""
+    if geometry["type"] == "FeatureCollection":
+        return FeatureCollection.model_validate(geometry)
+    return MultiPolygon.model_validate(geometry)
+
+
+def test_validate_collapsible(benchmark_baseline, geometry):
+    geojson_ = geojson(geometry)
+    benchmark_baseline(lambda: validate_collapsible(geojson_))
+
+
+def test_collapse_geometries(benchmark_baseline, geometry):
+    geojson_ = geojson(geometry)
+    assert collapse_geometries(geojson_).type == "MultiPolygon"
+    benchmark_baseline(lambda: collapse_geometries(geojson_))
+
+
+def test_bbox_from_coordinates(benchmark_baseline, rings):
+    coordinates = [[ring] for ring in rings]
+    benchmark_baseline(lambda: bbox_from_coordinates(coordinates))
@@ -0,0 +1,28 @@
+import json
+
+import bson
+import pytest
+
+from marble_api.versions.v1.data_request.models import DataRequest, DataRequestPublic
+
+
+@pytest.fixture
+def data_request_inputs(fake, geometry):
+    """JSON compatible inputs of a data request (as sent to the API) with the generated geometry."""
+    request = fake.data_request_public(id=str(bson.ObjectId()), geometry=geometry)
+    return json.loads(request.model_dump_json(exclude={"id"}))
+
+
+def test_model_validate(benchmark_baseline, data_request_inputs):
+    benchmark_baseline(lambda: DataRequest.model_validate(data_request_inputs))
+
+
+def test_model_dump(benchmark_baseline, data_request_inputs):
+    data_request = DataRequest.model_validate(data_request_inputs)
+    benchmark_baseline(lambda: data_request.model_dump())
+
+
+def test_stac_item(benchmark_baseline, data_request_inputs):
+    data_request = DataRequestPublic.model_validate({**data_request_inputs, "id": "1"})
+    assert data_request.stac_item["geometry"]["type"] == "MultiPolygon"
+    benchmark_baseline(lambda: data_request.stac_item)
@@ -0,0 +1,40 @@
+import json
+import timeit
+
+import bson
+import pytest
+from pydantic_core import to_json
+
+from marble_api.versions.v1.data_request.models import DataRequestPublic
+
+
+def data_request_document(fake, n_points):
+    ring_size = 1000
+    geometry = {
+        "type": "MultiPolygon",
+        "coordinates": [
+            [[*(point := [fake.point(2) for _ in range(ring_size - 1)]), point[0]]]
+            for _ in range(max(n_points // ring_size, 1))
+        ],
+    }
+    request = fake.data_request_public(id=str(bson.ObjectId()), geometry=geometry)
+    document = json.loads(request.model_dump_json(exclude={"id"}))
+    document["_id"] = bson.ObjectId(request.id)
+    return document
+
+
+@pytest.mark.parametrize("n_points", [10**3, 10**5], ids=["1e3", "1e5"])
+def test_serialize_trusted(fake, n_points, benchmark_report):
+    document = data_request_document(fake, n_points)
+    expected = json.loads(DataRequestPublic(**document).model_dump_json())
+    assert json.loads(to_json(DataRequestPublic.serialize_trusted(document))) == expected
+    number = max(10**4 // n_points, 1)
+    validated = min(timeit.repeat(lambda: DataRequestPublic(**document).model_dump_json(), number=number, repeat=3))
+    trusted = min(
+        timeit.repeat(lambda: to_json(DataRequestPublic.serialize_trusted(document)), number=number, repeat=3)
+    )
+    benchmark_report(
+        f"data request serialization ({n_points} points): "
+        f"validated={validated / number:.6f}s trusted={trusted / number:.6f}s speedup={validated / trusted:.1f}x"
+    )
+    assert trusted < validated
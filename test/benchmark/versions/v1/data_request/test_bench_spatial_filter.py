@@ -0,0 +1,62 @@
+import os
+import timeit
+
+import numpy as np
+import pymongo
+import pytest
+from pymongo.errors import PyMongoError
+
+from marble_api.utils.geojson import bbox_to_geometries
+from marble_api.versions.v1.data_request.indexes import INDEXES
+from marble_api.versions.v1.data_request.routes import _spatial_conditions
+
+N_DATA_REQUESTS = int(os.environ.get("MARBLE_API_BENCHMARK_DATA_REQUESTS", 10**6))
+
+
+@pytest.fixture(scope="module")
+def collection():
+    client = pymongo.MongoClient(os.environ["MONGODB_URI"], serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        pytest.skip(f"MongoDB server is not available: {e}")
+    collection = client["marble-api-benchmark"]["data-request"]
+    collection.drop()
+    rng = np.random.default_rng(0)
+    batch_size = 10**5
+    for start in range(0, N_DATA_REQUESTS, batch_size):
+        size = min(batch_size, N_DATA_REQUESTS - start)
+        lon = rng.uniform(-180, 180, size)
+        lat = rng.uniform(-90, 90, size)
+        collection.insert_many(
+            [
+                {"user": f"user{i % 100}", "footprint": {"type": "Point", "coordinates": [x, y]}}
+                for i, x, y in zip(range(start, start + size), lon.tolist(), lat.tolist())
+            ]
+        )
+    collection.create_indexes(INDEXES["data-request"])
+    try:
+        yield collection
+    finally:
+        client.drop_database("marble-api-benchmark")
+        client.close()
+
+
+@pytest.mark.parametrize("bbox", [[-75, 45, -73, 46], [170, -10, -170, 10]], ids=["small", "antimeridian"])
+def test_bbox_filter(collection, bbox, benchmark_report):
+    selector = {"$and": _spatial_conditions(bbox, None)}
+    indexed_ids = [doc["_id"] for doc in collection.find(selector, {"_id": True}).sort("_id")]
+    scanned_ids = [doc["_id"] for doc in collection.find(selector, {"_id": True}).sort("_id").hint([("$natural", 1)])]
+    assert indexed_ids == scanned_ids
+    indexed = min(timeit.repeat(lambda: list(collection.find(selector, {"_id": True})), number=1, repeat=3))
+    scanned = min(
+        timeit.repeat(
+            lambda: list(collection.find(selector, {"_id": True}).hint([("$natural", 1)])), number=1, repeat=3
+        )
+    )
+    benchmark_report(
+        f"bbox filter {bbox} ({N_DATA_REQUESTS} data requests, {len(bbox_to_geometries(bbox))} geometries, "
+        f"{len(indexed_ids)} matches): indexed={indexed:.6f}s collection scan={scanned:.6f}s "
+        f"speedup={scanned / indexed:.1f}x"
+    )
+    assert indexed < scanned
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from marble_api.database import client
+from marble_api.database.backfills import BACKFILL_COLLECTION, backfill_name, run_once
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def backfill():
+    async def backfill_():
+        backfill_.calls += 1
+        if backfill_.error is not None:
+            raise backfill_.error
+
+    backfill_.calls = 0
+    backfill_.error = None
+    return backfill_
+
+
+async def _document(backfill):
+    return await client.db[BACKFILL_COLLECTION].find_one({"_id": backfill_name(backfill)})
+
+
+async def test_run(backfill):
+    assert await run_once(client.db, backfill, lease_seconds=60)
+    assert backfill.calls == 1
+    assert (await _document(backfill))["completed"] is not None
+
+
+async def test_run_once(backfill):
+    await run_once(client.db, backfill, lease_seconds=60)
+    assert not await run_once(client.db, backfill, lease_seconds=60)
+    assert backfill.calls == 1
+
+
+async def test_run_again_if_deleted(backfill):
+    await run_once(client.db, backfill, lease_seconds=60)
+    await client.db[BACKFILL_COLLECTION].delete_one({"_id": backfill_name(backfill)})
+    assert await run_once(client.db, backfill, lease_seconds=60)
+    assert backfill.calls == 2
+
+
+async def test_not_run_if_claimed(backfill):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    await client.db[BACKFILL_COLLECTION].insert_one({"_id": backfill_name(backfill), "completed": None, "claimed": now})
+    assert not await run_once(client.db, backfill, lease_seconds=60)
+    assert backfill.calls == 0
+
+
+async def test_run_if_claim_expired(backfill):
+    claimed = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=120)
+    await client.db[BACKFILL_COLLECTION].insert_one(
+        {"_id": backfill_name(backfill), "completed": None, "claimed": claimed}
+    )
+    assert await run_once(client.db, backfill, lease_seconds=60)
+    assert backfill.calls == 1
+
+
+async def test_error_releases_claim(backfill):
+    backfill.error = RuntimeError("backfill failed")
+    with pytest.raises(RuntimeError):
+        await run_once(client.db, backfill, lease_seconds=60)
+    backfill.error = None
+    assert await run_once(client.db, backfill, lease_seconds=60)
+    assert backfill.calls == 2
@@ -0,0 +1,31 @@
+import pytest
+
+from marble_api.app import VERSIONS
+from marble_api.database import client
+from marble_api.database.indexes import merge_indexes, reconcile_indexes
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def indexes():
+    return merge_indexes(*(version_app.state.indexes for _, version_app in VERSIONS))
+
+
+async def test_reconcile_creates_declared_indexes(indexes):
+    await reconcile_indexes(client.db, indexes)
+    for collection_name, declared in indexes.items():
+        existing = await client.db[collection_name].index_information()
+        assert {model.document["name"] for model in declared} <= set(existing)
+
+
+async def test_reconcile_is_idempotent(indexes):
+    await reconcile_indexes(client.db, indexes)
+    diffs = await reconcile_indexes(client.db, indexes)
+    assert all(not diff["create"] and not diff["drop"] for diff in diffs.values())
+
+
+async def test_dry_run_does_not_create(indexes):
+    await reconcile_indexes(client.db, indexes, dry_run=True)
+    for collection_name in indexes:
+        assert set(await client.db[collection_name].index_information()) <= {"_id_"}
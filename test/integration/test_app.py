@@ -1,6 +1,9 @@
 import pytest
+from prometheus_client import CollectorRegistry
 
 from marble_api.app import VERSIONS
+from marble_api.utils import metrics as metrics_module
+from marble_api.utils.metrics import Metrics
 
 pytestmark = [pytest.mark.anyio, pytest.mark.no_db_cleanup]
 
@@ -14,3 +17,27 @@ async def test_version_roots_in_root(async_client):
     resp = await async_client.get("/")
     for version, _ in VERSIONS:
         assert {"methods": ["GET"], "path": f"{version}/"} in resp.json()["routes"]
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics_ = Metrics(registry=CollectorRegistry())
+    monkeypatch.setattr(metrics_module, "metrics", metrics_)
+    return metrics_
+
+
+async def test_metrics_disabled(async_client, monkeypatch):
+    monkeypatch.setattr(metrics_module, "metrics", None)
+    resp = await async_client.get("/metrics")
+    assert resp.status_code == 404
+
+
+async def test_metrics_not_listed(async_client):
+    resp = await async_client.get("/")
+    assert "/metrics" not in [route["path"] for route in resp.json()["routes"]]
+
+
+async def test_metrics_enabled(async_client, metrics):
+    await async_client.get("/")
+    resp = await async_client.get("/metrics")
+    assert 'marble_api_http_request_duration_seconds_count{method="GET",route="/",status="200"} 1.0' in resp.text
@@ -1,12 +1,30 @@
+import datetime
+import gzip
 import inspect
 import json
+import math
 from urllib.parse import parse_qs, urlparse
 
 import bson
 import pytest
+from geojson_pydantic import Point
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import CollectorRegistry
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import SecondaryPreferred
 from stac_pydantic import Item
+from starlette.middleware.base import BaseHTTPMiddleware
 
+from marble_api import app, database
 from marble_api.database import client
+from marble_api.database.indexes import reconcile_indexes
+from marble_api.database.sessions import OPERATION_TIME_HEADER, add_operation_time, parse_operation_time
+from marble_api.utils import metrics as metrics_module
+from marble_api.utils.cache import DocumentCache, LocalSharedCache
+from marble_api.utils.geojson import GeometrySummary
+from marble_api.utils.metrics import Metrics
+from marble_api.versions.v1.data_request import models, routes
+from marble_api.versions.v1.data_request.indexes import INDEXES
 from marble_api.versions.v1.data_request.models import DataRequestPublic
 from marble_api.versions.v1.data_request.routes import get_data_requests
 
@@ -75,6 +93,33 @@ class _TestGetOne(_TestGet):
         resp = await async_client.get(invalid_route)
         assert resp.status_code == 404
 
+    async def test_get_fields(self, async_client, data_requests, member_route):
+        resp = await async_client.get(f"{member_route}?fields=title,authors")
+        assert resp.status_code == 200
+        expected = DataRequestPublic(**data_requests[0]).model_dump(mode="json", include={"id", "title", "authors"})
+        assert resp.json() == expected
+
+    async def test_get_exclude(self, async_client, data_requests, member_route):
+        resp = await async_client.get(f"{member_route}?exclude=geometry,links")
+        assert resp.status_code == 200
+        expected = DataRequestPublic(**data_requests[0]).model_dump(mode="json", exclude={"geometry", "links"})
+        assert resp.json() == expected
+
+    async def test_get_fields_stac(self, async_client, member_route):
+        resp = await async_client.get(f"{member_route}?fields=title&stac=true")
+        assert resp.status_code == 200
+        assert set(resp.json()) == {"id", "title", "stac_item"}
+        Item(**resp.json()["stac_item"])
+
+    async def test_exists(self, async_client, data_requests, member_route):
+        resp = await async_client.get(f"{member_route}?fields=id")
+        assert resp.status_code == 200
+        assert resp.json() == {"id": str(data_requests[0]["_id"])}
+
+    async def test_unknown_field(self, async_client, member_route):
+        resp = await async_client.get(f"{member_route}?fields=title,footprint")
+        assert resp.status_code == 422
+
 
 @pytest.mark.no_db_cleanup
 class TestGetOneUser(_TestGetOne, _TestUser):
@@ -105,6 +150,36 @@ class _TestGetMany(_TestGet):
             assert (item := req.get("stac_item"))
             Item(**item)
 
+    async def test_get_fields(self, async_client, data_requests, collection_route):
+        response = await async_client.get(f"{collection_route}?fields=title,authors")
+        models = {str(req["_id"]): DataRequestPublic(**req) for req in data_requests}
+        assert len(response.json()["data_requests"]) == self.default_link_limit
+        for req in response.json()["data_requests"]:
+            assert req == models[req["id"]].model_dump(mode="json", include={"id", "title", "authors"})
+
+    async def test_get_exclude(self, async_client, data_requests, collection_route):
+        response = await async_client.get(f"{collection_route}?exclude=geometry")
+        models = {str(req["_id"]): DataRequestPublic(**req) for req in data_requests}
+        for req in response.json()["data_requests"]:
+            assert req == models[req["id"]].model_dump(mode="json", exclude={"geometry"})
+
+    async def test_get_fields_stac(self, async_client, collection_route):
+        response = await async_client.get(f"{collection_route}?fields=title&stac=true")
+        for req in response.json()["data_requests"]:
+            assert set(req) == {"id", "title", "stac_item"}
+            Item(**req["stac_item"])
+
+    async def test_get_fields_paging(self, async_client, collection_route):
+        response = await async_client.get(f"{collection_route}?fields=id&limit=4")
+        next_link = next(link for link in response.json()["links"] if link["rel"] == "next")
+        assert parse_qs(urlparse(next_link["href"]).query).get("fields") == ["id"]
+        next_response = await async_client.get(next_link["href"])
+        assert all(set(req) == {"id"} for req in next_response.json()["data_requests"])
+
+    async def test_unknown_field(self, async_client, collection_route):
+        response = await async_client.get(f"{collection_route}?exclude=tz_offset")
+        assert response.status_code == 422
+
     async def test_get_limit_default(self, async_client, collection_route):
         response = await async_client.get(collection_route)
         assert len(response.json()["data_requests"]) == self.default_link_limit
@@ -245,6 +320,18 @@ class _TestPost:
         response = await async_client.post(collection_route, json=data)
         assert response.status_code == 422
 
+    @pytest.mark.parametrize(
+        "geometry",
+        [
+            {"type": "Point", "packed_coordinates": {"data": "abc", "dtype": "<f8", "dimensions": 2, "offsets": []}},
+            {"type": "Point", "packed_coordinates": {}},
+        ],
+    )
+    async def test_invalid_packed_geometry(self, fake, async_client, collection_route, geometry):
+        data = {**json.loads(fake.data_request().model_dump_json()), "geometry": geometry}
+        response = await async_client.post(collection_route, json=data)
+        assert response.status_code == 422
+
 
 class TestPostUser(_TestPost, _TestUser): ...
 
@@ -371,3 +458,1299 @@ class TestDeleteUser(_TestDelete, _TestUser):
 
 
 class TestDeleteAdmin(_TestDelete, _TestAdmin): ...
+
+
+class TestPackedGeometryStorage:
+    @pytest.fixture(autouse=True, params=["<f8", "<f4"])
+    def geometry_storage_dtype(self, request, monkeypatch):
+        monkeypatch.setattr(routes, "GEOMETRY_STORAGE_DTYPE", request.param)
+        return request.param
+
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        data = json.loads(fake.data_request(geometry=fake.geo_multipolygon()).model_dump_json(exclude=["user"]))
+        response = await async_client.post("/v1/users/user1/data-requests/", json=data)
+        assert response.status_code == 200
+        return response.json()
+
+    async def test_stored_packed(self, created, geometry_storage_dtype):
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["id"])})
+        assert "coordinates" not in document["geometry"]
+        assert document["geometry"]["packed_coordinates"]["dtype"] == geometry_storage_dtype
+
+    async def test_get(self, created, async_client, geometry_storage_dtype):
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created['id']}?stac=true")
+        assert response.status_code == 200
+        if geometry_storage_dtype == "<f8":
+            assert response.json()["geometry"] == created["geometry"]
+        Item(**response.json()["stac_item"])
+
+    async def test_patch_geometry(self, created, fake, async_client):
+        geometry = json.loads(fake.geo_polygon().model_dump_json())
+        response = await async_client.patch(
+            f"/v1/users/user1/data-requests/{created['id']}", json={"geometry": geometry}
+        )
+        assert response.status_code == 200
+        assert response.json()["geometry"]["type"] == "Polygon"
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["id"])})
+        assert "packed_coordinates" in document["geometry"]
+
+    async def test_patch_other_field(self, created, async_client, geometry_storage_dtype):
+        response = await async_client.patch(f"/v1/users/user1/data-requests/{created['id']}", json={"title": "new"})
+        assert response.status_code == 200
+        if geometry_storage_dtype == "<f8":
+            assert response.json()["geometry"] == created["geometry"]
+
+
+class TestStoredStacItem:
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        response = await async_client.post("/v1/users/user1/data-requests/", json=data)
+        assert response.status_code == 200
+        return response.json()
+
+    async def _stored_item(self, id_):
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(id_)})
+        return document["stac_item"]
+
+    async def test_stored_on_post(self, created):
+        item = await self._stored_item(created["id"])
+        assert Item(**item) == Item(**DataRequestPublic(**created).stac_item)
+
+    @pytest.mark.parametrize("bulk", [False, True], ids=["single", "bulk"])
+    async def test_geometry_summarized_once(self, fake, async_client, monkeypatch, bulk):
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        calls = []
+
+        def summary(geojson):
+            calls.append(geojson)
+            return GeometrySummary(geojson)
+
+        monkeypatch.setattr(models, "GeometrySummary", summary)
+        if bulk:
+            response = await async_client.post("/v1/users/user1/data-requests/bulk", json=[data])
+            id_ = response.json()["results"][0]["id"]
+            assert len(calls) == 1
+        else:
+            id_ = (await async_client.post("/v1/users/user1/data-requests/", json=data)).json()["id"]
+            # once when the request body is validated and once when the response is validated
+            assert len(calls) == 2
+        assert (await self._stored_item(id_))["id"] == id_
+
+    async def test_not_returned_without_stac(self, created, async_client):
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created['id']}")
+        assert "stac_item" not in response.json()
+        response = await async_client.get("/v1/users/user1/data-requests/")
+        assert all("stac_item" not in req for req in response.json()["data_requests"])
+
+    async def test_not_returned_from_patch(self, created, async_client):
+        response = await async_client.patch(f"/v1/users/user1/data-requests/{created['id']}", json={"title": "a"})
+        assert "stac_item" not in response.json()
+
+    async def test_returned_with_stac(self, created, async_client):
+        item = await self._stored_item(created["id"])
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created['id']}?stac=true")
+        assert response.json()["stac_item"] == json.loads(json.dumps(item))
+
+    async def test_recomputed_on_patch(self, created, fake, async_client):
+        temporal = [t.isoformat() for t in fake.temporal()]
+        await async_client.patch(f"/v1/users/user1/data-requests/{created['id']}", json={"temporal": temporal})
+        item = await self._stored_item(created["id"])
+        expected = DataRequestPublic(**{**created, "temporal": temporal}).stac_item
+        assert item["properties"] == expected["properties"]
+
+    async def test_not_stored_if_updated_again(self, created, fake, async_client, monkeypatch):
+        collection_class = type(client.db.get_collection("data-request"))
+        update_one = collection_class.update_one
+
+        async def concurrent_update_one(self, selector, update, *args, **kwargs):
+            if "stac_item" in update.get("$set", {}):
+                # another update is written after this update but before its STAC item is stored
+                await update_one(self, {"_id": selector["_id"]}, {"$inc": {routes._REVISION_FIELD: 1}})
+            return await update_one(self, selector, update, *args, **kwargs)
+
+        monkeypatch.setattr(collection_class, "update_one", concurrent_update_one)
+        temporal = [t.isoformat() for t in fake.temporal()]
+        response = await async_client.patch(
+            f"/v1/users/user1/data-requests/{created['id']}", json={"temporal": temporal}
+        )
+        assert response.status_code == 200
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["id"])})
+        assert "stac_item" not in document
+
+    async def test_removed_by_patch(self, created, fake, async_client, monkeypatch):
+        async def not_stored(document):
+            pass
+
+        # the item that matches the previous fields must not be readable before the new item is stored
+        monkeypatch.setattr(routes, "_store_patched_stac_item", not_stored)
+        temporal = [t.isoformat() for t in fake.temporal()]
+        await async_client.patch(f"/v1/users/user1/data-requests/{created['id']}", json={"temporal": temporal})
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["id"])})
+        assert "stac_item" not in document
+
+    async def test_patch_applied_if_not_stored(self, created, fake, async_client, monkeypatch):
+        def stac_item(self):
+            raise ValueError("unable to generate the STAC item")
+
+        monkeypatch.setattr(DataRequestPublic, "stac_item", property(stac_item))
+        temporal = [t.isoformat() for t in fake.temporal()]
+        response = await async_client.patch(
+            f"/v1/users/user1/data-requests/{created['id']}", json={"temporal": temporal}
+        )
+        assert response.status_code == 200
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["id"])})
+        assert "stac_item" not in document
+        assert document["start_utc"] == datetime.datetime.fromisoformat(min(temporal))
+
+    async def test_item_collection_reads_stored_items(self, created, fake, async_client, monkeypatch):
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        missing = (await async_client.post("/v1/users/user1/data-requests/", json=data)).json()
+        await client.db.get_collection("data-request").update_one(
+            {"_id": bson.ObjectId(missing["id"])}, {"$unset": {"stac_item": ""}}
+        )
+        find_page = routes._find_page
+        pages = []
+
+        async def recording_find_page(*args, **kwargs):
+            pages.append(await find_page(*args, **kwargs))
+            return pages[-1]
+
+        monkeypatch.setattr(routes, "_find_page", recording_find_page)
+        response = await async_client.get(f"/v1/users/user1/stac/collections/{routes.STAC_COLLECTION_ID}/items")
+        assert [item["id"] for item in response.json()["features"]] == [created["id"], missing["id"]]
+        assert all("geometry" not in document for document in pages[0][0])
+        features = {item["id"]: item for item in response.json()["features"]}
+        assert Item(**features[missing["id"]]).geometry == Item(**DataRequestPublic(**missing).stac_item).geometry
+
+    async def test_generated_if_not_stored(self, created, async_client):
+        await client.db.get_collection("data-request").update_one(
+            {"_id": bson.ObjectId(created["id"])}, {"$unset": {"stac_item": ""}}
+        )
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created['id']}?stac=true")
+        Item(**response.json()["stac_item"])
+
+
+class TestDataRequestCache:
+    @pytest.fixture(autouse=True, params=["local", "shared"])
+    def data_request_cache(self, request, monkeypatch):
+        shared = LocalSharedCache() if request.param == "shared" else None
+        cache = DocumentCache(max_bytes=10**7, ttl=60, shared=shared)
+        monkeypatch.setattr(routes, "data_request_cache", cache)
+        return cache
+
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        response = await async_client.post("/v1/users/user1/data-requests/", json=data)
+        return response.json()
+
+    async def test_get_cached(self, created, async_client, data_request_cache):
+        route = f"/v1/users/user1/data-requests/{created['id']}"
+        first = await async_client.get(route)
+        second = await async_client.get(route)
+        assert first.json() == second.json() == created
+        assert data_request_cache.stats()["hits"] == 1
+
+    async def test_get_stac_cached(self, created, async_client):
+        route = f"/v1/users/user1/data-requests/{created['id']}"
+        await async_client.get(route)
+        response = await async_client.get(f"{route}?stac=true")
+        Item(**response.json()["stac_item"])
+        response = await async_client.get(route)
+        assert "stac_item" not in response.json()
+
+    async def test_user_scope(self, created, async_client):
+        await async_client.get(f"/v1/users/user1/data-requests/{created['id']}")
+        response = await async_client.get(f"/v1/users/user2/data-requests/{created['id']}")
+        assert response.status_code == 404
+
+    async def test_patch_invalidates(self, created, async_client):
+        route = f"/v1/users/user1/data-requests/{created['id']}"
+        await async_client.get(route)
+        await async_client.patch(route, json={"title": "new title"})
+        response = await async_client.get(route)
+        assert response.json()["title"] == "new title"
+
+    async def test_delete_invalidates(self, created, async_client):
+        route = f"/v1/users/user1/data-requests/{created['id']}"
+        await async_client.get(route)
+        await async_client.delete(route)
+        response = await async_client.get(route)
+        assert response.status_code == 404
+
+    async def test_write_during_read_not_cached(self, created, async_client, data_request_cache, monkeypatch):
+        route = f"/v1/users/user1/data-requests/{created['id']}"
+        set_ = data_request_cache.set
+
+        async def set_after_write(key, document):
+            # a patch is written (and invalidates the cache) after the data request is read but before it is cached
+            await async_client.patch(route, json={"title": "new title"})
+            monkeypatch.setattr(data_request_cache, "set", set_)
+            await set_(key, document)
+
+        monkeypatch.setattr(data_request_cache, "set", set_after_write)
+        await async_client.get(route)
+        assert await data_request_cache.get(created["id"]) is None
+        response = await async_client.get(route)
+        assert response.json()["title"] == "new title"
+
+    async def test_stats(self, created, async_client):
+        await async_client.get(f"/v1/users/user1/data-requests/{created['id']}")
+        response = await async_client.get("/v1/admin/data-requests/cache")
+        assert response.status_code == 200
+        assert response.json()["misses"] == 1
+        assert response.json()["entries"] == 1
+
+
+@pytest.mark.no_db_cleanup
+class TestExport(_TestGet):
+    n_data_requests = 7
+
+    @pytest.fixture(autouse=True)
+    def small_batches(self, monkeypatch):
+        monkeypatch.setattr(routes, "EXPORT_BATCH_SIZE", 2)
+
+    async def test_export(self, async_client, data_requests):
+        response = await async_client.get("/v1/admin/data-requests/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        exported = [json.loads(line) for line in response.text.splitlines()]
+        assert [req["id"] for req in exported] == sorted(str(req["_id"]) for req in data_requests)
+        models = {str(req["_id"]): DataRequestPublic(**req) for req in data_requests}
+        for req in exported:
+            assert "stac_item" not in req
+            assert DataRequestPublic(**req) == models[req["id"]]
+
+    async def test_export_stac(self, async_client, data_requests):
+        response = await async_client.get("/v1/admin/data-requests/export?stac=true")
+        exported = [json.loads(line) for line in response.text.splitlines()]
+        assert len(exported) == len(data_requests)
+        for req in exported:
+            Item(**req["stac_item"])
+
+    async def test_export_read_preference(self, async_client, data_requests, monkeypatch):
+        monkeypatch.setattr(database, "READ_PREFERENCE", SecondaryPreferred())
+        read_preferences = []
+        get_default_database = client.get_default_database
+
+        def _get_default_database(*args, **kwargs):
+            read_preferences.append(kwargs.get("read_preference"))
+            return get_default_database(*args, **kwargs)
+
+        monkeypatch.setattr(client, "get_default_database", _get_default_database)
+        response = await async_client.get("/v1/admin/data-requests/export")
+        assert len(response.text.splitlines()) == len(data_requests)
+        assert read_preferences == [SecondaryPreferred()]
+
+    async def test_export_not_user_route(self, async_client, data_requests):
+        response = await async_client.get(f"/v1/users/{data_requests[0]['user']}/data-requests/export")
+        assert response.status_code == 404
+
+
+class _TestStacUser:
+    @pytest.fixture
+    def stac_route(self, data_requests):
+        return f"/v1/users/{data_requests[0]['user']}/stac"
+
+    @pytest.fixture
+    def expected_ids(self, data_requests):
+        return sorted(str(req["_id"]) for req in data_requests if req["user"] == data_requests[0]["user"])
+
+
+class _TestStacAdmin:
+    @pytest.fixture
+    def stac_route(self):
+        return "/v1/admin/stac"
+
+    @pytest.fixture
+    def expected_ids(self, data_requests):
+        return sorted(str(req["_id"]) for req in data_requests)
+
+
+class _TestStac(_TestGet):
+    n_data_requests = 10
+
+    async def _follow(self, async_client, response):
+        ids = []
+        while True:
+            assert response.status_code == 200
+            ids.extend(item["id"] for item in response.json()["features"])
+            next_link = next((link for link in response.json()["links"] if link["rel"] == "next"), None)
+            if next_link is None:
+                return ids
+            if next_link.get("method") == "POST":
+                response = await async_client.post(next_link["href"], json=next_link["body"])
+            else:
+                response = await async_client.get(next_link["href"])
+
+    async def test_landing_page(self, async_client, stac_route):
+        response = await async_client.get(f"{stac_route}/")
+        assert response.status_code == 200
+        assert response.json()["type"] == "Catalog"
+        assert {link["rel"] for link in response.json()["links"]} >= {"self", "root", "conformance", "data", "search"}
+        for link in response.json()["links"]:
+            assert link["href"].startswith(f"http://test{stac_route}/")
+
+    async def test_conformance(self, async_client, stac_route):
+        response = await async_client.get(f"{stac_route}/conformance")
+        assert "https://api.stacspec.org/v1.0.0/core" in response.json()["conformsTo"]
+
+    async def test_collections(self, async_client, stac_route):
+        response = await async_client.get(f"{stac_route}/collections")
+        assert [c["id"] for c in response.json()["collections"]] == [routes.STAC_COLLECTION_ID]
+
+    async def test_collection_not_found(self, async_client, stac_route):
+        response = await async_client.get(f"{stac_route}/collections/other")
+        assert response.status_code == 404
+
+    async def test_items(self, async_client, stac_route, expected_ids):
+        response = await async_client.get(f"{stac_route}/collections/{routes.STAC_COLLECTION_ID}/items?limit=3")
+        assert response.headers["content-type"] == "application/geo+json"
+        assert response.json()["type"] == "FeatureCollection"
+        assert response.json()["numberReturned"] == 3
+        for item in response.json()["features"]:
+            assert item["collection"] == routes.STAC_COLLECTION_ID
+            Item(**item)
+        assert await self._follow(async_client, response) == expected_ids
+
+    async def test_items_prev(self, async_client, stac_route):
+        first = await async_client.get(f"{stac_route}/collections/{routes.STAC_COLLECTION_ID}/items?limit=2")
+        next_link = next(link for link in first.json()["links"] if link["rel"] == "next")
+        second = await async_client.get(next_link["href"])
+        prev_link = next(link for link in second.json()["links"] if link["rel"] == "prev")
+        assert (await async_client.get(prev_link["href"])).json()["features"] == first.json()["features"]
+
+    async def test_items_bad_token(self, async_client, stac_route):
+        response = await async_client.get(f"{stac_route}/collections/{routes.STAC_COLLECTION_ID}/items?token=bad")
+        assert response.status_code == 400
+
+    async def test_item(self, async_client, stac_route, expected_ids):
+        response = await async_client.get(
+            f"{stac_route}/collections/{routes.STAC_COLLECTION_ID}/items/{expected_ids[0]}"
+        )
+        assert response.status_code == 200
+        assert response.json()["id"] == expected_ids[0]
+
+    async def test_search_get(self, async_client, stac_route, expected_ids):
+        response = await async_client.get(f"{stac_route}/search?limit=3")
+        assert await self._follow(async_client, response) == expected_ids
+
+    async def test_search_post(self, async_client, stac_route, expected_ids):
+        response = await async_client.post(f"{stac_route}/search", json={"limit": 3})
+        assert await self._follow(async_client, response) == expected_ids
+
+    async def test_search_ids(self, async_client, stac_route, expected_ids):
+        ids = expected_ids[:2]
+        response = await async_client.get(f"{stac_route}/search?ids={','.join(ids)},bad-id")
+        assert [item["id"] for item in response.json()["features"]] == ids
+
+    async def test_search_ids_paged(self, async_client, stac_route, expected_ids):
+        ids = expected_ids[:3]
+        response = await async_client.post(f"{stac_route}/search", json={"ids": ids, "limit": 1})
+        assert await self._follow(async_client, response) == ids
+
+    async def test_search_other_collection(self, async_client, stac_route):
+        response = await async_client.get(f"{stac_route}/search?collections=other")
+        assert response.json()["features"] == []
+
+
+@pytest.mark.no_db_cleanup
+class TestStacUser(_TestStac, _TestStacUser):
+    async def test_item_other_user(self, async_client, data_requests):
+        other = next(req for req in data_requests if req["user"] != data_requests[0]["user"])
+        response = await async_client.get(
+            f"/v1/users/{data_requests[0]['user']}/stac/collections/{routes.STAC_COLLECTION_ID}/items/{other['_id']}"
+        )
+        assert response.status_code == 404
+
+
+@pytest.mark.no_db_cleanup
+class TestStacAdmin(_TestStac, _TestStacAdmin): ...
+
+
+class TestSpatialFilter:
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        created = {}
+        for name, coordinates in {"west": [-100, 45], "east": [100, 45], "antimeridian": [179.5, 0]}.items():
+            data_request = fake.data_request(geometry=Point(type="Point", coordinates=coordinates))
+            response = await async_client.post(
+                "/v1/users/user1/data-requests/", json=json.loads(data_request.model_dump_json(exclude=["user"]))
+            )
+            assert response.status_code == 200
+            created[name] = response.json()["id"]
+        return created
+
+    async def _ids(self, async_client, query):
+        response = await async_client.get(f"/v1/admin/data-requests/?{query}")
+        assert response.status_code == 200
+        return {req["id"] for req in response.json()["data_requests"]}
+
+    async def test_footprint_stored(self, created):
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["west"])})
+        assert document["footprint"] == {"type": "Point", "coordinates": [-100, 45]}
+
+    async def test_footprint_not_returned(self, created, async_client):
+        response = await async_client.get(f"/v1/admin/data-requests/{created['west']}?stac=true")
+        assert "footprint" not in response.json()
+
+    async def test_footprint_updated_on_patch(self, created, async_client):
+        geometry = {"type": "Point", "coordinates": [10, 10]}
+        await async_client.patch(f"/v1/admin/data-requests/{created['west']}", json={"geometry": geometry})
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["west"])})
+        assert document["footprint"] == geometry
+
+    async def test_bbox(self, created, async_client):
+        assert await self._ids(async_client, "bbox=-110,40,-90,50") == {created["west"]}
+
+    async def test_bbox_3d(self, created, async_client):
+        assert await self._ids(async_client, "bbox=90,40,-10,110,50,10") == {created["east"]}
+
+    async def test_bbox_wide(self, created, async_client):
+        assert await self._ids(async_client, "bbox=-180,40,180,50") == {created["west"], created["east"]}
+
+    async def test_bbox_antimeridian(self, created, async_client):
+        assert await self._ids(async_client, "bbox=179,-1,-179,1") == {created["antimeridian"]}
+
+    async def test_bbox_invalid(self, async_client):
+        response = await async_client.get("/v1/admin/data-requests/?bbox=1,2,3")
+        assert response.status_code == 422
+
+    async def test_intersects(self, created, async_client):
+        geometry = {"type": "Polygon", "coordinates": [[[90, 40], [110, 40], [110, 50], [90, 50], [90, 40]]]}
+        assert await self._ids(async_client, f"intersects={json.dumps(geometry)}") == {created["east"]}
+
+    async def test_intersects_invalid(self, async_client):
+        response = await async_client.get('/v1/admin/data-requests/?intersects={"type":"Polygon"}')
+        assert response.status_code == 422
+
+    async def test_bbox_and_intersects(self, created, async_client):
+        geometry = {"type": "Point", "coordinates": [100, 45]}
+        assert await self._ids(async_client, f"bbox=-110,40,-90,50&intersects={json.dumps(geometry)}") == set()
+
+    async def test_user_scope(self, created, async_client):
+        response = await async_client.get("/v1/users/other-user/data-requests/?bbox=-180,-90,180,90")
+        assert response.json()["data_requests"] == []
+
+    async def test_stac_search_get(self, created, async_client):
+        response = await async_client.get("/v1/admin/stac/search?bbox=-110,40,-90,50")
+        assert [item["id"] for item in response.json()["features"]] == [created["west"]]
+
+    async def test_stac_search_post(self, created, async_client):
+        geometry = {"type": "Point", "coordinates": [100, 45]}
+        response = await async_client.post("/v1/admin/stac/search", json={"intersects": geometry})
+        assert [item["id"] for item in response.json()["features"]] == [created["east"]]
+
+    async def test_stac_items(self, created, async_client):
+        response = await async_client.get(
+            f"/v1/admin/stac/collections/{routes.STAC_COLLECTION_ID}/items?bbox=90,40,110,50"
+        )
+        assert [item["id"] for item in response.json()["features"]] == [created["east"]]
+
+    async def test_stac_items_invalid(self, async_client):
+        response = await async_client.get(f"/v1/admin/stac/collections/{routes.STAC_COLLECTION_ID}/items?bbox=1,2,3")
+        assert response.status_code == 422
+
+
+class TestTemporalFilter:
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        created = {}
+        temporals = {
+            "early": ["1990-01-01T00:00:00+00:00", "1995-01-01T00:00:00+00:00"],
+            "instant": ["2005-01-01T00:00:00-05:00"],
+            "long": ["1999-06-01T00:00:00+00:00", "2010-01-01T00:00:00+00:00"],
+        }
+        for name, temporal in temporals.items():
+            data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+            response = await async_client.post("/v1/users/user1/data-requests/", json={**data, "temporal": temporal})
+            assert response.status_code == 200
+            created[name] = response.json()["id"]
+        return created
+
+    async def _ids(self, async_client, interval):
+        response = await async_client.get("/v1/admin/data-requests/", params={"datetime": interval})
+        assert response.status_code == 200
+        return {req["id"] for req in response.json()["data_requests"]}
+
+    async def test_derived_fields_stored(self, created):
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["instant"])})
+        expected = datetime.datetime(2005, 1, 1, 5, tzinfo=datetime.timezone.utc)
+        assert document["start_utc"] == document["end_utc"] == expected
+
+    async def test_derived_fields_not_returned(self, created, async_client):
+        response = await async_client.get(f"/v1/admin/data-requests/{created['early']}")
+        assert not {"start_utc", "end_utc"} & response.json().keys()
+
+    async def test_derived_fields_updated_on_patch(self, created, async_client):
+        temporal = ["2020-01-01T00:00:00+00:00", "2021-01-01T00:00:00+00:00"]
+        await async_client.patch(f"/v1/admin/data-requests/{created['early']}", json={"temporal": temporal})
+        document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(created["early"])})
+        assert document["end_utc"] == datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+
+    async def test_interval(self, created, async_client):
+        ids = await self._ids(async_client, "1990-01-01T00:00:00Z/2000-01-01T00:00:00Z")
+        assert ids == {created["early"], created["long"]}
+
+    async def test_instant(self, created, async_client):
+        assert await self._ids(async_client, "2005-01-01T05:00:00Z") == {created["instant"], created["long"]}
+
+    async def test_open_start(self, created, async_client):
+        assert await self._ids(async_client, "../1991-01-01T00:00:00Z") == {created["early"]}
+
+    async def test_open_end(self, created, async_client):
+        assert await self._ids(async_client, "2006-01-01T00:00:00Z/") == {created["long"]}
+
+    @pytest.mark.parametrize(
+        "interval", ["bad", "2000-01-01", "../..", "2001-01-01T00:00:00Z/2000-01-01T00:00:00Z", "a/b/c"]
+    )
+    async def test_invalid(self, async_client, interval):
+        response = await async_client.get("/v1/admin/data-requests/", params={"datetime": interval})
+        assert response.status_code == 422
+
+    async def test_stac_search_get(self, created, async_client):
+        response = await async_client.get("/v1/admin/stac/search", params={"datetime": "../1991-01-01T00:00:00Z"})
+        assert [item["id"] for item in response.json()["features"]] == [created["early"]]
+
+    async def test_stac_search_post(self, created, async_client):
+        response = await async_client.post("/v1/admin/stac/search", json={"datetime": "2006-01-01T00:00:00Z/.."})
+        assert [item["id"] for item in response.json()["features"]] == [created["long"]]
+
+    async def test_stac_items(self, created, async_client):
+        response = await async_client.get(
+            f"/v1/admin/stac/collections/{routes.STAC_COLLECTION_ID}/items",
+            params={"datetime": "2006-01-01T00:00:00Z/.."},
+        )
+        assert [item["id"] for item in response.json()["features"]] == [created["long"]]
+
+    async def test_stac_items_invalid(self, async_client):
+        response = await async_client.get(
+            f"/v1/admin/stac/collections/{routes.STAC_COLLECTION_ID}/items", params={"datetime": "bad"}
+        )
+        assert response.status_code == 422
+
+
+class TestBackfillDerivedFields:
+    @pytest.fixture
+    async def loaded_data(self, fake):
+        data = [fake.data_request(geometry=fake.geo_point()).model_dump() for _ in range(5)]
+        await client.db.get_collection("data-request").insert_many(data)
+        return data
+
+    async def test_backfill(self, loaded_data):
+        assert await routes.backfill_derived_fields(batch_size=2) == len(loaded_data)
+        async for document in client.db.get_collection("data-request").find({}):
+            data_request = DataRequestPublic(**document)
+            assert document["start_utc"] == data_request.temporal[0]
+            assert document["end_utc"] == data_request.temporal[-1]
+            assert document["footprint"] == {
+                "type": "Point",
+                "coordinates": list(data_request.geometry.coordinates[:2]),
+            }
+            assert Item(**document["stac_item"]) == Item(**data_request.stac_item)
+
+    async def test_missing_stac_item(self, loaded_data):
+        await routes.backfill_derived_fields()
+        await client.db.get_collection("data-request").update_many({}, {"$unset": {"stac_item": ""}})
+        assert await routes.backfill_derived_fields() == len(loaded_data)
+        assert await client.db.get_collection("data-request").count_documents({"stac_item": None}) == 0
+
+    async def test_idempotent(self, loaded_data):
+        await routes.backfill_derived_fields()
+        assert await routes.backfill_derived_fields() == 0
+
+    async def test_invalid_skipped(self, loaded_data):
+        await client.db.get_collection("data-request").insert_one({"user": "user1", "title": "invalid"})
+        assert await routes.backfill_derived_fields() == len(loaded_data)
+
+
+class TestTextSearch:
+    @pytest.fixture(autouse=True)
+    def search_cache(self, monkeypatch):
+        monkeypatch.setattr(routes, "search_cache", DocumentCache(max_bytes=2**20, ttl=60))
+
+    @pytest.fixture(autouse=True)
+    async def indexes(self):
+        await reconcile_indexes(client.db, INDEXES)
+
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        created = {}
+        fields = {
+            "title": {"title": "Ocean temperature", "description": None, "variables": ["tos"]},
+            "variables": {"title": "Sea ice", "description": None, "variables": ["ocean"]},
+            "description": {"title": "Wind", "description": "Winds over the ocean", "variables": ["uas"]},
+            "other": {"title": "Precipitation", "description": "Rain", "variables": ["pr"]},
+        }
+        for name, values in fields.items():
+            data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+            response = await async_client.post("/v1/users/user1/data-requests/", json={**data, **values})
+            assert response.status_code == 200
+            created[name] = response.json()["id"]
+        return created
+
+    async def _page(self, async_client, route="/v1/admin/data-requests/", **params):
+        response = await async_client.get(route, params=params or None)
+        assert response.status_code == 200
+        links = {link["rel"]: link["href"] for link in response.json()["links"]}
+        return [req["id"] for req in response.json()["data_requests"]], links
+
+    async def _ids(self, async_client, query, route="/v1/admin/data-requests/"):
+        return (await self._page(async_client, route, **query))[0]
+
+    async def test_ranked(self, created, async_client):
+        ids = await self._ids(async_client, {"q": "ocean"})
+        assert ids == [created["title"], created["variables"], created["description"]]
+
+    async def test_user_scope(self, created, async_client):
+        assert await self._ids(async_client, {"q": "ocean"}, "/v1/users/other-user/data-requests/") == []
+
+    async def test_links_use_snapshot(self, created, async_client):
+        _, links = await self._page(async_client, q="ocean", limit=1)
+        assert parse_qs(urlparse(links["next"]).query)["search"]
+
+    async def test_later_pages_use_snapshot(self, created, fake, async_client):
+        first, links = await self._page(async_client, q="ocean", limit=1)
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        await async_client.post("/v1/users/user1/data-requests/", json={**data, "title": "Ocean ocean ocean"})
+        second, _ = await self._page(async_client, links["next"])
+        assert first + second == [created["title"], created["variables"]]
+
+    async def test_new_search_not_from_snapshot(self, created, fake, async_client):
+        await self._ids(async_client, {"q": "ocean"})
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        response = await async_client.post("/v1/users/user1/data-requests/", json={**data, "title": "Ocean ocean"})
+        assert (await self._ids(async_client, {"q": "ocean"}))[0] == response.json()["id"]
+
+    async def test_no_longer_matching_skipped(self, created, async_client):
+        _, links = await self._page(async_client, q="ocean", limit=1)
+        await async_client.patch(f"/v1/admin/data-requests/{created['variables']}", json={"variables": ["siconc"]})
+        second, _ = await self._page(async_client, links["next"])
+        assert second == []
+        assert await self._ids(async_client, {"q": "ocean"}) == [created["title"], created["description"]]
+
+    async def test_expired_snapshot(self, created, async_client):
+        _, links = await self._page(async_client, q="ocean", limit=1)
+        routes.search_cache.local.clear()
+        second, _ = await self._page(async_client, links["next"])
+        assert second == [created["variables"]]
+
+    async def test_count(self, created, async_client):
+        response = await async_client.get("/v1/admin/data-requests/", params={"q": "ocean", "count": "exact"})
+        assert response.json()["total"] == 3
+
+    async def test_no_text_index(self, created, async_client, monkeypatch):
+        async def _ranked_ids(selector, q, search=None, session=None):
+            raise OperationFailure("text index required for $text query", code=27)
+
+        monkeypatch.setattr(routes, "_ranked_ids", _ranked_ids)
+        response = await async_client.get("/v1/admin/data-requests/", params={"q": "ocean"})
+        assert response.status_code == 503
+        assert "text index" in response.json()["detail"]
+
+
+class TestTextSearchPaging:
+    @pytest.fixture
+    async def ranked_ids(self, fake, monkeypatch):
+        await reconcile_indexes(client.db, INDEXES)
+        data = [fake.data_request(user="user1", title="ocean").model_dump() for _ in range(7)]
+        result = await client.db.get_collection("data-request").insert_many(data)
+        ranked = list(reversed(result.inserted_ids))
+
+        async def _ranked_ids(selector, q, search=None, session=None):
+            return "snapshot", ranked
+
+        monkeypatch.setattr(routes, "_ranked_ids", _ranked_ids)
+        return [str(id_) for id_ in ranked]
+
+    async def _follow(self, async_client, href, rel):
+        pages = []
+        while href:
+            response = await async_client.get(href)
+            assert response.status_code == 200
+            pages.append([req["id"] for req in response.json()["data_requests"]])
+            href = next((link["href"] for link in response.json()["links"] if link["rel"] == rel), None)
+        return pages
+
+    async def test_next(self, ranked_ids, async_client):
+        pages = await self._follow(async_client, "/v1/admin/data-requests/?q=ocean&limit=3", "next")
+        assert pages == [ranked_ids[:3], ranked_ids[3:6], ranked_ids[6:]]
+
+    async def test_prev(self, ranked_ids, async_client):
+        pages = await self._follow(
+            async_client, f"/v1/admin/data-requests/?q=ocean&limit=3&before={ranked_ids[5]}", "prev"
+        )
+        assert pages == [ranked_ids[2:5], ranked_ids[:2]]
+
+    async def test_deleted_skipped(self, ranked_ids, async_client):
+        await client.db.get_collection("data-request").delete_one({"_id": bson.ObjectId(ranked_ids[1])})
+        pages = await self._follow(async_client, "/v1/admin/data-requests/?q=ocean&limit=3", "next")
+        assert pages[0] == [ranked_ids[0], ranked_ids[2]]
+
+    async def test_expired(self, ranked_ids, async_client):
+        response = await async_client.get(f"/v1/admin/data-requests/?q=ocean&after={bson.ObjectId()}")
+        assert response.status_code == 400
+
+
+class TestSimplify:
+    @pytest.fixture(autouse=True)
+    def simplify_cache(self, monkeypatch):
+        cache = DocumentCache(max_bytes=10**7, ttl=60)
+        monkeypatch.setattr(routes, "simplify_cache", cache)
+        return cache
+
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        angles = [2 * math.pi * i / 1000 for i in range(1000)]
+        ring = [[math.cos(angle), math.sin(angle)] for angle in angles] + [[1.0, 0.0]]
+        geometry = {"type": "Polygon", "coordinates": [ring]}
+        data = json.loads(fake.data_request(geometry=geometry).model_dump_json(exclude=["user"]))
+        response = await async_client.post("/v1/users/user1/data-requests/", json=data)
+        assert response.status_code == 200
+        return response.json()
+
+    @staticmethod
+    def n_positions(geometry):
+        return len(geometry["coordinates"][0])
+
+    async def test_get(self, created, async_client):
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created['id']}?simplify=0.01")
+        assert response.status_code == 200
+        assert 4 <= self.n_positions(response.json()["geometry"]) < self.n_positions(created["geometry"]) // 10
+        assert response.json()["title"] == created["title"]
+
+    async def test_get_many(self, created, async_client):
+        response = await async_client.get("/v1/users/user1/data-requests/?simplify=0.01")
+        (data_request,) = response.json()["data_requests"]
+        assert self.n_positions(data_request["geometry"]) < self.n_positions(created["geometry"]) // 10
+
+    async def test_get_stac(self, created, async_client):
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created['id']}?simplify=0.01&stac=true")
+        item = response.json()["stac_item"]
+        Item(**item)
+        assert self.n_positions(item["geometry"]) == self.n_positions(response.json()["geometry"])
+
+    async def test_stac_api_item(self, created, async_client):
+        route = f"/v1/users/user1/stac/collections/data-requests/items/{created['id']}?simplify=0.01"
+        response = await async_client.get(route)
+        Item(**response.json())
+        assert self.n_positions(response.json()["geometry"]) < self.n_positions(created["geometry"]) // 10
+
+    async def test_stac_api_search(self, created, async_client):
+        response = await async_client.post("/v1/users/user1/stac/search", json={"simplify": 0.01})
+        (item,) = response.json()["features"]
+        assert self.n_positions(item["geometry"]) < self.n_positions(created["geometry"]) // 10
+
+    async def test_cached(self, created, async_client, simplify_cache):
+        route = f"/v1/users/user1/data-requests/{created['id']}?simplify=0.01"
+        first = await async_client.get(route)
+        second = await async_client.get(route)
+        assert first.json() == second.json()
+        assert simplify_cache.stats()["hits"] == 1
+
+    async def test_not_stale_after_patch(self, created, async_client):
+        route = f"/v1/users/user1/data-requests/{created['id']}"
+        await async_client.get(f"{route}?simplify=0.01")
+        geometry = {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 0]]}
+        await async_client.patch(route, json={"geometry": geometry})
+        response = await async_client.get(f"{route}?simplify=0.01")
+        assert response.json()["geometry"]["coordinates"] == [[0, 0], [2, 0]]
+
+    async def test_invalid_tolerance(self, created, async_client):
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created['id']}?simplify=0")
+        assert response.status_code == 422
+
+
+class TestCount:
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        ids = {}
+        for user, n in (("user1", 3), ("user2", 2)):
+            for _ in range(n):
+                data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+                response = await async_client.post(f"/v1/users/{user}/data-requests/", json=data)
+                ids.setdefault(user, []).append(response.json()["id"])
+        return ids
+
+    async def total(self, async_client, route, count="estimated", **params):
+        response = await async_client.get(route, params={"count": count, **params})
+        assert response.status_code == 200
+        return response.json()["total"]
+
+    async def test_no_total_by_default(self, created, async_client):
+        response = await async_client.get("/v1/users/user1/data-requests/")
+        assert response.json()["total"] is None
+
+    @pytest.mark.parametrize("count", ["exact", "estimated"])
+    async def test_user(self, created, async_client, count):
+        assert await self.total(async_client, "/v1/users/user1/data-requests/", count, limit=1) == 3
+
+    @pytest.mark.parametrize("count", ["exact", "estimated"])
+    async def test_admin(self, created, async_client, count):
+        assert await self.total(async_client, "/v1/admin/data-requests/", count, limit=1) == 5
+
+    async def test_estimated_uses_stored_count(self, created, async_client):
+        await client.db["data-request-count"].update_one({"_id": "user1"}, {"$set": {"count": 100}})
+        assert await self.total(async_client, "/v1/users/user1/data-requests/") == 100
+        assert await self.total(async_client, "/v1/users/user1/data-requests/", "exact") == 3
+
+    async def test_estimated_filtered_is_exact(self, created, async_client):
+        await client.db["data-request-count"].update_one({"_id": "user1"}, {"$set": {"count": 100}})
+        route = "/v1/users/user1/data-requests/"
+        assert await self.total(async_client, route, datetime="../9999-01-01T00:00:00Z") == 3
+
+    async def test_unknown_user(self, created, async_client):
+        assert await self.total(async_client, "/v1/users/user3/data-requests/") == 0
+
+    async def test_delete(self, created, async_client):
+        await async_client.delete(f"/v1/admin/data-requests/{created['user1'][0]}")
+        assert await self.total(async_client, "/v1/users/user1/data-requests/") == 2
+
+    async def test_bulk_create(self, created, fake, async_client):
+        data = [json.loads(fake.data_request().model_dump_json(exclude=["user"])) for _ in range(2)]
+        await async_client.post("/v1/users/user1/data-requests/bulk", json=[*data, {"title": "invalid"}])
+        assert await self.total(async_client, "/v1/users/user1/data-requests/") == 5
+
+    async def test_bulk_delete(self, created, async_client):
+        ids = [created["user1"][0], created["user2"][0]]
+        await async_client.post("/v1/admin/data-requests/bulk/delete", json={"ids": ids})
+        assert await self.total(async_client, "/v1/users/user1/data-requests/") == 2
+        assert await self.total(async_client, "/v1/users/user2/data-requests/") == 1
+
+    async def test_patch_user(self, created, async_client):
+        await async_client.patch(f"/v1/admin/data-requests/{created['user1'][0]}", json={"user": "user2"})
+        assert await self.total(async_client, "/v1/users/user1/data-requests/") == 2
+        assert await self.total(async_client, "/v1/users/user2/data-requests/") == 3
+
+    async def test_bulk_patch_user(self, created, async_client):
+        body = {"selector": {"user": "user1"}, "update": {"user": "user2"}}
+        await async_client.patch("/v1/admin/data-requests/bulk", json=body)
+        assert await self.total(async_client, "/v1/users/user1/data-requests/") == 0
+        assert await self.total(async_client, "/v1/users/user2/data-requests/") == 5
+
+    async def test_backfill(self, created, fake, async_client):
+        await client.db["data-request"].insert_one(fake.data_request(user="user1").model_dump())
+        await client.db["data-request-count"].insert_one({"_id": "user3", "count": 1})
+        assert await routes.backfill_user_counts() == 2
+        assert await self.total(async_client, "/v1/users/user1/data-requests/") == 4
+        assert await client.db["data-request-count"].find_one({"_id": "user3"}) is None
+
+    async def test_recount(self, created, fake, async_client):
+        await client.db["data-request"].insert_one(fake.data_request(user="user1").model_dump())
+        response = await async_client.post("/v1/admin/data-requests/counts/recount")
+        assert response.status_code == 200
+        assert response.json() == {"users": 2}
+        assert await self.total(async_client, "/v1/users/user1/data-requests/") == 4
+
+    async def test_invalid(self, async_client):
+        response = await async_client.get("/v1/users/user1/data-requests/?count=maybe")
+        assert response.status_code == 422
+
+
+class TestCompression:
+    async def test_compressed_request_and_response(self, fake, async_client):
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        response = await async_client.post(
+            "/v1/users/user1/data-requests/",
+            content=gzip.compress(json.dumps(data).encode()),
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        )
+        assert response.status_code == 200
+        created = response.json()
+        response = await async_client.get(
+            f"/v1/users/user1/data-requests/{created['id']}", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers.get("Content-Encoding") == ("gzip" if len(response.content) >= 1024 else None)
+        assert response.json() == created
+
+    async def test_compressed_request_too_large(self, async_client):
+        response = await async_client.post(
+            "/v1/users/user1/data-requests/",
+            content=gzip.compress(bytes(65 * 2**20)),
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        )
+        assert response.status_code == 413
+
+
+class TestMetrics:
+    @pytest.fixture(autouse=True)
+    def metrics(self, monkeypatch):
+        metrics_ = Metrics(registry=CollectorRegistry())
+        monkeypatch.setattr(metrics_module, "metrics", metrics_)
+        return metrics_
+
+    async def test_metrics(self, async_client, fake):
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        await async_client.post("/v1/users/user1/data-requests/", json=data)
+        await async_client.get("/v1/users/user1/data-requests/?stac=true")
+        response = await async_client.get("/metrics")
+        assert response.status_code == 200
+        route = 'method="POST",route="/v1/users/{user}/data-requests/",status="200"'
+        assert f"marble_api_http_request_duration_seconds_count{{{route}}} 1.0" in response.text
+        assert 'marble_api_phase_duration_seconds_count{phase="validation"}' in response.text
+        assert 'marble_api_phase_duration_seconds_count{phase="stac_item"}' in response.text
+
+
+class TestConditionalRequests:
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        return await async_client.post("/v1/users/user1/data-requests/", json=data)
+
+    @pytest.fixture
+    def route(self, created):
+        return f"/v1/users/user1/data-requests/{created.json()['id']}"
+
+    async def test_post_etag(self, created):
+        assert created.headers["ETag"] == '"1"'
+        assert "revision" not in created.json()
+
+    async def test_get_etag(self, route, async_client):
+        response = await async_client.get(route)
+        assert response.headers["ETag"] == '"1"'
+        assert "revision" not in response.json()
+
+    async def test_get_fields_etag(self, route, async_client):
+        response = await async_client.get(route, params={"fields": "title"})
+        assert response.headers["ETag"] == '"1"'
+        assert response.json().keys() == {"id", "title"}
+
+    @pytest.mark.parametrize("if_none_match", ['"1"', 'W/"1"', '"0", "1"', "*"])
+    async def test_not_modified(self, route, async_client, if_none_match):
+        response = await async_client.get(route, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == '"1"'
+        assert not response.content
+
+    async def test_modified(self, route, async_client):
+        response = await async_client.get(route, headers={"If-None-Match": '"0"'})
+        assert response.status_code == 200
+        assert response.json()["id"] in route
+
+    async def test_patch_increments_revision(self, route, async_client):
+        response = await async_client.patch(route, json={"title": "new title"})
+        assert response.headers["ETag"] == '"2"'
+        assert "revision" not in response.json()
+        assert (await async_client.get(route)).headers["ETag"] == '"2"'
+
+    @pytest.mark.parametrize("if_match", ['"1"', '"0", "1"', "*"])
+    async def test_patch_if_match(self, route, async_client, if_match):
+        response = await async_client.patch(route, json={"title": "new title"}, headers={"If-Match": if_match})
+        assert response.status_code == 200
+        assert response.json()["title"] == "new title"
+
+    @pytest.mark.parametrize("if_match", ['"2"', 'W/"1"', "invalid"])
+    async def test_patch_precondition_failed(self, route, async_client, if_match):
+        response = await async_client.patch(route, json={"title": "new title"}, headers={"If-Match": if_match})
+        assert response.status_code == 412
+        response = await async_client.get(route)
+        assert response.json()["title"] != "new title"
+        assert response.headers["ETag"] == '"1"'
+
+    async def test_patch_nothing_precondition_failed(self, route, async_client):
+        response = await async_client.patch(route, json={}, headers={"If-Match": '"2"'})
+        assert response.status_code == 412
+
+    async def test_patch_if_match_not_found(self, async_client):
+        route = f"/v1/users/user1/data-requests/{bson.ObjectId()}"
+        response = await async_client.patch(route, json={"title": "new title"}, headers={"If-Match": '"1"'})
+        assert response.status_code == 404
+
+    async def test_stale_update(self, route, async_client):
+        first = await async_client.get(route)
+        await async_client.patch(route, json={"title": "first"}, headers={"If-Match": first.headers["ETag"]})
+        response = await async_client.patch(
+            route, json={"title": "second"}, headers={"If-Match": first.headers["ETag"]}
+        )
+        assert response.status_code == 412
+        assert (await async_client.get(route)).json()["title"] == "first"
+
+    async def test_no_revision(self, fake, async_client):
+        result = await client.db["data-request"].insert_one(fake.data_request(user="user1").model_dump())
+        route = f"/v1/users/user1/data-requests/{result.inserted_id}"
+        response = await async_client.get(route)
+        assert response.headers["ETag"] == '"0"'
+        response = await async_client.patch(route, json={"title": "new title"}, headers={"If-Match": '"0"'})
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"1"'
+
+    async def test_bulk_update_increments_revision(self, route, created, async_client):
+        await async_client.patch(
+            "/v1/users/user1/data-requests/bulk",
+            json={"updates": [{"id": created.json()["id"], "update": {"title": "new title"}}]},
+        )
+        await async_client.patch(
+            "/v1/users/user1/data-requests/bulk",
+            json={"selector": {"ids": [created.json()["id"]]}, "update": {"title": "newer title"}},
+        )
+        assert (await async_client.get(route)).headers["ETag"] == '"3"'
+
+    async def test_list_etag(self, route, async_client):
+        response = await async_client.get("/v1/users/user1/data-requests/")
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"')
+        assert "revision" not in response.json()["data_requests"][0]
+        response = await async_client.get("/v1/users/user1/data-requests/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert not response.content
+
+    async def test_list_etag_changes(self, route, async_client):
+        etag = (await async_client.get("/v1/users/user1/data-requests/")).headers["ETag"]
+        await async_client.patch(route, json={"title": "new title"})
+        response = await async_client.get("/v1/users/user1/data-requests/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    async def test_list_etag_total(self, route, async_client):
+        etag = (await async_client.get("/v1/users/user1/data-requests/")).headers["ETag"]
+        response = await async_client.get("/v1/users/user1/data-requests/?count=exact", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+
+class TestCausalConsistency:
+    @pytest.fixture(autouse=True)
+    def read_preference(self, monkeypatch):
+        monkeypatch.setattr(database, "READ_PREFERENCE", SecondaryPreferred())
+
+    @pytest.fixture
+    async def async_client(self):
+        # the middleware is only added to the application if causal consistency is enabled when it is imported
+        causal_app = BaseHTTPMiddleware(app, dispatch=add_operation_time)
+        async with AsyncClient(transport=ASGITransport(app=causal_app), base_url="http://test") as async_client_:
+            yield async_client_
+
+    @pytest.fixture
+    async def replica_set(self):
+        try:
+            hello = await client.db.command("hello")
+        except Exception:
+            hello = {}
+        if "setName" not in hello:
+            pytest.skip("causally consistent reads require a replica set")
+
+    @pytest.fixture
+    async def created(self, fake, async_client):
+        data = json.loads(fake.data_request().model_dump_json(exclude=["user"]))
+        return await async_client.post("/v1/users/user1/data-requests/", json=data)
+
+    async def test_read_preference(self, created, async_client):
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created.json()['id']}")
+        assert response.json() == created.json()
+
+    async def test_operation_time_header(self, replica_set, created):
+        assert parse_operation_time(created.headers[OPERATION_TIME_HEADER])
+
+    async def test_no_operation_time_header_for_reads(self, replica_set, created, async_client):
+        response = await async_client.get(f"/v1/users/user1/data-requests/{created.json()['id']}")
+        assert OPERATION_TIME_HEADER not in response.headers
+
+    @pytest.mark.parametrize("cache", [False, True])
+    async def test_read_after_write(self, replica_set, created, async_client, monkeypatch, cache):
+        if cache:
+            monkeypatch.setattr(routes, "data_request_cache", DocumentCache(max_bytes=10**7, ttl=60))
+        route = f"/v1/users/user1/data-requests/{created.json()['id']}"
+        await async_client.get(route)
+        response = await async_client.patch(route, json={"title": "new title"})
+        headers = {OPERATION_TIME_HEADER: response.headers[OPERATION_TIME_HEADER]}
+        response = await async_client.get(route, headers=headers)
+        assert response.json()["title"] == "new title"
+        response = await async_client.get("/v1/users/user1/data-requests/", params={"count": "exact"}, headers=headers)
+        assert response.json()["total"] == 1
+        response = await async_client.get("/v1/users/user1/stac/search", headers=headers)
+        assert response.json()["features"][0]["id"] == created.json()["id"]
+
+    async def test_invalid_operation_time(self, async_client):
+        response = await async_client.get("/v1/users/user1/data-requests/", headers={OPERATION_TIME_HEADER: "now"})
+        assert response.status_code == 400
+
+
+class _TestBulkCreate:
+    async def test_valid(self, fake, async_client, bulk_route):
+        data = [json.loads(fake.data_request().model_dump_json(exclude=["user"])) for _ in range(3)]
+        response = await async_client.post(bulk_route, json=data)
+        assert response.status_code == 200
+        assert response.json()["created"] == 3
+        for result, item in zip(response.json()["results"], data, strict=True):
+            document = await client.db.get_collection("data-request").find_one({"_id": bson.ObjectId(result["id"])})
+            assert document["user"] == "user1"
+            assert document["title"] == item["title"]
+            assert {"stac_item", "footprint", "start_utc", "end_utc"} <= document.keys()
+
+    async def test_invalid_items(self, fake, async_client, bulk_route):
+        data = [json.loads(fake.data_request().model_dump_json(exclude=["user"])) for _ in range(3)]
+        data[1]["authors"] = []
+        response = await async_client.post(bulk_route, json=data)
+        assert response.status_code == 200
+        assert response.json()["created"] == 2
+        results = response.json()["results"]
+        assert results[0]["id"] and results[2]["id"]
+        assert results[1]["id"] is None
+        assert [error["loc"] for error in results[1]["errors"]] == [["authors"]]
+        assert await client.db.get_collection("data-request").count_documents({}) == 2
+
+    async def test_chunked(self, fake, async_client, bulk_route, monkeypatch):
+        monkeypatch.setattr(routes, "BULK_CHUNK_SIZE", 2)
+        insert_chunk = routes._insert_chunk
+        chunk_sizes = []
+
+        async def _insert_chunk(user, data_requests):
+            chunk_sizes.append(len(data_requests))
+            return await insert_chunk(user, data_requests)
+
+        monkeypatch.setattr(routes, "_insert_chunk", _insert_chunk)
+        data = [json.loads(fake.data_request().model_dump_json(exclude=["user"])) for _ in range(5)]
+        response = await async_client.post(bulk_route, json=data)
+        assert response.json()["created"] == 5
+        assert chunk_sizes == [2, 2, 1]
+
+    async def test_empty(self, async_client, bulk_route):
+        response = await async_client.post(bulk_route, json=[])
+        assert response.json() == {"created": 0, "results": []}
+
+    async def test_not_a_list(self, async_client, bulk_route):
+        response = await async_client.post(bulk_route, json={})
+        assert response.status_code == 422
+
+
+class TestBulkCreateUser(_TestBulkCreate):
+    @pytest.fixture
+    def bulk_route(self):
+        return "/v1/users/user1/data-requests/bulk"
+
+
+class TestBulkCreateAdmin(_TestBulkCreate):
+    @pytest.fixture
+    def bulk_route(self):
+        return "/v1/admin/data-requests/bulk?user=user1"
+
+    async def test_user_required(self, async_client):
+        response = await async_client.post("/v1/admin/data-requests/bulk", json=[])
+        assert response.status_code == 422
+
+
+class _TestBulkWrite:
+    @pytest.fixture
+    async def loaded_data(self, fake):
+        data = [
+            fake.data_request(user=user, variables=variables).model_dump()
+            for user, variables in [("user1", ["tas"]), ("user1", ["pr"]), ("user2", ["tas"]), ("user2", ["pr"])]
+        ]
+        result = await client.db.get_collection("data-request").insert_many(data)
+        return [{**item, "_id": id_} for item, id_ in zip(data, result.inserted_ids, strict=True)]
+
+    async def _find(self, id_):
+        return await client.db.get_collection("data-request").find_one({"_id": id_})
+
+    async def test_update_by_id(self, loaded_data, async_client, bulk_route):
+        updates = [{"id": str(req["_id"]), "update": {"title": f"title {i}"}} for i, req in enumerate(loaded_data[:2])]
+        response = await async_client.patch(bulk_route, json={"updates": [*updates, {"id": "bad", "update": {}}]})
+        assert response.status_code == 200
+        assert response.json() == {"matched": 2, "modified": 2, "deleted": 0}
+        assert [(await self._find(req["_id"]))["title"] for req in loaded_data[:2]] == ["title 0", "title 1"]
+
+    async def test_update_by_selector(self, loaded_data, async_client, bulk_route):
+        body = {"selector": {"variables": ["tas"]}, "update": {"variables": ["tas", "tasmax"]}}
+        response = await async_client.patch(bulk_route, json=body)
+        assert response.status_code == 200
+        expected = [req for req in loaded_data if "tas" in req["variables"] and self.in_scope(req)]
+        assert response.json()["modified"] == len(expected)
+        for req in expected:
+            assert (await self._find(req["_id"]))["variables"] == ["tas", "tasmax"]
+
+    async def test_update_derived_fields(self, loaded_data, async_client, bulk_route):
+        temporal = ["2000-01-01T00:00:00+00:00"]
+        body = {"selector": {"ids": [str(loaded_data[0]["_id"])]}, "update": {"temporal": temporal}}
+        await async_client.patch(bulk_route, json=body)
+        document = await self._find(loaded_data[0]["_id"])
+        assert document["start_utc"] == datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+        assert document["stac_item"]["properties"]["datetime"] == "2000-01-01T00:00:00+00:00"
+
+    async def test_update_stores_stac_item(self, loaded_data, async_client, bulk_route):
+        geometry = {"type": "Point", "coordinates": [1, 2]}
+        updates = [
+            {"id": str(loaded_data[0]["_id"]), "update": {"geometry": geometry}},
+            {"id": str(loaded_data[1]["_id"]), "update": {"title": "a"}},
+        ]
+        await async_client.patch(bulk_route, json={"updates": updates})
+        document = await self._find(loaded_data[0]["_id"])
+        assert Item(**document["stac_item"]) == Item(**DataRequestPublic(**document).stac_item)
+        assert document["stac_item"]["geometry"]["coordinates"] == [1, 2]
+
+    async def test_update_geometry(self, loaded_data, async_client, bulk_route):
+        geometry = {"type": "Point", "coordinates": [1, 2]}
+        updates = [{"id": str(loaded_data[0]["_id"]), "update": {"geometry": geometry}}]
+        await async_client.patch(bulk_route, json={"updates": updates})
+        assert (await self._find(loaded_data[0]["_id"]))["footprint"] == geometry
+
+    async def test_update_invalid_body(self, async_client, bulk_route):
+        for body in [{}, {"selector": {"variables": ["tas"]}}, {"selector": {}, "update": {"title": "a"}}]:
+            response = await async_client.patch(bulk_route, json=body)
+            assert response.status_code == 422
+
+    async def test_update_nothing(self, loaded_data, async_client, bulk_route):
+        response = await async_client.patch(bulk_route, json={"selector": {"variables": ["tas"]}, "update": {}})
+        assert response.status_code == 422
+
+    async def test_delete(self, loaded_data, async_client, bulk_route):
+        response = await async_client.post(f"{bulk_route}/delete", json={"variables": ["pr"]})
+        assert response.status_code == 200
+        expected = [req for req in loaded_data if "pr" in req["variables"] and self.in_scope(req)]
+        assert response.json() == {"matched": 0, "modified": 0, "deleted": len(expected)}
+        for req in expected:
+            assert await self._find(req["_id"]) is None
+
+    async def test_delete_by_id(self, loaded_data, async_client, bulk_route):
+        ids = [str(loaded_data[0]["_id"]), str(loaded_data[1]["_id"]), "bad"]
+        response = await async_client.post(f"{bulk_route}/delete", json={"ids": ids})
+        assert response.json()["deleted"] == 2
+
+    async def test_delete_empty_selector(self, async_client, bulk_route):
+        response = await async_client.post(f"{bulk_route}/delete", json={})
+        assert response.status_code == 422
+
+    async def test_delete_invalidates_cache(self, loaded_data, async_client, bulk_route, monkeypatch):
+        monkeypatch.setattr(routes, "data_request_cache", DocumentCache(max_bytes=2**20, ttl=60))
+        member_route = f"{bulk_route.removesuffix('/bulk')}/{loaded_data[0]['_id']}"
+        assert (await async_client.get(member_route)).status_code == 200
+        await async_client.post(f"{bulk_route}/delete", json={"ids": [str(loaded_data[0]["_id"])]})
+        assert (await async_client.get(member_route)).status_code == 404
+
+
+class TestBulkWriteUser(_TestBulkWrite):
+    @pytest.fixture
+    def bulk_route(self):
+        return "/v1/users/user1/data-requests/bulk"
+
+    @staticmethod
+    def in_scope(data_request):
+        return data_request["user"] == "user1"
+
+    async def test_update_other_user_by_id(self, loaded_data, async_client, bulk_route):
+        updates = [{"id": str(loaded_data[2]["_id"]), "update": {"title": "a"}}]
+        response = await async_client.patch(bulk_route, json={"updates": updates})
+        assert response.json()["matched"] == 0
+
+    async def test_update_change_user(self, loaded_data, async_client, bulk_route):
+        body = {"selector": {"variables": ["tas"]}, "update": {"user": "user2"}}
+        response = await async_client.patch(bulk_route, json=body)
+        assert response.status_code == 403
+
+    async def test_select_other_user(self, loaded_data, async_client, bulk_route):
+        response = await async_client.post(f"{bulk_route}/delete", json={"user": "user2"})
+        assert response.status_code == 403
+
+
+class TestBulkWriteAdmin(_TestBulkWrite):
+    @pytest.fixture
+    def bulk_route(self):
+        return "/v1/admin/data-requests/bulk"
+
+    @staticmethod
+    def in_scope(data_request):
+        return True
+
+    async def test_select_user(self, loaded_data, async_client, bulk_route):
+        response = await async_client.post(f"{bulk_route}/delete", json={"user": "user2"})
+        assert response.json()["deleted"] == 2
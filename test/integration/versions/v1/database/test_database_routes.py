@@ -0,0 +1,64 @@
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from marble_api.database import client
+from marble_api.database.slow_queries import SlowQueryLog
+
+pytestmark = [pytest.mark.anyio, pytest.mark.no_db_cleanup]
+
+
+async def test_pool_stats(async_client):
+    response = await async_client.get("/v1/admin/database/pool")
+    assert response.status_code == 200
+    assert response.json()["pid"] == os.getpid()
+    assert response.json()["options"]["max_pool_size"] > 0
+    assert isinstance(response.json()["servers"], dict)
+
+
+class TestSlowQueries:
+    @pytest.fixture
+    def slow_queries(self, monkeypatch):
+        slow_queries = SlowQueryLog(0.1, explain=False)
+        monkeypatch.setattr(client, "slow_queries", slow_queries)
+        command = {"find": "data-request", "filter": {"user": "alice"}, "sort": {"_id": -1}}
+        slow_queries.started(
+            MagicMock(command_name="find", command=command, database_name="db", connection_id=1, request_id=1)
+        )
+        slow_queries.succeeded(MagicMock(command_name="find", duration_micros=200_000, connection_id=1, request_id=1))
+        return slow_queries
+
+    async def test_list(self, async_client, slow_queries):
+        response = await async_client.get("/v1/admin/database/slow-queries")
+        assert response.status_code == 200
+        assert response.json()["threshold_seconds"] == 0.1
+        (query,) = response.json()["queries"]
+        assert query["shape"] == {
+            "command": "find",
+            "collection": "data-request",
+            "filter": {"user": "?"},
+            "sort": {"_id": -1},
+        }
+        assert "explain" not in query
+
+    async def test_get(self, async_client, slow_queries):
+        (query,) = slow_queries.queries()
+        response = await async_client.get(f"/v1/admin/database/slow-queries/{query['id']}")
+        assert response.status_code == 200
+        assert response.json()["explain"] is None
+        assert response.json()["count"] == 1
+
+    async def test_get_unknown(self, async_client, slow_queries):
+        response = await async_client.get("/v1/admin/database/slow-queries/unknown")
+        assert response.status_code == 404
+
+    async def test_delete(self, async_client, slow_queries):
+        response = await async_client.delete("/v1/admin/database/slow-queries")
+        assert response.status_code == 204
+        assert slow_queries.queries() == []
+
+    async def test_disabled(self, async_client, monkeypatch):
+        monkeypatch.setattr(client, "slow_queries", None)
+        response = await async_client.get("/v1/admin/database/slow-queries")
+        assert response.status_code == 404
@@ -1,4 +1,15 @@
-from marble_api.database import Client, client
+import pytest
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+from marble_api.database import (
+    READ_PREFERENCE,
+    Client,
+    client,
+    client_options,
+    create_client,
+    geometry_storage_dtype,
+    read_preference,
+)
 
 
 class TestClient:
@@ -14,6 +25,100 @@ class TestClient:
     def test_db_from_uri(self):
         assert Client("mongodb://example.com/other-db").db.name == "other-db"
 
+    def test_read_db(self):
+        assert Client("mongodb://example.com").read_db.read_preference == READ_PREFERENCE
+
+    def test_pool_stats_listener(self):
+        client_ = Client("mongodb://example.com")
+        assert client_.pool_stats in client_.options.event_listeners
+
+
+class TestCreateClient:
+    def test_no_options(self, monkeypatch):
+        for variable in ("MARBLE_API_MONGODB_MAX_POOL_SIZE", "MARBLE_API_MONGODB_COMPRESSORS"):
+            monkeypatch.delenv(variable, raising=False)
+        assert "maxPoolSize" not in client_options()
+
+    def test_options_from_environment(self, monkeypatch):
+        monkeypatch.setenv("MARBLE_API_MONGODB_MAX_POOL_SIZE", "5")
+        monkeypatch.setenv("MARBLE_API_MONGODB_WAIT_QUEUE_TIMEOUT_MS", "1000")
+        monkeypatch.setenv("MARBLE_API_MONGODB_COMPRESSORS", "zlib")
+        client_ = create_client("mongodb://example.com")
+        assert client_.options.pool_options.max_pool_size == 5
+        assert client_.options.pool_options.wait_queue_timeout == 1
+        assert client_options()["compressors"] == "zlib"
+
+    def test_options_override_uri(self, monkeypatch):
+        monkeypatch.setenv("MARBLE_API_MONGODB_MAX_POOL_SIZE", "5")
+        assert create_client("mongodb://example.com/?maxPoolSize=10").options.pool_options.max_pool_size == 5
+
+    def test_kwargs_override_environment(self, monkeypatch):
+        monkeypatch.setenv("MARBLE_API_MONGODB_MAX_POOL_SIZE", "5")
+        assert create_client("mongodb://example.com", maxPoolSize=7).options.pool_options.max_pool_size == 7
+
+    def test_tz_aware(self):
+        assert create_client("mongodb://example.com").codec_options.tz_aware
+
+
+class TestReadPreference:
+    def test_default(self, monkeypatch):
+        monkeypatch.delenv("MARBLE_API_READ_PREFERENCE", raising=False)
+        monkeypatch.delenv("MARBLE_API_READ_MAX_STALENESS_SECONDS", raising=False)
+        assert read_preference() == Primary()
+
+    @pytest.mark.parametrize(
+        ("mode", "expected"),
+        [
+            ("primary", Primary()),
+            ("primaryPreferred", PrimaryPreferred()),
+            ("secondary", Secondary()),
+            ("secondaryPreferred", SecondaryPreferred()),
+            ("nearest", Nearest()),
+        ],
+    )
+    def test_mode(self, monkeypatch, mode, expected):
+        monkeypatch.setenv("MARBLE_API_READ_PREFERENCE", mode)
+        monkeypatch.delenv("MARBLE_API_READ_MAX_STALENESS_SECONDS", raising=False)
+        assert read_preference() == expected
+
+    def test_max_staleness(self, monkeypatch):
+        monkeypatch.setenv("MARBLE_API_READ_PREFERENCE", "secondaryPreferred")
+        monkeypatch.setenv("MARBLE_API_READ_MAX_STALENESS_SECONDS", "120")
+        assert read_preference() == SecondaryPreferred(max_staleness=120)
+
+    def test_invalid_mode(self, monkeypatch):
+        monkeypatch.setenv("MARBLE_API_READ_PREFERENCE", "bogus")
+        with pytest.raises(ValueError):
+            read_preference()
+
+    @pytest.mark.parametrize("max_staleness", ["soon", "-5"])
+    def test_invalid_max_staleness(self, monkeypatch, max_staleness):
+        monkeypatch.setenv("MARBLE_API_READ_PREFERENCE", "nearest")
+        monkeypatch.setenv("MARBLE_API_READ_MAX_STALENESS_SECONDS", max_staleness)
+        with pytest.raises(ValueError):
+            read_preference()
+
+    def test_max_staleness_with_primary(self, monkeypatch):
+        monkeypatch.setenv("MARBLE_API_READ_PREFERENCE", "primary")
+        monkeypatch.setenv("MARBLE_API_READ_MAX_STALENESS_SECONDS", "120")
+        with pytest.raises(ValueError):
+            read_preference()
+
+
+class TestGeometryStorageDtype:
+    def test_default(self, monkeypatch):
+        monkeypatch.delenv("MARBLE_API_GEOMETRY_STORAGE", raising=False)
+        assert geometry_storage_dtype() is None
+
+    def test_packed(self, monkeypatch):
+        monkeypatch.setenv("MARBLE_API_GEOMETRY_STORAGE", "float32")
+        assert geometry_storage_dtype() == "<f4"
+
+    def test_invalid(self, monkeypatch):
+        monkeypatch.setenv("MARBLE_API_GEOMETRY_STORAGE", "float16")
+        with pytest.raises(ValueError, match="float16"):
+            geometry_storage_dtype()
+
 
 def test_client_singleton():
     assert isinstance(client, Client)
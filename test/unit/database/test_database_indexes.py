@@ -0,0 +1,104 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+from marble_api.database.indexes import diff_indexes, merge_indexes, reconcile_indexes
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def declared():
+    return [
+        IndexModel([("a", ASCENDING), ("_id", ASCENDING)], name="a_id"),
+        IndexModel([("b", DESCENDING)], name="b", unique=True),
+    ]
+
+
+@pytest.fixture
+def existing():
+    return {
+        "_id_": {"v": 2, "key": [("_id", 1)]},
+        "a_id": {"v": 2, "key": [("a", 1), ("_id", 1)]},
+        "b": {"v": 2, "key": [("b", -1)], "unique": True},
+    }
+
+
+class TestDiffIndexes:
+    def test_no_changes(self, existing, declared):
+        assert diff_indexes(existing, declared) == {"create": [], "drop": [], "unmanaged": []}
+
+    def test_create_missing(self, existing, declared):
+        existing.pop("b")
+        assert diff_indexes(existing, declared) == {"create": ["b"], "drop": [], "unmanaged": []}
+
+    def test_recreate_changed_key(self, existing, declared):
+        existing["a_id"]["key"] = [("_id", 1), ("a", 1)]
+        assert diff_indexes(existing, declared) == {"create": ["a_id"], "drop": ["a_id"], "unmanaged": []}
+
+    def test_recreate_changed_options(self, existing, declared):
+        existing["b"]["unique"] = False
+        assert diff_indexes(existing, declared) == {"create": ["b"], "drop": ["b"], "unmanaged": []}
+
+    def test_ignore_undeclared_options(self, existing, declared):
+        existing["a_id"]["2dsphereIndexVersion"] = 3
+        assert diff_indexes(existing, declared) == {"create": [], "drop": [], "unmanaged": []}
+
+    def test_text_index(self, existing, declared):
+        declared.append(IndexModel([("a", ASCENDING), ("t", TEXT), ("u", TEXT)], name="text", weights={"t": 2, "u": 1}))
+        existing["text"] = {"v": 2, "key": [("a", 1), ("_fts", "text"), ("_ftsx", 1)], "weights": {"t": 2, "u": 1}}
+        assert diff_indexes(existing, declared) == {"create": [], "drop": [], "unmanaged": []}
+        existing["text"]["weights"] = {"t": 1, "u": 1}
+        assert diff_indexes(existing, declared) == {"create": ["text"], "drop": ["text"], "unmanaged": []}
+
+    def test_unmanaged(self, existing, declared):
+        existing["other"] = {"v": 2, "key": [("c", 1)]}
+        assert diff_indexes(existing, declared)["unmanaged"] == ["other"]
+
+
+class TestReconcileIndexes:
+    @pytest.fixture
+    def collection(self, existing):
+        collection = MagicMock()
+        collection.index_information = AsyncMock(return_value=existing)
+        collection.create_indexes = AsyncMock()
+        collection.drop_index = AsyncMock()
+        return collection
+
+    @pytest.fixture
+    def database(self, collection):
+        return {"coll": collection}
+
+    async def test_create_and_drop(self, database, collection, existing, declared):
+        existing.pop("a_id")
+        existing["b"]["unique"] = False
+        diffs = await reconcile_indexes(database, {"coll": declared})
+        assert diffs == {"coll": {"create": ["a_id", "b"], "drop": ["b"], "unmanaged": []}}
+        collection.drop_index.assert_awaited_once_with("b")
+        collection.create_indexes.assert_awaited_once_with(declared)
+
+    async def test_nothing_to_do(self, database, collection, declared):
+        await reconcile_indexes(database, {"coll": declared})
+        collection.drop_index.assert_not_awaited()
+        collection.create_indexes.assert_not_awaited()
+
+    async def test_dry_run(self, database, collection, existing, declared):
+        existing.pop("a_id")
+        existing["b"]["unique"] = False
+        diffs = await reconcile_indexes(database, {"coll": declared}, dry_run=True)
+        assert diffs["coll"]["create"] == ["a_id", "b"]
+        collection.drop_index.assert_not_awaited()
+        collection.create_indexes.assert_not_awaited()
+
+
+class TestMergeIndexes:
+    def test_merge(self):
+        a = IndexModel([("a", ASCENDING)], name="a")
+        b = IndexModel([("b", ASCENDING)], name="b")
+        assert merge_indexes({"x": [a]}, {"x": [b], "y": [a]}) == {"x": [a, b], "y": [a]}
+
+    def test_later_overrides(self):
+        a = IndexModel([("a", ASCENDING)], name="a")
+        a2 = IndexModel([("a", DESCENDING)], name="a")
+        assert merge_indexes({"x": [a]}, {"x": [a2]}) == {"x": [a2]}
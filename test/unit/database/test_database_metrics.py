@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from marble_api.database import Client
+from marble_api.database.metrics import CommandMetrics
+from marble_api.utils import metrics as metrics_module
+from marble_api.utils.metrics import Metrics
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics_ = Metrics(registry=CollectorRegistry())
+    monkeypatch.setattr(metrics_module, "metrics", metrics_)
+    return metrics_
+
+
+def event(command_name, duration_micros):
+    return MagicMock(command_name=command_name, duration_micros=duration_micros)
+
+
+def sample(metrics, name, **labels):
+    return metrics.registry.get_sample_value(name, labels)
+
+
+class TestCommandMetrics:
+    def test_succeeded(self, metrics):
+        CommandMetrics().succeeded(event("find", 2500))
+        assert sample(metrics, "marble_api_mongodb_command_duration_seconds_count", command="find", outcome="succeeded")
+        assert sample(
+            metrics, "marble_api_mongodb_command_duration_seconds_sum", command="find", outcome="succeeded"
+        ) == pytest.approx(0.0025)
+
+    def test_failed(self, metrics):
+        CommandMetrics().failed(event("insert", 100))
+        assert sample(metrics, "marble_api_mongodb_command_duration_seconds_count", command="insert", outcome="failed")
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(metrics_module, "metrics", None)
+        CommandMetrics().succeeded(event("find", 100))
+
+
+class TestClientListener:
+    def test_enabled(self, metrics):
+        client_ = Client("mongodb://example.com")
+        assert any(isinstance(listener, CommandMetrics) for listener in client_.options.event_listeners)
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(metrics_module, "metrics", None)
+        client_ = Client("mongodb://example.com")
+        assert not any(isinstance(listener, CommandMetrics) for listener in client_.options.event_listeners)
@@ -0,0 +1,71 @@
+import pytest
+from pymongo.monitoring import (
+    ConnectionCheckedInEvent,
+    ConnectionCheckedOutEvent,
+    ConnectionCheckOutFailedEvent,
+    ConnectionCheckOutStartedEvent,
+    ConnectionClosedEvent,
+    ConnectionCreatedEvent,
+    PoolClearedEvent,
+    PoolClosedEvent,
+    PoolCreatedEvent,
+)
+
+from marble_api.database.pool import PoolStats
+
+ADDRESS = ("example.com", 27017)
+
+
+@pytest.fixture
+def pool_stats():
+    stats = PoolStats()
+    stats.pool_created(PoolCreatedEvent(ADDRESS, {}))
+    return stats
+
+
+def check_out(pool_stats, connection_id, duration=0.5):
+    pool_stats.connection_check_out_started(ConnectionCheckOutStartedEvent(ADDRESS))
+    pool_stats.connection_checked_out(ConnectionCheckedOutEvent(ADDRESS, connection_id, duration))
+
+
+class TestPoolStats:
+    def test_created(self, pool_stats):
+        assert pool_stats.stats()["example.com:27017"]["open"] == 0
+
+    def test_connections(self, pool_stats):
+        for connection_id in (1, 2):
+            pool_stats.connection_created(ConnectionCreatedEvent(ADDRESS, connection_id))
+        pool_stats.connection_closed(ConnectionClosedEvent(ADDRESS, 1, "idle"))
+        stats = pool_stats.stats()["example.com:27017"]
+        assert (stats["open"], stats["created"], stats["closed"]) == (1, 2, 1)
+
+    def test_check_out(self, pool_stats):
+        check_out(pool_stats, 1, duration=0.5)
+        check_out(pool_stats, 2, duration=1.5)
+        pool_stats.connection_checked_in(ConnectionCheckedInEvent(ADDRESS, 1))
+        stats = pool_stats.stats()["example.com:27017"]
+        assert (stats["in_use"], stats["waiting"], stats["checkouts"]) == (1, 0, 2)
+        assert stats["checkout_wait_seconds"] == 2.0
+        assert stats["max_checkout_wait_seconds"] == 1.5
+
+    def test_waiting(self, pool_stats):
+        pool_stats.connection_check_out_started(ConnectionCheckOutStartedEvent(ADDRESS))
+        assert pool_stats.stats()["example.com:27017"]["waiting"] == 1
+
+    def test_check_out_failed(self, pool_stats):
+        pool_stats.connection_check_out_started(ConnectionCheckOutStartedEvent(ADDRESS))
+        pool_stats.connection_check_out_failed(ConnectionCheckOutFailedEvent(ADDRESS, "timeout", 2.0))
+        stats = pool_stats.stats()["example.com:27017"]
+        assert (stats["waiting"], stats["checkout_failures"], stats["max_checkout_wait_seconds"]) == (0, 1, 2.0)
+
+    def test_cleared(self, pool_stats):
+        pool_stats.pool_cleared(PoolClearedEvent(ADDRESS))
+        assert pool_stats.stats()["example.com:27017"]["cleared"] == 1
+
+    def test_closed(self, pool_stats):
+        pool_stats.pool_closed(PoolClosedEvent(ADDRESS))
+        assert pool_stats.stats() == {}
+
+    def test_stats_copy(self, pool_stats):
+        pool_stats.stats()["example.com:27017"]["open"] = 10
+        assert pool_stats.stats()["example.com:27017"]["open"] == 0
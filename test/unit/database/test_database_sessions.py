@@ -0,0 +1,114 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import Timestamp
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from marble_api.database import sessions
+from marble_api.database.sessions import (
+    OPERATION_TIME_HEADER,
+    add_operation_time,
+    causal_session,
+    format_operation_time,
+    parse_operation_time,
+    write_session,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def make_request(method="GET", headers=None):
+    return Request(
+        {
+            "type": "http",
+            "method": method,
+            "path": "/",
+            "headers": [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+        }
+    )
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    mock = MagicMock()
+    mock.db.command = AsyncMock()
+    monkeypatch.setattr(sessions, "client", mock)
+    return mock
+
+
+class TestOperationTime:
+    def test_format(self):
+        assert format_operation_time(Timestamp(1700000000, 3)) == "1700000000.3"
+
+    def test_round_trip(self):
+        assert parse_operation_time(format_operation_time(Timestamp(1700000000, 3))) == Timestamp(1700000000, 3)
+
+    @pytest.mark.parametrize("value", ["", "1700000000", "a.b", "1.2.3", "-1.0"])
+    def test_parse_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_operation_time(value)
+
+
+class TestCausalSession:
+    async def test_no_header(self, mock_client):
+        async for session in causal_session(make_request()):
+            assert session is None
+        mock_client.start_session.assert_not_called()
+
+    async def test_header(self, mock_client):
+        mock_session = MagicMock()
+        mock_client.start_session.return_value.__aenter__.return_value = mock_session
+        async for session in causal_session(make_request(headers={OPERATION_TIME_HEADER: "1700000000.3"})):
+            assert session is mock_session
+        mock_client.start_session.assert_called_once_with(causal_consistency=True)
+        mock_session.advance_operation_time.assert_called_once_with(Timestamp(1700000000, 3))
+        mock_client.start_session.return_value.__aexit__.assert_awaited_once()
+
+    async def test_invalid_header(self, mock_client):
+        with pytest.raises(HTTPException) as exc_info:
+            async for _ in causal_session(make_request(headers={OPERATION_TIME_HEADER: "yesterday"})):
+                pass
+        assert exc_info.value.status_code == 400
+
+
+class TestAddOperationTime:
+    @pytest.fixture
+    def mock_session(self, mock_client):
+        session = MagicMock(operation_time=Timestamp(1700000000, 3))
+        mock_client.start_session.return_value.__aenter__.return_value = session
+        return session
+
+    async def call(self, request, status_code=200):
+        async def call_next(request):
+            call_next.session = write_session()
+            return Response(status_code=status_code)
+
+        response = await add_operation_time(request, call_next)
+        return response, call_next.session
+
+    async def test_write(self, mock_client, mock_session):
+        response, session = await self.call(make_request("POST"))
+        assert response.headers[OPERATION_TIME_HEADER] == "1700000000.3"
+        assert session is mock_session
+        mock_client.start_session.assert_called_once_with(causal_consistency=True)
+        mock_client.db.command.assert_not_awaited()
+
+    async def test_session_reset(self, mock_client, mock_session):
+        await self.call(make_request("POST"))
+        assert write_session() is None
+
+    async def test_read(self, mock_client, mock_session):
+        response, session = await self.call(make_request("GET"))
+        assert OPERATION_TIME_HEADER not in response.headers
+        assert session is None
+        mock_client.start_session.assert_not_called()
+
+    async def test_error(self, mock_client, mock_session):
+        response, _ = await self.call(make_request("PATCH"), status_code=404)
+        assert OPERATION_TIME_HEADER not in response.headers
+
+    async def test_no_operation_time(self, mock_client, mock_session):
+        mock_session.operation_time = None
+        response, _ = await self.call(make_request("DELETE"))
+        assert OPERATION_TIME_HEADER not in response.headers
@@ -0,0 +1,209 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from marble_api.database import Client
+from marble_api.database.slow_queries import REDACTED, SlowQueryLog, command_shape, redact, shape_id
+
+FIND = {
+    "find": "data-request",
+    "filter": {"user": "alice", "temporal": {"$gte": "2020-01-01"}, "_id": {"$in": [1, 2, 3]}},
+    "sort": {"_id": -1},
+    "limit": 10,
+    "lsid": {"id": "session"},
+    "$db": "marble-api",
+}
+
+
+def started(command, request_id=1, database_name="marble-api"):
+    return MagicMock(
+        command_name=next(iter(command)),
+        command=command,
+        database_name=database_name,
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+    )
+
+
+def ended(command_name, duration_micros, request_id=1):
+    return MagicMock(
+        command_name=command_name,
+        duration_micros=duration_micros,
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+    )
+
+
+def run(log, command, duration_micros, request_id=1, failed=False):
+    log.started(started(command, request_id))
+    event = ended(next(iter(command)), duration_micros, request_id)
+    (log.failed if failed else log.succeeded)(event)
+
+
+class TestRedact:
+    def test_scalars(self):
+        assert redact({"user": "alice", "count": 3}) == {"user": REDACTED, "count": REDACTED}
+
+    def test_operators(self):
+        assert redact({"temporal": {"$gte": "2020", "$lt": "2021"}}) == {
+            "temporal": {"$gte": REDACTED, "$lt": REDACTED}
+        }
+
+    def test_lists_of_values(self):
+        assert redact({"_id": {"$in": [1, 2, 3]}}) == redact({"_id": {"$in": [4]}})
+
+    def test_lists_of_documents(self):
+        assert redact({"$or": [{"a": 1}, {"b": 2}, {"a": 3}]}) == {"$or": [{"a": REDACTED}, {"b": REDACTED}]}
+
+    def test_unredacted_stages(self):
+        pipeline = [{"$match": {"user": "alice"}}, {"$sort": {"score": -1}}]
+        assert redact(pipeline) == [{"$match": {"user": REDACTED}}, {"$sort": {"score": -1}}]
+
+
+class TestCommandShape:
+    def test_find(self):
+        assert command_shape("find", FIND) == {
+            "command": "find",
+            "collection": "data-request",
+            "filter": {"user": REDACTED, "temporal": {"$gte": REDACTED}, "_id": {"$in": [REDACTED]}},
+            "sort": {"_id": -1},
+            "limit": REDACTED,
+        }
+
+    def test_aggregate(self):
+        shape = command_shape("aggregate", {"aggregate": "data-request", "pipeline": [{"$match": {"user": "a"}}]})
+        assert shape["pipeline"] == [{"$match": {"user": REDACTED}}]
+
+    def test_not_a_query(self):
+        assert command_shape("insert", {"insert": "data-request", "documents": []}) is None
+
+    def test_shape_id(self):
+        other = {**FIND, "filter": {**FIND["filter"], "user": "bob"}}
+        assert shape_id("db", command_shape("find", FIND)) == shape_id("db", command_shape("find", other))
+        assert shape_id("db", command_shape("find", FIND)) != shape_id("other", command_shape("find", FIND))
+
+
+class TestSlowQueryLog:
+    def test_fast_commands_are_ignored(self):
+        log = SlowQueryLog(0.1, explain=False)
+        run(log, FIND, 50_000)
+        assert log.queries() == []
+
+    def test_slow_command(self):
+        log = SlowQueryLog(0.1, explain=False)
+        run(log, FIND, 200_000)
+        (query,) = log.queries()
+        assert query["shape"] == command_shape("find", FIND)
+        assert (query["database"], query["count"], query["max_seconds"]) == ("marble-api", 1, 0.2)
+
+    def test_failed_command(self):
+        log = SlowQueryLog(0.1, explain=False)
+        run(log, FIND, 200_000, failed=True)
+        assert len(log.queries()) == 1
+
+    def test_grouped_by_shape(self):
+        log = SlowQueryLog(0.1, explain=False)
+        run(log, FIND, 200_000, request_id=1)
+        run(log, {**FIND, "filter": {**FIND["filter"], "user": "bob"}}, 300_000, request_id=2)
+        (query,) = log.queries()
+        assert query["count"] == 2
+        assert query["total_seconds"] == pytest.approx(0.5)
+        assert query["max_seconds"] == 0.3
+
+    def test_sorted_by_total_duration(self):
+        log = SlowQueryLog(0.1, explain=False)
+        run(log, FIND, 200_000, request_id=1)
+        run(log, {"count": "data-request", "query": {}}, 500_000, request_id=2)
+        assert [query["shape"]["command"] for query in log.queries()] == ["count", "find"]
+
+    def test_not_a_query(self):
+        log = SlowQueryLog(0.1, explain=False)
+        run(log, {"insert": "data-request", "documents": []}, 200_000)
+        assert log.queries() == []
+
+    def test_max_shapes(self):
+        log = SlowQueryLog(0.1, explain=False, max_shapes=2)
+        for i, collection in enumerate(("a", "b", "c")):
+            run(log, {**FIND, "find": collection}, 200_000, request_id=i)
+        assert sorted(query["shape"]["collection"] for query in log.queries()) == ["b", "c"]
+
+    def test_query(self):
+        log = SlowQueryLog(0.1, explain=False)
+        run(log, FIND, 200_000)
+        (query,) = log.queries()
+        assert log.query(query["id"])["explain"] is None
+        assert log.query("unknown") is None
+
+    def test_clear(self):
+        log = SlowQueryLog(0.1, explain=False)
+        run(log, FIND, 200_000)
+        log.clear()
+        assert log.queries() == []
+
+
+@pytest.mark.anyio
+class TestExplain:
+    @pytest.fixture
+    def mongo_client(self):
+        mongo_client = MagicMock()
+        mongo_client.__getitem__.return_value.command = AsyncMock(
+            return_value={"queryPlanner": {"winningPlan": {"stage": "IXSCAN"}}, "command": FIND, "ok": 1}
+        )
+        return mongo_client
+
+    async def explained(self, log):
+        await next(iter(log._tasks))
+        (query,) = log.queries()
+        return log.query(query["id"])
+
+    async def test_explain(self, mongo_client):
+        log = SlowQueryLog(0.1)
+        log.attach(mongo_client)
+        run(log, FIND, 200_000)
+        query = await self.explained(log)
+        assert query["explain"] == {"queryPlanner": {"winningPlan": {"stage": "IXSCAN"}}}
+        mongo_client.__getitem__.assert_called_once_with("marble-api")
+        (command,), _ = mongo_client.__getitem__.return_value.command.call_args
+        assert command["verbosity"] == "executionStats"
+        assert command["explain"] == {key: FIND[key] for key in ("find", "filter", "sort", "limit")}
+
+    async def test_first_occurrence_only(self, mongo_client):
+        log = SlowQueryLog(0.1)
+        log.attach(mongo_client)
+        run(log, FIND, 200_000, request_id=1)
+        await self.explained(log)
+        run(log, FIND, 200_000, request_id=2)
+        mongo_client.__getitem__.return_value.command.assert_awaited_once()
+
+    async def test_explain_error(self, mongo_client):
+        mongo_client.__getitem__.return_value.command.side_effect = RuntimeError("explain failed")
+        log = SlowQueryLog(0.1)
+        log.attach(mongo_client)
+        run(log, FIND, 200_000)
+        assert (await self.explained(log))["explain"] == {"error": "explain failed"}
+
+    async def test_write_commands_are_not_explained(self, mongo_client):
+        log = SlowQueryLog(0.1)
+        log.attach(mongo_client)
+        run(log, {"update": "data-request", "updates": [{"q": {"user": "alice"}, "u": {}}]}, 200_000)
+        assert not log._tasks
+
+    async def test_explain_disabled(self, mongo_client):
+        log = SlowQueryLog(0.1, explain=False)
+        log.attach(mongo_client)
+        run(log, FIND, 200_000)
+        assert not log._tasks
+
+
+class TestClientListener:
+    def test_enabled(self, monkeypatch):
+        monkeypatch.setattr("marble_api.database.SLOW_QUERY_THRESHOLD_MS", 250)
+        client_ = Client("mongodb://example.com")
+        assert client_.slow_queries.threshold == 0.25
+        assert client_.slow_queries in client_.options.event_listeners
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr("marble_api.database.SLOW_QUERY_THRESHOLD_MS", 0)
+        client_ = Client("mongodb://example.com")
+        assert client_.slow_queries is None
+        assert not any(isinstance(listener, SlowQueryLog) for listener in client_.options.event_listeners)
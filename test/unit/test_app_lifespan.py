@@ -0,0 +1,58 @@
+import asyncio
+import importlib
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# marble_api.app is shadowed by the application object that is exported by marble_api
+app_module = importlib.import_module("marble_api.app")
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    mock = MagicMock()
+    mock.aconnect = AsyncMock()
+    mock.close = AsyncMock()
+    mock.admin.command = AsyncMock()
+    mock.options.pool_options.min_pool_size = 0
+    monkeypatch.setattr(app_module, "client", mock)
+    monkeypatch.setattr(app_module, "INDEX_MODE", "off")
+    monkeypatch.setattr(app_module, "BACKFILL_MODE", "off")
+    return mock
+
+
+async def test_warm_up(mock_client):
+    mock_client.options.pool_options.min_pool_size = 3
+    async with app_module.lifespan(app_module.app):
+        mock_client.aconnect.assert_awaited_once()
+        assert mock_client.admin.command.await_count == 3
+
+
+async def test_warm_up_one_connection(mock_client):
+    async with app_module.lifespan(app_module.app):
+        assert mock_client.admin.command.await_count == 1
+
+
+async def test_warm_up_error_does_not_prevent_startup(mock_client):
+    mock_client.admin.command.side_effect = ConnectionError
+    async with app_module.lifespan(app_module.app):
+        pass
+
+
+async def test_close(mock_client):
+    async with app_module.lifespan(app_module.app):
+        mock_client.close.assert_not_awaited()
+    mock_client.close.assert_awaited_once()
+
+
+async def test_backfills_run_once(mock_client, monkeypatch):
+    run_once = AsyncMock()
+    monkeypatch.setattr(app_module, "run_once", run_once)
+    monkeypatch.setattr(app_module, "BACKFILL_MODE", "on")
+    async with app_module.lifespan(app_module.app):
+        for _ in range(10):
+            await asyncio.sleep(0)  # backfills are run in a background task
+    backfills = [backfill for _, version_app in app_module.VERSIONS for backfill in version_app.state.backfills]
+    assert [call.args[1] for call in run_once.await_args_list] == backfills
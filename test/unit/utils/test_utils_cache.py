@@ -0,0 +1,139 @@
+import time
+
+import bson
+import pytest
+
+from marble_api.utils.cache import DocumentCache, LocalSharedCache, LRUCache
+
+pytestmark = pytest.mark.anyio
+
+
+class TestLRUCache:
+    def test_get_set(self):
+        cache = LRUCache(max_bytes=100, ttl=60)
+        cache.set("a", b"value")
+        assert cache.get("a") == b"value"
+
+    def test_get_missing(self):
+        assert LRUCache(max_bytes=100, ttl=60).get("a") is None
+
+    def test_size(self):
+        cache = LRUCache(max_bytes=100, ttl=60)
+        cache.set("a", b"12345")
+        cache.set("b", b"123")
+        assert cache.size == 8
+        cache.set("a", b"1")
+        assert cache.size == 4
+        cache.delete("b")
+        assert cache.size == 1
+
+    def test_evict_least_recently_used(self):
+        cache = LRUCache(max_bytes=10, ttl=60)
+        cache.set("a", b"1234")
+        cache.set("b", b"1234")
+        cache.get("a")
+        cache.set("c", b"1234")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1234"
+        assert cache.get("c") == b"1234"
+        assert cache.evictions == 1
+
+    def test_value_too_large(self):
+        cache = LRUCache(max_bytes=4, ttl=60)
+        cache.set("a", b"12345")
+        assert cache.get("a") is None
+        assert cache.size == 0
+
+    def test_disabled(self):
+        cache = LRUCache(max_bytes=0, ttl=60)
+        cache.set("a", b"1")
+        assert cache.get("a") is None
+
+    def test_expired(self, monkeypatch):
+        cache = LRUCache(max_bytes=100, ttl=10)
+        cache.set("a", b"1")
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+        assert cache.get("a") is None
+        assert cache.evictions == 1
+        assert len(cache) == 0
+
+    def test_counters(self):
+        cache = LRUCache(max_bytes=100, ttl=60)
+        cache.set("a", b"1")
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        assert cache.stats() == {
+            "hits": 2,
+            "misses": 1,
+            "evictions": 0,
+            "entries": 1,
+            "size_bytes": 1,
+            "max_bytes": 100,
+        }
+
+    def test_clear(self):
+        cache = LRUCache(max_bytes=100, ttl=60)
+        cache.set("a", b"1")
+        cache.clear()
+        assert cache.get("a") is None
+        assert cache.size == 0
+
+
+class TestLocalSharedCache:
+    async def test_get_set(self):
+        cache = LocalSharedCache()
+        await cache.set("a", b"1", 60)
+        assert await cache.get("a") == b"1"
+
+    async def test_expired(self):
+        cache = LocalSharedCache()
+        await cache.set("a", b"1", -1)
+        assert await cache.get("a") is None
+
+    async def test_delete(self):
+        cache = LocalSharedCache()
+        await cache.set("a", b"1", 60)
+        await cache.delete("a")
+        assert await cache.get("a") is None
+
+
+class TestDocumentCache:
+    @pytest.fixture
+    def document(self):
+        return {"_id": bson.ObjectId(), "a": [1, 2, {"b": "c"}]}
+
+    async def test_get_set(self, document):
+        cache = DocumentCache(max_bytes=1000, ttl=60)
+        await cache.set("a", document)
+        assert await cache.get("a") == document
+
+    async def test_get_returns_copy(self, document):
+        cache = DocumentCache(max_bytes=1000, ttl=60)
+        await cache.set("a", document)
+        (await cache.get("a"))["a"] = None
+        assert await cache.get("a") == document
+
+    async def test_enabled(self):
+        assert not DocumentCache(max_bytes=0, ttl=60).enabled
+        assert DocumentCache(max_bytes=1, ttl=60).enabled
+        assert DocumentCache(max_bytes=0, ttl=60, shared=LocalSharedCache()).enabled
+
+    async def test_shared_tier(self, document):
+        shared = LocalSharedCache()
+        await DocumentCache(max_bytes=1000, ttl=60, shared=shared).set("a", document)
+        cache = DocumentCache(max_bytes=1000, ttl=60, shared=shared)
+        assert await cache.get("a") == document
+        assert cache.stats()["shared_hits"] == 1
+        assert await cache.get("a") == document
+        assert cache.stats()["shared_hits"] == 1
+        assert cache.stats()["hits"] == 1
+
+    async def test_delete(self, document):
+        shared = LocalSharedCache()
+        cache = DocumentCache(max_bytes=1000, ttl=60, shared=shared)
+        await cache.set("a", document)
+        await cache.delete("a")
+        assert await cache.get("a") is None
+        assert await shared.get("a") is None
@@ -0,0 +1,234 @@
+import gzip
+import json
+import zlib
+
+import brotli
+import pytest
+import zstandard
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from marble_api.utils import compression
+from marble_api.utils.compression import (
+    CompressionMiddleware,
+    RequestTooLarge,
+    decompress,
+    negotiate_encoding,
+)
+
+pytestmark = pytest.mark.anyio
+
+COMPRESSORS = {
+    "gzip": gzip.compress,
+    "br": brotli.compress,
+    "zstd": lambda data: zstandard.ZstdCompressor().compress(data),
+}
+DECOMPRESSORS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+BODY = json.dumps({"coordinates": [[i / 7, i / 3] for i in range(1000)]}).encode()
+
+
+@pytest.fixture
+def app():
+    app_ = FastAPI()
+
+    @app_.get("/large")
+    async def large() -> dict:
+        return json.loads(BODY)
+
+    @app_.get("/small")
+    async def small() -> dict:
+        return {"a": 1}
+
+    @app_.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def _stream():
+            for _ in range(3):
+                yield BODY
+
+        return StreamingResponse(_stream(), media_type="application/json")
+
+    @app_.get("/encoded")
+    async def encoded() -> PlainTextResponse:
+        return PlainTextResponse(gzip.compress(BODY), headers={"Content-Encoding": "gzip"})
+
+    @app_.post("/echo")
+    async def echo(request: Request) -> PlainTextResponse:
+        body = await request.body()
+        return PlainTextResponse(
+            f"{len(body)} {request.headers.get('content-length')} {request.headers.get('content-encoding')}"
+        )
+
+    app_.add_middleware(CompressionMiddleware, minimum_size=100, max_request_size=len(BODY))
+    return app_
+
+
+@pytest.fixture
+async def client(app):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client_:
+        yield client_
+
+
+def compress_zstd_stream(data):
+    """Return data compressed with zstd without its size in the frame header."""
+    compressor = zstandard.ZstdCompressor().compressobj()
+    return compressor.compress(data) + compressor.flush()
+
+
+async def get_raw(client, route, accept_encoding):
+    async with client.stream("GET", route, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join([chunk async for chunk in response.aiter_raw()])
+
+
+class TestNegotiateEncoding:
+    @pytest.mark.parametrize(
+        "accept_encoding, expected",
+        [
+            ("gzip", "gzip"),
+            ("gzip, br, zstd", "zstd"),
+            ("gzip;q=1.0, br;q=0.5", "gzip"),
+            ("br;q=0.5, gzip;q=0.5", "br"),
+            ("*", "zstd"),
+            ("*;q=0.5, zstd;q=0", "br"),
+            ("gzip;q=0", None),
+            ("identity", None),
+            ("", None),
+            ("GZIP; Q=0.8", "gzip"),
+            ("gzip;q=invalid, br", "br"),
+        ],
+    )
+    def test_negotiate(self, accept_encoding, expected):
+        assert negotiate_encoding(accept_encoding, ("zstd", "br", "gzip")) == expected
+
+    def test_available_only(self):
+        assert negotiate_encoding("br", ("gzip",)) is None
+
+
+class TestDecompress:
+    @pytest.mark.parametrize("encoding", COMPRESSORS)
+    def test_decompress(self, encoding):
+        assert decompress(COMPRESSORS[encoding](BODY), encoding, len(BODY)) == BODY
+
+    @pytest.mark.parametrize("encoding", COMPRESSORS)
+    def test_too_large(self, encoding):
+        with pytest.raises(RequestTooLarge):
+            decompress(COMPRESSORS[encoding](BODY), encoding, len(BODY) - 1)
+
+    @pytest.mark.parametrize("encoding", COMPRESSORS)
+    def test_bomb(self, encoding):
+        with pytest.raises(RequestTooLarge):
+            decompress(COMPRESSORS[encoding](bytes(10**8)), encoding, 10**6)
+
+    def test_zstd_declared_size_too_large(self):
+        data = zstandard.ZstdCompressor(write_content_size=True).compress(BODY)
+        assert zstandard.frame_content_size(data) == len(BODY)
+        with pytest.raises(RequestTooLarge):
+            decompress(data, "zstd", len(BODY) - 1)
+
+    def test_zstd_streamed_bomb(self):
+        with pytest.raises(RequestTooLarge):
+            decompress(compress_zstd_stream(bytes(10**8)), "zstd", 10**6)
+
+    def test_zstd_streamed(self):
+        body = bytes(range(256)) * 4000
+        assert decompress(compress_zstd_stream(body), "zstd", len(body)) == body
+
+    @pytest.mark.parametrize("encoding", COMPRESSORS)
+    def test_invalid(self, encoding):
+        with pytest.raises(ValueError):
+            decompress(b"not compressed", encoding, 1000)
+
+    @pytest.mark.parametrize("encoding", COMPRESSORS)
+    def test_truncated(self, encoding):
+        with pytest.raises(ValueError):
+            decompress(COMPRESSORS[encoding](BODY)[:-10], encoding, len(BODY))
+
+
+class TestCompressionMiddleware:
+    @pytest.mark.parametrize("encoding", COMPRESSORS)
+    async def test_compressed(self, client, encoding):
+        response, content = await get_raw(client, "/large", encoding)
+        assert response.headers["Content-Encoding"] == encoding
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert int(response.headers["Content-Length"]) == len(content) < len(BODY)
+        assert json.loads(DECOMPRESSORS[encoding](content)) == json.loads(BODY)
+
+    async def test_small_not_compressed(self, client):
+        response, content = await get_raw(client, "/small", "gzip")
+        assert "Content-Encoding" not in response.headers
+        assert json.loads(content) == {"a": 1}
+
+    async def test_not_accepted(self, client):
+        response, content = await get_raw(client, "/large", "identity")
+        assert "Content-Encoding" not in response.headers
+        assert json.loads(content) == json.loads(BODY)
+
+    @pytest.mark.parametrize("encoding", COMPRESSORS)
+    async def test_streaming(self, client, encoding):
+        response, content = await get_raw(client, "/stream", encoding)
+        assert response.headers["Content-Encoding"] == encoding
+        assert "Content-Length" not in response.headers
+        assert DECOMPRESSORS[encoding](content) == BODY * 3
+
+    async def test_already_encoded(self, client):
+        response, content = await get_raw(client, "/encoded", "br")
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(content) == BODY
+
+    async def test_large_body_compressed_in_thread(self, client, monkeypatch):
+        calls = []
+        to_thread = compression.asyncio.to_thread
+
+        async def _to_thread(function, *args):
+            calls.append(function)
+            return await to_thread(function, *args)
+
+        monkeypatch.setattr(compression, "_THREAD_MINIMUM_SIZE", 1000)
+        monkeypatch.setattr(compression.asyncio, "to_thread", _to_thread)
+        response, content = await get_raw(client, "/large", "gzip")
+        assert json.loads(gzip.decompress(content)) == json.loads(BODY)
+        assert calls
+
+    async def test_small_body_decompressed_in_thread(self, client, monkeypatch):
+        calls = []
+        to_thread = compression.asyncio.to_thread
+
+        async def _to_thread(function, *args):
+            calls.append(function)
+            return await to_thread(function, *args)
+
+        monkeypatch.setattr(compression.asyncio, "to_thread", _to_thread)
+        response = await client.post("/echo", content=gzip.compress(b"abc"), headers={"Content-Encoding": "gzip"})
+        assert response.text == "3 3 None"
+        assert calls == [decompress]
+
+    @pytest.mark.parametrize("encoding", COMPRESSORS)
+    async def test_decompress_request(self, client, encoding):
+        response = await client.post(
+            "/echo", content=COMPRESSORS[encoding](BODY), headers={"Content-Encoding": encoding}
+        )
+        assert response.text == f"{len(BODY)} {len(BODY)} None"
+
+    async def test_identity_request(self, client):
+        response = await client.post("/echo", content=b"abc", headers={"Content-Encoding": "identity"})
+        assert response.text == "3 3 identity"
+
+    async def test_request_too_large(self, client):
+        response = await client.post("/echo", content=gzip.compress(BODY + b" "), headers={"Content-Encoding": "gzip"})
+        assert response.status_code == 413
+
+    async def test_compressed_request_too_large(self, client):
+        response = await client.post("/echo", content=bytes(len(BODY) + 1), headers={"Content-Encoding": "gzip"})
+        assert response.status_code == 413
+
+    async def test_unsupported_request_encoding(self, client):
+        response = await client.post("/echo", content=zlib.compress(BODY), headers={"Content-Encoding": "deflate"})
+        assert response.status_code == 415
+
+    async def test_invalid_request_body(self, client):
+        response = await client.post("/echo", content=b"not compressed", headers={"Content-Encoding": "gzip"})
+        assert response.status_code == 400
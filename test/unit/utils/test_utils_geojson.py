@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from faker import Faker
 from geojson_pydantic import (
@@ -7,9 +8,21 @@ from geojson_pydantic import (
     MultiLineString,
     MultiPoint,
     MultiPolygon,
+    Point,
 )
 
-from marble_api.utils.geojson import bbox_from_coordinates, collapse_geometries, validate_collapsible
+from marble_api.utils.geojson import (
+    GeometrySummary,
+    bbox_from_coordinates,
+    bbox_to_geometries,
+    collapse_geometries,
+    drop_elevation,
+    footprints,
+    pack_geometry,
+    simplify_geometry,
+    unpack_geometry,
+    validate_collapsible,
+)
 
 
 @pytest.fixture(scope="session")
@@ -41,6 +54,17 @@ class TestBboxFromCoordinates:
     def test_different_nested(self):
         assert bbox_from_coordinates([[1, 2], [[[-1, -3, 33]]]]) == [-1, 1, -3, 2, 0, 33]
 
+    def test_negative_elevation_without_elevation(self):
+        assert bbox_from_coordinates([[1, 2, -4], [-1, -3]]) == [-1, 1, -3, 2, -4, 0]
+
+    def test_rings_of_different_lengths(self):
+        coordinates = [[[[0, 0], [1, 0], [1, 1], [0, 0]]], [[[5, 5], [6, 5], [6, 7], [5, 6], [5, 5]]]]
+        assert bbox_from_coordinates(coordinates) == [0, 6, 0, 7]
+
+    def test_rings_of_different_dimensions(self):
+        coordinates = [[[0, 0], [1, 0], [1, 1], [0, 0]], [[5, 5, -2], [6, 5, 1], [6, 7, 1], [5, 5, -2]]]
+        assert bbox_from_coordinates(coordinates) == [0, 6, 0, 7, -2, 1]
+
 
 @pytest.mark.parametrize("dimensions", [2, 3])
 class TestValidateCollapsible:
@@ -154,3 +178,229 @@ class TestCollapseGeometries:
         assert collapse_geometries(factory(geos)) == result(
             type=result.__name__, coordinates=[geos[0].coordinates, *geos[1].coordinates]
         ), f"Unable to collapse {factory_name} into a {result.__name__}"
+
+
+@pytest.mark.parametrize("dimensions", [2, 3])
+class TestPackGeometry:
+    def test_round_trip(self, fake, dimensions):
+        for geo in fake.collapsible_geojsons(dimensions) + fake.uncollapsible_geojsons(dimensions):
+            assert type(geo).model_validate(unpack_geometry(pack_geometry(geo.model_dump()))) == geo
+
+    def test_coordinates_packed(self, fake, dimensions):
+        for geo in fake.stac_geometries(dimensions):
+            packed = pack_geometry(geo.model_dump())
+            assert "coordinates" not in packed
+            assert isinstance(packed["packed_coordinates"]["data"], bytes)
+            assert packed["packed_coordinates"]["dimensions"] == dimensions
+
+    def test_float32(self, fake, dimensions):
+        geo = fake.geo_multipolygon(dimensions).model_dump()
+        packed = pack_geometry(geo, "<f4")
+        assert packed["packed_coordinates"]["dtype"] == "<f4"
+        unpacked = unpack_geometry(packed)
+        assert bbox_from_coordinates(unpacked["coordinates"]) == pytest.approx(
+            bbox_from_coordinates(geo["coordinates"]), rel=1e-6
+        )
+
+    def test_unpack_not_packed(self, fake, dimensions):
+        data = fake.collapsible_geojson(dimensions).model_dump()
+        assert unpack_geometry(data) == data
+
+    def test_none(self, dimensions):
+        assert pack_geometry(None) is None
+        assert unpack_geometry(None) is None
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            {"data": "abc"},
+            {"data": b"abc"},
+            {"dtype": "<i8"},
+            {"dtype": "bogus"},
+            {"dimensions": "x"},
+            {"offsets": [[0, 1000]]},
+            {"offsets": None},
+        ],
+    )
+    def test_unpack_invalid(self, fake, dimensions, change):
+        packed = pack_geometry(fake.geo_multipolygon(dimensions).model_dump())
+        packed["packed_coordinates"].update(change)
+        with pytest.raises(ValueError):
+            unpack_geometry(packed)
+
+    def test_unpack_missing_keys(self, dimensions):
+        with pytest.raises(ValueError):
+            unpack_geometry({"type": "Point", "packed_coordinates": {}})
+
+
+class TestPackGeometryMixedDimensions:
+    def test_round_trip(self):
+        data = {"type": "LineString", "coordinates": [[1.0, 2.0], [3.0, 4.0, 5.0]], "bbox": None}
+        assert unpack_geometry(pack_geometry(data)) == data
+
+    def test_multipolygon_offsets(self):
+        rings = [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]], [[2.0, 2.0], [3.0, 2.0], [3.0, 3.0], [2.0, 2.0]]]
+        data = {"type": "MultiPolygon", "coordinates": [rings, [rings[0]]]}
+        packed = pack_geometry(data)
+        assert packed["packed_coordinates"]["offsets"] == [[0, 2, 3], [0, 4, 8, 12]]
+        assert unpack_geometry(packed) == data
+
+
+class TestBboxToGeometries:
+    def test_polygon(self):
+        (polygon,) = bbox_to_geometries([0, 0, 20, 10])
+        assert polygon["type"] == "Polygon"
+        ring = polygon["coordinates"][0]
+        assert ring[0] == ring[-1]
+        assert ring[:4] == [[0, 0], [10, 0], [20, 0], [20, 10]]
+
+    def test_edge_length(self):
+        (polygon,) = bbox_to_geometries([0, 0, 25, 10], max_edge_length=5)
+        longitudes = [lon for lon, lat in polygon["coordinates"][0][:-1] if lat == 0]
+        assert longitudes == [0, 5, 10, 15, 20, 25]
+
+    def test_split_wide(self):
+        polygons = bbox_to_geometries([-180, -10, 180, 10])
+        assert len(polygons) == 4
+        assert [p["coordinates"][0][0][0] for p in polygons] == [-180, -90, 0, 90]
+
+    def test_antimeridian(self):
+        polygons = bbox_to_geometries([170, -10, -170, 10])
+        assert len(polygons) == 2
+        assert {lon for lon, _ in polygons[0]["coordinates"][0]} == {170, 180}
+        assert {lon for lon, _ in polygons[1]["coordinates"][0]} == {-180, -170}
+
+    def test_poles_clamped(self):
+        (polygon,) = bbox_to_geometries([0, -90, 10, 90])
+        assert all(abs(lat) < 90 for _, lat in polygon["coordinates"][0])
+
+    def test_3d(self):
+        assert bbox_to_geometries([0, 0, -5, 20, 10, 5]) == bbox_to_geometries([0, 0, 20, 10])
+
+    def test_point(self):
+        assert bbox_to_geometries([1, 2, 1, 2]) == [{"type": "Point", "coordinates": [1, 2]}]
+
+    def test_line(self):
+        assert bbox_to_geometries([1, 2, 3, 2]) == [{"type": "LineString", "coordinates": [[1, 2], [3, 2]]}]
+
+
+@pytest.mark.parametrize("dimensions", [2, 3])
+class TestFootprints:
+    def test_none(self, dimensions):
+        assert footprints(GeometrySummary(None)) == [None]
+
+    def test_precision_order(self, fake, dimensions):
+        geo = fake.geo_polygon(dimensions)
+        precise, bbox_footprint, last = footprints(GeometrySummary(geo))
+        assert precise == drop_elevation(geo)
+        assert bbox_footprint["type"] in ("Polygon", "MultiPolygon")
+        assert last is None
+
+    def test_collapsed(self, fake, dimensions):
+        for geo in fake.collapsible_geojsons(dimensions):
+            precise = footprints(GeometrySummary(geo))[0]
+            assert precise == drop_elevation(collapse_geometries(geo))
+
+    def test_point(self, dimensions):
+        point = Point(type="Point", coordinates=[1, 2, 3][:dimensions])
+        assert footprints(GeometrySummary(point)) == [
+            {"type": "Point", "coordinates": [1, 2]},
+            {"type": "Point", "coordinates": [1, 2]},
+            None,
+        ]
+
+
+@pytest.mark.parametrize("dimensions", [2, 3])
+class TestGeometrySummary:
+    def test_none(self, dimensions):
+        summary = GeometrySummary(None)
+        assert (summary.geometry, summary.bbox, summary.n_positions) == (None, None, 0)
+
+    def test_collapsible(self, fake, dimensions):
+        for geo in fake.collapsible_geojsons(dimensions):
+            summary = GeometrySummary(geo)
+            assert summary.geometry == collapse_geometries(geo)
+            assert summary.bbox == bbox_from_coordinates(summary.geometry.coordinates)
+
+    def test_uncollapsible(self, fake, dimensions):
+        for geo in fake.uncollapsible_geojsons(dimensions):
+            with pytest.raises(ValueError):
+                GeometrySummary(geo)
+
+    def test_n_positions(self, dimensions):
+        line = MultiLineString(type="MultiLineString", coordinates=[[[0, 0, 0][:dimensions]] * 2] * 3)
+        assert GeometrySummary(line).n_positions == 6
+
+    def test_empty_feature_collection(self, dimensions):
+        summary = GeometrySummary(FeatureCollection(type="FeatureCollection", features=[]))
+        assert (summary.geometry, summary.bbox, summary.n_positions) == (None, None, 0)
+
+    def test_feature_without_geometry(self, dimensions):
+        point = Point(type="Point", coordinates=[1, 2, 3][:dimensions])
+        geo = FeatureCollection(
+            type="FeatureCollection",
+            features=[
+                Feature(type="Feature", geometry=None, properties={}),
+                Feature(type="Feature", geometry=point, properties={}),
+            ],
+        )
+        assert GeometrySummary(geo).geometry == point
+
+    def test_computed_once(self, fake, dimensions):
+        summary = GeometrySummary(fake.geo_multipolygon(dimensions))
+        assert summary.geometry is summary.geometry
+        assert summary.bbox is summary.bbox
+
+    def test_equal(self, dimensions):
+        point = Point(type="Point", coordinates=[1, 2, 3][:dimensions])
+        assert GeometrySummary(point) == GeometrySummary(point.model_copy())
+        assert GeometrySummary(point) != GeometrySummary(None)
+
+
+def circle(n_points, radius=1.0):
+    angles = np.linspace(0, 2 * np.pi, n_points)
+    ring = np.column_stack((radius * np.cos(angles), radius * np.sin(angles))).tolist()
+    ring[-1] = ring[0]
+    return ring
+
+
+class TestSimplifyGeometry:
+    def test_collinear_line(self):
+        line = {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 0], [3, 0]]}
+        assert simplify_geometry(line, 0.1)["coordinates"] == [[0, 0], [3, 0]]
+
+    def test_tolerance(self):
+        line = {"type": "LineString", "coordinates": [[0, 0], [1, 0.3], [2, 0.5], [3, 0]]}
+        assert simplify_geometry(line, 0.1)["coordinates"] == [[0, 0], [2, 0.5], [3, 0]]
+        assert simplify_geometry(line, 1)["coordinates"] == [[0, 0], [3, 0]]
+
+    def test_within_tolerance(self):
+        ring = circle(1001)
+        simplified = simplify_geometry({"type": "Polygon", "coordinates": [ring]}, 0.01)["coordinates"][0]
+        assert 4 <= len(simplified) < len(ring) // 10
+        assert simplified[0] == simplified[-1] == ring[0]
+        assert all(np.hypot(*position) == pytest.approx(1) for position in simplified)
+
+    def test_ring_not_collapsed(self):
+        ring = circle(101, radius=0.001)
+        polygon = {"type": "MultiPolygon", "coordinates": [[circle(101), ring]]}
+        simplified = simplify_geometry(polygon, 1)["coordinates"]
+        assert [len(r) for r in simplified[0]] == [4, 4]
+        assert all(r[0] == r[-1] for r in simplified[0])
+
+    def test_elevation_kept(self):
+        line = {"type": "LineString", "coordinates": [[0, 0, 5], [1, 0.001], [2, 0, 3]]}
+        assert simplify_geometry(line, 0.01)["coordinates"] == [[0, 0, 5], [2, 0, 3]]
+
+    def test_points_unchanged(self):
+        points = {"type": "MultiPoint", "coordinates": [[0, 0], [0, 0.001], [0, 0.002]]}
+        assert simplify_geometry(points, 1) == points
+
+    def test_nested(self):
+        line = {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 0]]}
+        feature = {"type": "Feature", "geometry": line, "properties": {}}
+        collection = {"type": "FeatureCollection", "features": [feature]}
+        assert simplify_geometry(collection, 0.1)["features"][0]["geometry"]["coordinates"] == [[0, 0], [2, 0]]
+
+    def test_none(self):
+        assert simplify_geometry(None, 1) is None
@@ -0,0 +1,98 @@
+from contextlib import nullcontext
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import CollectorRegistry
+
+from marble_api.utils import metrics as metrics_module
+from marble_api.utils.metrics import UNMATCHED_ROUTE, Metrics, MetricsMiddleware, timed
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics_ = Metrics(registry=CollectorRegistry())
+    monkeypatch.setattr(metrics_module, "metrics", metrics_)
+    return metrics_
+
+
+def sample(metrics, name, **labels):
+    return metrics.registry.get_sample_value(name, labels)
+
+
+@pytest.fixture
+def app():
+    root = FastAPI()
+    version = FastAPI()
+
+    @version.get("/items/{item_id}")
+    async def get_item(item_id: str) -> dict:
+        return {"id": item_id}
+
+    @version.get("/error")
+    async def get_error() -> dict:
+        raise RuntimeError
+
+    root.mount("/v1", version)
+    root.add_middleware(MetricsMiddleware)
+    return root
+
+
+@pytest.fixture
+async def client(app):
+    async with AsyncClient(transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://test") as c:
+        yield c
+
+
+class TestTimed:
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(metrics_module, "metrics", None)
+        assert isinstance(timed("validation"), nullcontext)
+
+    def test_enabled(self, metrics):
+        with timed("validation"):
+            pass
+        assert sample(metrics, "marble_api_phase_duration_seconds_count", phase="validation") == 1
+
+
+class TestMetrics:
+    def test_render(self, metrics, monkeypatch):
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+        metrics.phase_duration.labels("stac_item").observe(0.01)
+        content, media_type = metrics.render()
+        assert b'marble_api_phase_duration_seconds_count{phase="stac_item"} 1.0' in content
+        assert media_type.startswith("text/plain")
+
+    def test_render_multiprocess(self, metrics, monkeypatch, tmp_path):
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        content, _ = metrics.render()
+        assert isinstance(content, bytes)
+
+
+class TestMetricsMiddleware:
+    async def test_request_duration(self, metrics, client):
+        await client.get("/v1/items/1")
+        await client.get("/v1/items/2")
+        labels = {"method": "GET", "route": "/v1/items/{item_id}", "status": "200"}
+        assert sample(metrics, "marble_api_http_request_duration_seconds_count", **labels) == 2
+
+    async def test_unmatched(self, metrics, client):
+        await client.get("/v1/unknown")
+        labels = {"method": "GET", "route": UNMATCHED_ROUTE, "status": "404"}
+        assert sample(metrics, "marble_api_http_request_duration_seconds_count", **labels) == 1
+
+    async def test_error(self, metrics, client):
+        await client.get("/v1/error")
+        labels = {"method": "GET", "route": "/v1/error", "status": "500"}
+        assert sample(metrics, "marble_api_http_request_duration_seconds_count", **labels) == 1
+
+    async def test_in_progress(self, metrics, client):
+        await client.get("/v1/items/1")
+        assert sample(metrics, "marble_api_http_requests_in_progress", method="GET") == 0
+
+    async def test_disabled(self, client, monkeypatch):
+        monkeypatch.setattr(metrics_module, "metrics", None)
+        response = await client.get("/v1/items/1")
+        assert response.json() == {"id": "1"}
@@ -1,12 +1,15 @@
 import datetime
+import json
 
+import bson
 import pytest
 from pydantic import TypeAdapter, ValidationError
-from pydantic_core import PydanticSerializationError
+from pydantic_core import PydanticSerializationError, to_json
 from pystac import Item
 
-from marble_api.utils.geojson import collapse_geometries
-from marble_api.versions.v1.data_request.models import Author, DataRequestUpdate
+from marble_api.utils.geojson import GeometrySummary, collapse_geometries, pack_geometry
+from marble_api.versions.v1.data_request import models
+from marble_api.versions.v1.data_request.models import Author, DataRequestPublic, DataRequestUpdate
 
 
 class TestAuthor:
@@ -94,6 +97,45 @@ class TestDataRequest:
         with pytest.raises(ValueError):
             fake_class(geometry=fake.uncollapsible_geojson())
 
+    def test_uncollapsible_geometry_location(self, fake, fake_class):
+        with pytest.raises(ValidationError) as e:
+            fake_class(geometry=fake.uncollapsible_geojson())
+        assert [error["loc"] for error in e.value.errors()] == [("geometry",)]
+
+    def test_geometry_summary(self, fake, fake_class):
+        request = fake_class()
+        assert request.geometry_summary == GeometrySummary(request.geometry)
+
+    def test_geometry_summary_memoized(self, fake_class, monkeypatch):
+        request = fake_class()
+        calls = []
+        monkeypatch.setattr(models, "GeometrySummary", lambda geojson: calls.append(geojson))
+        assert request.geometry_summary is request.geometry_summary
+        assert not calls
+
+    def test_geometry_summary_replaced_geometry(self, fake, fake_class):
+        request = fake_class()
+        request.geometry = fake.geo_point()
+        assert request.geometry_summary.geometry == request.geometry
+
+    def test_packed_geometry_not_accepted(self, fake, fake_class):
+        with pytest.raises(ValidationError):
+            fake_class(geometry=pack_geometry(fake.collapsible_geojson().model_dump()))
+
+    def test_stac_item_with_id(self, fake_class):
+        request = fake_class()
+        item = request.stac_item_with_id("1")
+        assert item["id"] == "1"
+        expected = DataRequestPublic(**{**request.model_dump(by_alias=True), "_id": "1"}).stac_item
+        assert json.loads(json.dumps(item)) == json.loads(json.dumps(expected))
+
+    def test_stac_item_with_id_uses_geometry_summary(self, fake_class, monkeypatch):
+        request = fake_class()
+        calls = []
+        monkeypatch.setattr(models, "GeometrySummary", lambda geojson: calls.append(geojson))
+        assert request.stac_item_with_id("1")["geometry"] == request.geometry_summary.geometry.model_dump()
+        assert not calls
+
 
 class TestDataRequestPublic(TestDataRequest):
     @pytest.fixture
@@ -117,6 +159,12 @@ class TestDataRequestPublic(TestDataRequest):
             assert request.stac_item["geometry"] is None
             assert request.stac_item["bbox"] is None
 
+        def test_replaced_geometry(self, fake, fake_class):
+            request = fake_class()
+            assert request.stac_item
+            request.geometry = fake.geo_point()
+            assert request.stac_item["geometry"] == request.geometry.model_dump()
+
         def test_single_temporal(self, fake_class):
             now = datetime.datetime.now(tz=datetime.timezone.utc)
             request = fake_class(temporal=[now])
@@ -167,6 +215,43 @@ class TestDataRequestPublic(TestDataRequest):
             request = fake_class()
             assert request.id == request.stac_item["id"]
 
+    class TestSerializeTrusted:
+        @pytest.fixture
+        def document(self, fake_class):
+            request = fake_class(id=str(bson.ObjectId()))
+            return {**request.model_dump(exclude={"id"}), "_id": bson.ObjectId(request.id)}
+
+        def test_same_as_validated(self, document):
+            expected = DataRequestPublic(**document).model_dump_json()
+            assert json.loads(to_json(DataRequestPublic.serialize_trusted(document))) == json.loads(expected)
+
+        def test_packed_geometry(self, document):
+            expected = DataRequestPublic(**document).model_dump_json()
+            document["geometry"] = pack_geometry(document["geometry"])
+            assert json.loads(to_json(DataRequestPublic.serialize_trusted(document))) == json.loads(expected)
+
+        def test_extra_fields(self, document):
+            document["stac_item"] = {"type": "Feature"}
+            assert DataRequestPublic.serialize_trusted(document)["stac_item"] == {"type": "Feature"}
+
+        def test_defaults(self, document):
+            del document["variables"]
+            assert DataRequestPublic.serialize_trusted(document)["variables"] == []
+
+        def test_datetime_temporal(self, document):
+            document["temporal"] = [datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)]
+            expected = DataRequestPublic(**document).model_dump(mode="json")
+            assert DataRequestPublic.serialize_trusted(document)["temporal"] == expected["temporal"]
+
+        def test_fields(self, document):
+            projected = {"_id": document["_id"], "title": document["title"]}
+            expected = {"id": str(document["_id"]), "title": document["title"]}
+            assert DataRequestPublic.serialize_trusted(projected, {"id", "title"}) == expected
+
+        def test_fields_defaults(self, document):
+            projected = {"_id": document["_id"]}
+            assert DataRequestPublic.serialize_trusted(projected, {"variables"})["variables"] == []
+
 
 class TestDataRequestUpdate(TestDataRequest):
     @pytest.fixture